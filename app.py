@@ -3,136 +3,169 @@ from dotenv import load_dotenv
 from src.accedian import AccedianConnection
 from src.juniper.connection import JuniperConnection
 from src.quickbase.quickbase import Quickbase
-from src.netbox.netbox import Netbox
+from src.netbox.netbox import DeviceRecord, Netbox, inventory_mirror
 from src.is_tools.is_tools import IsTools
 from src.mikrotik.connection import MikrotikConnection
 from src.cisco.connection import CiscoConnectionRouter, CiscoConnectionSwitch
+from src.cisco.async_connection import AsyncCiscoConnectionRouter
+from src.mikrotik.async_connection import AsyncMikrotikConnection
 from src.datacom.connection import DatacomConnection
 from pydantic import BaseModel, Field
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+import asyncio
+import hashlib
+import hmac
 import subprocess
 import platform
+from typing import Optional
 
 from src.versa.connection import VersaConnection
 from src.zabbix.connection import ZabbixPingCheckAction
+from infra.dispatch import BackendDispatcher
+from infra.stream import ChunkRelay
+from infra.deadline import Deadline, DeadlineExceeded, with_deadline
+from infra.config import NetboxConfig, SSHDriverConfig
 load_dotenv()
 
 
 
 mcp = FastMCP('igbot_mcp')
 
+
+def get_mikrotik_driver():
+    """
+    Return the Mikrotik driver selected by MIKROTIK_SSH_DRIVER ('paramiko' or 'asyncssh').
+    """
+    if SSHDriverConfig.get_mikrotik_driver() == "asyncssh":
+        return AsyncMikrotikConnection()
+    return MikrotikConnection()
+
+
+def get_cisco_router_driver():
+    """
+    Return the Cisco router driver selected by CISCO_SSH_DRIVER ('paramiko' or 'asyncssh').
+    """
+    if SSHDriverConfig.get_cisco_driver() == "asyncssh":
+        return AsyncCiscoConnectionRouter()
+    return CiscoConnectionRouter()
+
+
+async def run_steps(ctx: Context, vendor: str, steps: list) -> tuple:
+    """
+    Run (key, message, progress, func, kwargs) SSH steps one after another, keeping every part that completes.
+
+    A failing step is recorded as an error and the next one still runs. When the tool deadline
+    is reached the remaining steps are skipped and the parts gathered so far are returned.
+
+    :return: (parts keyed by step, note naming the step the deadline stopped at, or None).
+    """
+    parts = {}
+    for number, (key, message, progress, func, kwargs) in enumerate(steps, 1):
+        try:
+            await ctx.info(message)
+            await ctx.report_progress(progress, 100)
+            parts[key] = await BackendDispatcher.run("ssh", func, **kwargs)
+        except DeadlineExceeded:
+            skipped = ", ".join(step[0] for step in steps[number - 1:])
+            return parts, f"Deadline reached after step {number - 1} of {len(steps)}; not collected: {skipped}."
+        except Exception as e:
+            parts[key] = f"Error connecting to {vendor} device: {e}"
+    return parts, None
+
+
+def join_steps(parts: dict, note: Optional[str]) -> str:
+    """
+    Concatenate the text parts of run_steps, followed by its deadline note if any.
+    """
+    result = "".join(str(part) for part in parts.values())
+    return f"{result}\n{note}" if note else result
+
+
+async def _check_cpe_device(device: str, ctx: Context, record: Optional[DeviceRecord] = None):
+    """
+    Collect the CPE status of a single device of a site; record is looked up in Netbox when not given.
+    """
+    netbox = Netbox()
+    record = record or await BackendDispatcher.run("netbox", netbox.get_device_record, device)
+    management_ip = record.management_ip if record else None
+    print(f"Management IP for service {device}: {management_ip}")
+    if not management_ip:
+        return f"Management IP not found for service {device}."
+
+    device_type, manufacturer = record.device_type, record.manufacturer
+    if not device_type:
+        return f"Device name not found for service {device}."
+    if not manufacturer:
+        return f"Manufacturer not found for device {device}."
+
+    await ctx.info(f"Identified manufacturer for {device}: {manufacturer}...")
+    if "mikrotik" in manufacturer.lower():
+        mikrotik = get_mikrotik_driver()
+        try:
+            await ctx.info(f"Fetching system resource from {device} ...")
+            cpe_status = await BackendDispatcher.run("ssh", mikrotik.get_cpe_status, type="cpe", ip=management_ip)
+
+            return cpe_status
+        except Exception as e:
+            return f"Error connecting to Mikrotik device: {e}"
+    elif "cisco" in manufacturer.lower():
+        cisco = get_cisco_router_driver()
+        try:
+            await ctx.info(f"Fetching interfaces, logs, routes and ARP table from {device} ...")
+            return await BackendDispatcher.run("ssh", cisco.get_cpe_status, type="cpe", ip=management_ip)
+        except Exception as e:
+            return f"Error connecting to Cisco device: {e}"
+    elif "accedian" in manufacturer.lower():
+        accedian = AccedianConnection()
+        try:
+            await ctx.info(f"Fetching system resource, logs, MAC learning and port statistics from {device} ...")
+            return await BackendDispatcher.run("ssh", accedian.get_cpe_status, ip=management_ip)
+        except Exception as e:
+            return f"Error connecting to Accedian device: {e}"
+    return f"Manufacturer {manufacturer} of device {device} is not supported."
+
+
 @mcp.tool(
     name="CheckCpe",
     description="Check the CPE of a service including system resource, interface status, EOIP interfaces, L2TP interfaces, GRE interfaces, customer interface status, external MACs, and traffic statistics."
 )
+@with_deadline
 async def Check_cpe(service_id: str, ctx: Context):
     """
     Check the CPE of a service.
+
+    Every device of the site is checked concurrently and the results are keyed by device name.
     """
-    
+    if not service_id.strip():
+        return "Error: service_id must not be blank."
     netbox = Netbox()
-    await ctx.info(f"Fetching management IP for service {service_id} ...")
+    await ctx.info(f"Fetching devices for service {service_id} ...")
     await ctx.report_progress(10, 100)
 
-    devices = netbox.get_devices_by_site(service_id)
-    await ctx.info(f"Fetching devices for service {service_id} ...")
-    
-    if devices:
-        for device in devices:
-            management_ip = netbox.get_management_ip(device)
-            print(f"Management IP for service {device}: {management_ip}")
-            if not management_ip:
-                return f"Management IP not found for service {device}."
-            
-            await ctx.info(f"Fetching device type and manufacturer for service {device} ...")
-            await ctx.report_progress(20, 100)
-            device_type = netbox.get_device_type(device)
-            if not device_type:
-                return f"Device name not found for service {device}."
-            manufacturer = netbox.get_manufacturer(device)
-            if not manufacturer:
-                return f"Manufacturer not found for device {device}."
-        
-            await ctx.info(f"Identified manufacturer: {manufacturer}...")
-            await ctx.report_progress(30, 100)
-            if "mikrotik" in manufacturer.lower():
-                mikrotik = MikrotikConnection()
-                try:
-                    await ctx.info(f"Fetching system resource ...")
-                    await ctx.report_progress(70, 100)
-                    system_resource = mikrotik.get_system_resource(type="cpe", ip=management_ip)
-                    all_interface_status = mikrotik.get_allinterface_status(type="cpe", ip=management_ip)
-                    eoip_interfaces = mikrotik.get_eoip_interfaces(type="cpe", ip=management_ip)
-                    l2tp_interfaces = mikrotik.get_l2tp_interfaces(type="cpe", ip=management_ip)
-                    gre_interfaces = mikrotik.get_gre_interfaces(type="cpe", ip=management_ip)
-                    customer_interface_status = mikrotik.get_customer_interface_status(type="cpe", ip=management_ip)
-                    external_macs = mikrotik.get_external_macs_bridge_learned(type="cpe", ip=management_ip)
-                    traffic_statistics = mikrotik.get_traffic_statistics(type="cpe", ip=management_ip)
-
-                    return {
-                        "system_resource": system_resource,
-                        "all_interface_status": all_interface_status , 
-                        "eoip_interfaces": eoip_interfaces,
-                        "l2tp_interfaces": l2tp_interfaces,
-                        "gre_interfaces": gre_interfaces,
-                        "customer_interface_status": customer_interface_status,
-                        "external_macs": external_macs,
-                        "traffic_statistics": traffic_statistics
-                        }
-                except Exception as e:
-                    return f"Error connecting to Mikrotik device: {e}"
-            elif "cisco" in manufacturer.lower():
-                cisco = CiscoConnectionRouter()
-                try:
-                    await ctx.info(f"Fetching interfaces ...")
-                    await ctx.report_progress(70, 100)
-                    interfaces = cisco.get_interfaces(type="cpe", ip=management_ip)
-                    system_info = cisco.get_system_information(type="cpe", ip=management_ip)
-                    logs = cisco.get_logs(type="cpe", ip=management_ip)
-                    routes = cisco.get_route_table(type="cpe", ip=management_ip)
-                    arp_table = cisco.get_arp_table(type="cpe", ip=management_ip)
-                    
-                    return {
-                        "interfaces": interfaces,
-                        "system_info": system_info,
-                        "logs": logs,
-                        "routes": routes,
-                        "arp_table": arp_table
-                    }
-                except Exception as e:
-                    return f"Error connecting to Cisco device: {e}"
-            elif "accedian" in manufacturer.lower():
-                accedian = AccedianConnection()
-                try:
-                    await ctx.info(f"Fetching system resource ...")
-                    await ctx.report_progress(70, 100)
-                    system_info = accedian.get_system_information(ip=management_ip)
-                    logs = accedian.get_logs(ip=management_ip)
-                    mac_learning_results = accedian.get_mac_learning_results(ip=management_ip, port="Client")
-                    port_statistics = accedian.get_port_statistics(ip=management_ip)
-
-                    return {
-                        "system_info": system_info,
-                        "logs": logs,
-                        "mac_learning_results": mac_learning_results,
-                        "port_statistics": port_statistics
-                    }
-                except Exception as e:
-                    return f"Error connecting to Accedian device: {e}"
-    
-    else:
+    records = await BackendDispatcher.run("netbox", netbox.get_device_records, service_id)
+    if not records:
         return f"There werent any devices found for service {service_id}."
+    records = {record.name: record for record in records}
+
+    await ctx.info(f"Checking {len(records)} device(s) for service {service_id} ...")
+    await ctx.report_progress(30, 100)
+    results = await BackendDispatcher.fan_out(records, lambda device: _check_cpe_device(device, ctx, records[device]))
+    await ctx.report_progress(100, 100)
+    return results
 
 @mcp.tool(
     name="Check_versa",
     description="Check the Versa device of a service including system information, interfaces status, and troubleshooting."
 )
-def Check_versa(device_name: str):
+@with_deadline
+async def Check_versa(device_name: str):
     """
     Check the Versa device of a service.
     """
     versa = VersaConnection()
     try:
-        troubleshooting = versa.get_troubleshooting(device=device_name)
+        troubleshooting = await BackendDispatcher.run("versa", versa.get_troubleshooting, device=device_name)
         return troubleshooting
     except Exception as e:
         return f"Error connecting to Versa device: {e}"
@@ -141,100 +174,221 @@ def Check_versa(device_name: str):
 
 
 
+async def _check_config_cpe_device(device: str, ctx: Context, record: Optional[DeviceRecord] = None):
+    """
+    Collect the configuration of a single device of a site; record is looked up in Netbox when not given.
+    """
+    netbox = Netbox()
+    record = record or await BackendDispatcher.run("netbox", netbox.get_device_record, device)
+    management_ip = record.management_ip if record else None
+    print(f"Management IP for device {device}: {management_ip}")
+    await ctx.info(f"Management IP for device {device}: {management_ip}")
+    if not management_ip:
+        return f"Management IP not found for device {device}."
+    device_type, manufacturer = record.device_type, record.manufacturer
+    if not device_type:
+        return f"Device name not found for device {device}."
+    if not manufacturer:
+        return f"Manufacturer not found for device {device}."
+    await ctx.info(f"Identified manufacturer for {device}: {manufacturer}...")
+    if "mikrotik" in manufacturer.lower():
+        mikrotik = get_mikrotik_driver()
+        try:
+            await ctx.info(f"Fetching running config, IPs and firewall from {device} ...")
+            return await BackendDispatcher.run("ssh", mikrotik.get_config_status, type="cpe", ip=management_ip)
+        
+        except Exception as e:
+            return f"Error connecting to Mikrotik device: {e}"
+    elif "cisco" in manufacturer.lower():
+        cisco = get_cisco_router_driver()
+        try:
+            config = await BackendDispatcher.run("ssh", cisco.get_running_config, type="cpe", ip=management_ip)
+            return {
+                "config": config,
+            }
+        except Exception as e:
+            return f"Error connecting to Cisco device: {e}"
+
+    elif "accedian" in manufacturer.lower():
+        # Placeholder for Accedian device handling
+        return "Accedian device handling is not implemented yet."
+    return f"Manufacturer {manufacturer} of device {device} is not supported."
+
+
 @mcp.tool(
     name="CheckConfigCpe",
     description="Check the configuration of a CPE device including IPs, firewall, and running config."
 )
+@with_deadline
 async def Check_config_cpe(service_id: str, ctx: Context):
     """
     check config into cpe including ips and firewall and running config
 
+    Every device of the site is checked concurrently and the results are keyed by device name.
     """
+    if not service_id.strip():
+        return "Error: service_id must not be blank."
     netbox = Netbox()
 
-    devices = netbox.get_devices_by_site(service_id)
-    for device in devices:
-        management_ip = netbox.get_management_ip(device)
-        print(f"Management IP for device {device}: {management_ip}")
-        await ctx.info(f"Management IP for device {device}: {management_ip}")
-        await ctx.report_progress(10, 100)
-        if not management_ip:
-            return f"Management IP not found for device {device}."
-        device_type = netbox.get_device_type(device)
-        if not device_type:
-            return f"Device name not found for device {device}."
-        await ctx.report_progress(20, 100)
-        manufacturer = netbox.get_manufacturer(device)
-        if not manufacturer:
-            return f"Manufacturer not found for device {device}."
-        await ctx.report_progress(30, 100)
-        await ctx.info(f"Manufacturer not found for device {device}.")
-        if "mikrotik" in manufacturer.lower():
-            mikrotik = MikrotikConnection()
-            try:
-                await ctx.info(f"Fetching running config ...")
-                config = mikrotik.get_running_config(type="cpe", ip=management_ip)
-                await ctx.report_progress(50, 100)
-                await ctx.info(f"Fetching IPs ...")
-                ips = mikrotik.get_ip_address(type="cpe", ip=management_ip)
-                await ctx.report_progress(60, 100)
-                await ctx.info(f"Fetching firewall ...")
-                firewall = mikrotik.get_firewall_filter(type="cpe", ip=management_ip)
-                await ctx.report_progress(80, 100)
-                await ctx.info(f"Fetching running config ...")
-                return {
-                    "config": config,
-                    "ips": ips,
-                    "firewall": firewall
-                }
-            
-            except Exception as e:
-                return f"Error connecting to Mikrotik device: {e}"
-        elif "cisco" in manufacturer.lower():
-            cisco = CiscoConnectionRouter()
-            try:
-                config = cisco.get_running_config(type="cpe", ip=management_ip)
-                return {
-                    "config": config,
-                }
-            except Exception as e:
-                return f"Error connecting to Cisco device: {e}"
+    records = await BackendDispatcher.run("netbox", netbox.get_device_records, service_id)
+    if not records:
+        return f"There werent any devices found for service {service_id}."
+    records = {record.name: record for record in records}
+    await ctx.info(f"Checking configuration of {len(records)} device(s) for service {service_id} ...")
+    await ctx.report_progress(10, 100)
+    results = await BackendDispatcher.fan_out(records, lambda device: _check_config_cpe_device(device, ctx, records[device]))
+    await ctx.report_progress(100, 100)
+    return results
 
-        elif "accedian" in manufacturer.lower():
-            # Placeholder for Accedian device handling
-            return "Accedian device handling is not implemented yet."
+ 
+# Large outputs that StreamDeviceOutput can stream, per manufacturer
+STREAM_COMMANDS = {
+    "mikrotik": {"running_config": "/export", "logs": "/log print"},
+    "cisco": {"running_config": "show running-config", "logs": "show logging"},
+    "accedian": {"logs": "syslog show log"},
+}
+
+
+@mcp.tool(
+    name="StreamDeviceOutput",
+    description="Stream a large device output (running_config or logs) as log messages while the device produces it, and return a short summary.",
+)
+@with_deadline
+async def stream_device_output(device_name: str, ctx: Context, output: str = "running_config", type: str = "cpe"):
+    """
+    Stream the running config or logs of a device through ctx log messages.
+
+    The output is never held in memory as a whole: chunks are relayed to the client as they arrive
+    and the tool returns only its size and last lines.
+    """
+    netbox = Netbox()
+    record = await BackendDispatcher.run("netbox", netbox.get_device_record, device_name)
+    if not record or not record.management_ip:
+        return f"Management IP not found for device {device_name}."
+    management_ip, manufacturer = record.management_ip, record.manufacturer
+    if not manufacturer:
+        return f"Manufacturer not found for device {device_name}."
+    vendor = next((v for v in STREAM_COMMANDS if v in manufacturer.lower()), None)
+    if vendor is None or output not in STREAM_COMMANDS[vendor]:
+        return f"Streaming {output} is not supported for manufacturer {manufacturer}."
+    command = STREAM_COMMANDS[vendor][output]
+
+    relay = ChunkRelay(
+        asyncio.get_running_loop(),
+        lambda text: ctx.info(text),
+        progress=lambda sent: ctx.report_progress(sent),
+    )
+    await ctx.info(f"Streaming '{command}' from {device_name} ...")
+    try:
+        if vendor == "mikrotik":
+            error = await BackendDispatcher.run("ssh", MikrotikConnection.stream_command, type=type, ip=management_ip,
+                                                command=command, on_chunk=relay.feed)
+        elif vendor == "cisco":
+            error = await BackendDispatcher.run("ssh", CiscoConnectionRouter.stream_command, type=type, ip=management_ip,
+                                                command=command, on_chunk=relay.feed)
+        else:
+            error = await BackendDispatcher.run("ssh", AccedianConnection.stream_command, ip=management_ip,
+                                                command=command, on_chunk=relay.feed)
+    except Exception as e:
+        error = f"Error streaming from {manufacturer} device: {e}"
+    await relay.aclose()
+    return {"device": device_name, "command": command, **relay.summary(), "error": error or None}
+
+
+# Tables QueryDeviceTable can read, per manufacturer: table -> (getter, filters the device applies)
+DEVICE_TABLES = {
+    "mikrotik": {
+        "interfaces": ("get_allinterface_status", ("interface",)),
+        "ip_addresses": ("get_ip_address", ("interface", "address")),
+        "firewall": ("get_firewall_filter", ("chain", "interface")),
+    },
+    "cisco": {
+        "interfaces": ("get_interfaces", ("interface",)),
+        "arp": ("get_arp_table", ("address", "mac", "interface")),
+        "routes": ("get_route_table", ("prefix",)),
+        "logs": ("get_logs", ("pattern", "severity")),
+    },
+    "accedian": {"logs": ("get_logs", ("pattern",))},
+    "juniper": {
+        "interfaces": ("get_interfaces", ("interface", "pattern")),
+        "arp": ("get_arp_table", ("address", "mac", "interface")),
+        "routes": ("get_route_table", ("prefix",)),
+        "logs": ("get_logs", ("pattern",)),
+    },
+}
+
+
+@mcp.tool(
+    name="QueryDeviceTable",
+    description=(
+        "Read one table (interfaces, ip_addresses, firewall, arp, routes or logs) from a device, filtered on the device "
+        "by interface, address, prefix (CIDR), mac, chain, pattern (regex) or severity (0-7), so only matching rows are returned."
+    ),
+)
+@with_deadline
+async def query_device_table(device_name: str, table: str, ctx: Context, type: str = "cpe",
+                             interface: str = None, address: str = None, prefix: str = None, mac: str = None,
+                             chain: str = None, pattern: str = None, severity: int = None):
+    """
+    Read a filtered table from a device, translating the filters to the vendor's own filter syntax.
+    """
+    netbox = Netbox()
+    record = await BackendDispatcher.run("netbox", netbox.get_device_record, device_name)
+    if not record or not record.management_ip:
+        return f"Management IP not found for device {device_name}."
+    management_ip, manufacturer = record.management_ip, record.manufacturer
+    if not manufacturer:
+        return f"Manufacturer not found for device {device_name}."
+    vendor = next((v for v in DEVICE_TABLES if v in manufacturer.lower()), None)
+    if vendor is None or table not in DEVICE_TABLES[vendor]:
+        return f"Table {table} is not supported for manufacturer {manufacturer}."
+
+    getter, supported = DEVICE_TABLES[vendor][table]
+    given = {"interface": interface, "address": address, "prefix": prefix, "mac": mac,
+             "chain": chain, "pattern": pattern, "severity": severity}
+    filters = {name: value for name, value in given.items() if value is not None}
+    unsupported = sorted(set(filters) - set(supported))
+    if unsupported:
+        return f"Filter(s) {', '.join(unsupported)} not supported for {table} on {manufacturer}; use {', '.join(supported)}."
+
+    await ctx.info(f"Fetching {table} from {device_name} with filters {filters or 'none'} ...")
+    try:
+        if vendor == "mikrotik":
+            return await BackendDispatcher.run("ssh", getattr(get_mikrotik_driver(), getter), type=type, ip=management_ip, **filters)
+        if vendor == "cisco":
+            return await BackendDispatcher.run("ssh", getattr(get_cisco_router_driver(), getter), type=type, ip=management_ip, **filters)
+        driver = JuniperConnection() if vendor == "juniper" else AccedianConnection()
+        return await BackendDispatcher.run("ssh", getattr(driver, getter), ip=management_ip, **filters)
+    except Exception as e:
+        return f"Error reading {table} from {manufacturer} device: {e}"
 
-        elif "accedian" in manufacturer.lower():
-            # Placeholder for Accedian device handling
-            return "Accedian device handling is not implemented yet."     
 
- 
 @mcp.tool(
     name="get_nni",
     description="Get the NNI of a service."
 )
+@with_deadline
 async def get_nni(service_id: str, ctx: Context):
     """
     Get the NNI of a service.
     """
     quickbase = Quickbase()
-    await ctx.info(f"Fetching NNI ...")
+    await ctx.info(f"Fetching NNI and equipment ...")
     await ctx.report_progress(10, 100)
-    nni = quickbase.get_NNI(service_id)
+    dossier = await BackendDispatcher.run("quickbase", quickbase.get_service_dossier, service_id)
+    nni, equipment = dossier.nni, dossier.equipment
+    if "nni" in dossier.errors:
+        return f"Error retrieving NNI for service {service_id}: {dossier.errors['nni']}"
     if not nni:
         return f"NNI not found for service {service_id}."
     
-    await ctx.info(f"Fetching equipment ...")
-    await ctx.report_progress(20, 100)
-    equipment = quickbase.Get_equipment(nni)
-    await ctx.info(f"Fetching equipment from quickbase...")
     await ctx.report_progress(70, 100)
     if not equipment:
         await ctx.info(f"No equipment found in quickbase, fetching equipment from is-tools...")
         await ctx.info(f"Fetching equipment ...")
         await ctx.report_progress(70, 100)
         istools = IsTools()
-        equipment = istools.get_equipment(name=nni)
+        equipment = await BackendDispatcher.run("istools", istools.get_equipment, name=nni)
         if not equipment:
             return {
                     "nni": nni,
@@ -250,18 +404,22 @@ async def get_nni(service_id: str, ctx: Context):
     name="get_cross_connect",
     description="Get the cross connect of a service.",
 )
-def get_cross_connect(service_id: str):
+@with_deadline
+async def get_cross_connect(service_id: str):
     """
     Get the cross connect of a service.
 
     """
     quickbase = Quickbase()
-    cross_connect = quickbase.Get_cross_connect(service_id)
+    dossier = await BackendDispatcher.run("quickbase", quickbase.get_service_dossier, service_id)
+    cross_connect = dossier.cross_connect
+    if "cross_connect" in dossier.errors:
+        return f"Error retrieving cross connect for service {service_id}: {dossier.errors['cross_connect']}"
     if not cross_connect: 
         return f"Cross connect not found for service {service_id}."
 
     istools = IsTools()
-    equipment = istools.get_equipment(name=cross_connect)
+    equipment = await BackendDispatcher.run("istools", istools.get_equipment, name=cross_connect)
     if not equipment:
         return f"Equipment not found for cross connect {cross_connect}."
     
@@ -275,24 +433,23 @@ def get_cross_connect(service_id: str):
     name="check_service_on_cross",
     description="Check if a service is on a cross equipment.",
 )   
+@with_deadline
 async def check_service_on_cross(cross_equipment: str, service_id: str, ctx: Context):
     """
     Check if a service is on a cross equipment.
     """
     if cross_equipment:
         netbox = Netbox()
-        await ctx.info(f"Fetching management IP ...")
+        await ctx.info(f"Fetching management IP, device type and manufacturer ...")
         await ctx.report_progress(20, 100)
-        management_ip = netbox.get_management_ip(cross_equipment)
-        if not management_ip:
+        record = await BackendDispatcher.run("netbox", netbox.get_device_record, cross_equipment)
+        if not record or not record.management_ip:
             return f"Management IP not found for cross equipment {cross_equipment}."
-        await ctx.info(f"Fetching device type and manufacturer ...")
         await ctx.report_progress(30, 100)
-        
-        device_type = netbox.get_device_type(cross_equipment)
+
+        management_ip, device_type, manufacturer = record.management_ip, record.device_type, record.manufacturer
         if not device_type:
             return f"Device type not found for cross equipment {cross_equipment}."
-        manufacturer = netbox.get_manufacturer(cross_equipment)
         if not manufacturer:
             return f"Manufacturer not found for cross equipment {cross_equipment}."
 
@@ -303,35 +460,25 @@ async def check_service_on_cross(cross_equipment: str, service_id: str, ctx: Con
             try:
                 await ctx.info(f"Fetching troubleshooting ...")
                 await ctx.report_progress(70, 100)
-                result = datacom.troubleshooting_datacom(hostname=management_ip, service=service_id)
+                result = await BackendDispatcher.run("ssh", datacom.troubleshooting_datacom, hostname=management_ip, service=service_id, device_type=device_type)
                 return result
             except Exception as e:
                 return f"Error connecting to Datacom device: {e}"
         elif "cisco" in manufacturer.lower():
             cisco = CiscoConnectionSwitch()
-            try:
-                await ctx.info(f"Fetching system information ...")
-                await ctx.report_progress(70, 100)
-                result = cisco.get_system_information(ip=management_ip)
-                await ctx.info(f"Fetching interface status ...")
-                await ctx.report_progress(80, 100)
-                result += cisco.get_interface_status(ip=management_ip, service=service_id )
-                return result
-            except Exception as e:
-                return f"Error connecting to Cisco device: {e}"
+            parts, note = await run_steps(ctx, "Cisco", [
+                ("system_information", "Fetching system information ...", 70, cisco.get_system_information, {"ip": management_ip}),
+                ("interface_status", "Fetching interface status ...", 80, cisco.get_interface_status, {"ip": management_ip, "service": service_id}),
+            ])
+            return join_steps(parts, note)
 
         elif "juniper" in manufacturer.lower():
             juniper = JuniperConnection()
-            try:
-                await ctx.info(f"Fetching system information...")
-                await ctx.report_progress(70, 100)
-                result = juniper.get_system_information(ip=management_ip)
-                await ctx.info(f"Fetching interface information... and other info ... ")
-                await ctx.report_progress(70, 100)
-                result += juniper.get_junos_troubleshooting(ip=management_ip, service=service_id)
-                return result
-            except Exception as e:
-                return f"Error connecting to Juniper device: {e}"
+            parts, note = await run_steps(ctx, "Juniper", [
+                ("system_information", "Fetching system information...", 70, juniper.get_system_information, {"ip": management_ip}),
+                ("troubleshooting", "Fetching interface information... and other info ... ", 70, juniper.get_junos_troubleshooting, {"ip": management_ip, "service": service_id}),
+            ])
+            return join_steps(parts, note)
     else:
         return f"Cross equipment not found for service {service_id}."
 
@@ -340,6 +487,7 @@ async def check_service_on_cross(cross_equipment: str, service_id: str, ctx: Con
     name="Check_status_service_on_nni",
     description="Check the status of a service on a NNI.",
 )
+@with_deadline
 async def Check_status_service_on_nni(nni: str , service_id: str, ctx: Context):
     """
     Check the status of a service on a NNI. 
@@ -347,25 +495,22 @@ async def Check_status_service_on_nni(nni: str , service_id: str, ctx: Context):
     await ctx.info(f"Fetching status of service {service_id} on NNI {nni} ...")
     await ctx.report_progress(10, 100)
     quickbase = Quickbase()
-    equipment = quickbase.Get_equipment(nni)
+    equipment = await BackendDispatcher.run("quickbase", quickbase.Get_equipment, nni)
 
     if not equipment:
         istools = IsTools()
-        equipment = istools.get_equipment(name=nni)
+        equipment = await BackendDispatcher.run("istools", istools.get_equipment, name=nni)
         if not equipment:
             return f"Equipment not found for NNI {nni}."
     netbox = Netbox()
-    await ctx.info(f"Fetching management IP ...")
+    await ctx.info(f"Fetching management IP, device type and manufacturer ...")
     await ctx.report_progress(20, 100)
-    management_ip = netbox.get_management_ip(equipment)
-    if not management_ip:
+    record = await BackendDispatcher.run("netbox", netbox.get_device_record, equipment)
+    if not record or not record.management_ip:
         return f"Management IP not found for equipment {equipment}."
-    device_type = netbox.get_device_type(equipment)
-    await ctx.info(f"Fetching Device type and Manufacturer...")
-    await ctx.report_progress(20, 100)
+    management_ip, device_type, manufacturer = record.management_ip, record.device_type, record.manufacturer
     if not device_type:
         return f"Device type not found for equipment {equipment}."
-    manufacturer = netbox.get_manufacturer(equipment)
     if not manufacturer:
         return f"Manufacturer not found for equipment {equipment}."
     
@@ -376,42 +521,33 @@ async def Check_status_service_on_nni(nni: str , service_id: str, ctx: Context):
         try:
             await ctx.info(f"Fetching troubleshooting ...")
             await ctx.report_progress(70, 100)
-            result = datacom.troubleshooting_datacom(hostname=management_ip, service=service_id)
+            result = await BackendDispatcher.run("ssh", datacom.troubleshooting_datacom, hostname=management_ip, service=service_id, device_type=device_type)
             return result
         except Exception as e:
             return f"Error connecting to Datacom device: {e}"
     elif "cisco" in manufacturer.lower():
         cisco = CiscoConnectionSwitch()
         print(cisco)
-        try:
-            await ctx.info(f"Fetching system information ...")
-            await ctx.report_progress(70, 100)
-            result = cisco.get_system_information(ip=management_ip)
-            await ctx.info(f"Fetching interface status ...")
-            await ctx.report_progress(80, 100)
-            await ctx.info(f" ip {management_ip} and service {service_id} ...")
-            result += cisco.get_interface_status(ip=management_ip, service=service_id)
-            return result
-        except Exception as e:
-            return f"Error connecting to Cisco device: {e}"
+        parts, note = await run_steps(ctx, "Cisco", [
+            ("system_information", "Fetching system information ...", 70, cisco.get_system_information, {"ip": management_ip}),
+            ("interface_status", f"Fetching interface status of ip {management_ip} and service {service_id} ...", 80,
+             cisco.get_interface_status, {"ip": management_ip, "service": service_id}),
+        ])
+        return join_steps(parts, note)
 
     elif "juniper" in manufacturer.lower():
         juniper = JuniperConnection()
-        try:
-            await ctx.info(f"Fetching system information...")
-            await ctx.report_progress(70, 100)
-            result = juniper.get_system_information(ip=management_ip)
-            await ctx.info(f"Fetching interface information... and other info ... ")
-            await ctx.report_progress(70, 100)
-            result += juniper.get_junos_troubleshooting(ip=management_ip, service=service_id)
-            return result
-        except Exception as e:
-            return f"Error connecting to Juniper device: {e}"
+        parts, note = await run_steps(ctx, "Juniper", [
+            ("system_information", "Fetching system information...", 70, juniper.get_system_information, {"ip": management_ip}),
+            ("troubleshooting", "Fetching interface information... and other info ... ", 70, juniper.get_junos_troubleshooting, {"ip": management_ip, "service": service_id}),
+        ])
+        return join_steps(parts, note)
        
 @mcp.tool(
     name="CheckDevicesOnNetbox",
     description="Check devices on Netbox for a given site."
 )
+@with_deadline
 async def get_devices_by_site(site , ctx: Context):
     """
     Check devices on Netbox for a given site.
@@ -419,26 +555,21 @@ async def get_devices_by_site(site , ctx: Context):
     netbox = Netbox()
     await ctx.info(f"Fetching devices for site {site} ...")
     await ctx.report_progress(10, 100)
-    devices = netbox.get_devices_by_site(site)
+    records = await BackendDispatcher.run("netbox", netbox.get_device_records, site)
     
-    if not devices:
+    if not records:
         return f"No devices found for site {site}."
     
+    await ctx.report_progress(90, 100)
     device_info = []
-    for device in devices:
-        await ctx.info(f"Fetching management IP for device {device} ...")
-        management_ip = netbox.get_management_ip(device)
-        if not management_ip:
+    for record in records:
+        if not record.management_ip:
             continue
-        await ctx.info(f"Fetching device type and manufacturer for device {device} ...")
-        await ctx.report_progress(90, 100)
-        device_type = netbox.get_device_type(device)
-        manufacturer = netbox.get_manufacturer(device)
         device_info.append({
-            "device": device,
-            "management_ip": management_ip,
-            "device_type": device_type,
-            "manufacturer": manufacturer
+            "device": record.name,
+            "management_ip": record.management_ip,
+            "device_type": record.device_type,
+            "manufacturer": record.manufacturer
         })
     
     return device_info
@@ -448,26 +579,58 @@ async def get_devices_by_site(site , ctx: Context):
     name="get_pop_for_service",
     description="Check the POP service for a given service ID.",
 )
-def get_pop_for_service(service_id: str) -> dict: 
+@with_deadline
+async def get_pop_for_service(service_id: str) -> dict: 
     """
     Check the POP service for a given service ID.
+
+    Each device maps to its ConnectedTo POP with the POP's management IP, model and manufacturer,
+    resolved in one batch and cached for check_service_in_pop.
     """
     netbox = Netbox() 
-    devices = netbox.get_devices_by_site(service_id)
-    if devices:
-        device_and_pop = {}
-        for device in devices:
-            pop = netbox.get_connected_to(device)
-            device_and_pop[device] = pop if pop else None
-        
-        return device_and_pop
+    records = await BackendDispatcher.run("netbox", netbox.get_device_records, service_id)
+    if records:
+        return await BackendDispatcher.run("netbox", netbox.get_connected_pops, [record.name for record in records])
     else:
         return {"error": "No devices found for service ID."}
 
+@mcp.custom_route("/netbox/webhook", methods=["POST"])
+async def netbox_webhook(request: Request):
+    """
+    Receive NetBox webhooks and evict the changed devices from the Netbox lookup caches.
+
+    When NETBOX_WEBHOOK_SECRET is set, the X-Hook-Signature header (HMAC-SHA512 of the body)
+    must match.
+    """
+    body = await request.body()
+    secret = NetboxConfig.get_webhook_secret()
+    if secret:
+        expected = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+        if not hmac.compare_digest(expected, request.headers.get("X-Hook-Signature", "")):
+            return JSONResponse({"error": "invalid signature"}, status_code=403)
+    try:
+        payload = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "invalid JSON body"}, status_code=400)
+    if not isinstance(payload, dict):
+        return JSONResponse({"error": "JSON body must be an object"}, status_code=400)
+    dropped = Netbox.apply_webhook(payload)
+    return JSONResponse({"evicted": dropped, "cache": Netbox.cache_stats()})
+
+
+@mcp.custom_route("/netbox/cache", methods=["GET"])
+async def netbox_cache_stats(request: Request):
+    """
+    Hit/miss counters of the Netbox lookup caches and the state of the inventory mirror.
+    """
+    return JSONResponse(Netbox.cache_stats())
+
+
 @mcp.tool(
     name="check_service_in_pop",
     description="Check if a service is in the POP.",
 )
+@with_deadline
 async def check_service_in_pop(service_id: str, pop_device: str , ctx: Context):
     """
     Check if a service is in the POP.
@@ -475,20 +638,16 @@ async def check_service_in_pop(service_id: str, pop_device: str , ctx: Context):
     await ctx.info(f"Checking service {service_id} in POP {pop_device} ...")
     if pop_device: 
         netbox = Netbox()
-        management_ip = netbox.get_management_ip(pop_device)
+        record = await BackendDispatcher.run("netbox", netbox.get_device_record, pop_device)
+        management_ip = record.management_ip if record else None
         print(f"Found ip for device {pop_device}:  {management_ip}")
         if not management_ip:
             return f"Management IP not found for device {pop_device}."
-        await ctx.info(f"Fetching device type and manufacturer for device {pop_device} ...")
-        await ctx.report_progress(20, 100)
-        device_type = netbox.get_device_type(pop_device)
+        device_type, manufacturer = record.device_type, record.manufacturer
         await ctx.report_progress(30, 100)
         await ctx.info(f"Identified device type: {device_type}...")
         if not device_type:
             return f"Device type not found for device {pop_device}."
-        await ctx.info(f"Fetching manufacturer for device {pop_device} ...")
-        await ctx.report_progress(40, 100)
-        manufacturer = netbox.get_manufacturer(pop_device)
         await ctx.report_progress(50, 100)
         await ctx.info(f"Identified manufacturer: {manufacturer}...")
         if not manufacturer:
@@ -498,67 +657,40 @@ async def check_service_in_pop(service_id: str, pop_device: str , ctx: Context):
                 try:
                     await ctx.info(f"Fetching troubleshooting ...")
                     await ctx.report_progress(70, 100)
-                    result = datacom.troubleshooting_datacom(hostname=management_ip, service=service_id)
+                    result = await BackendDispatcher.run("ssh", datacom.troubleshooting_datacom, hostname=management_ip, service=service_id, device_type=device_type)
                     return result
                 except Exception as e:
                     return f"Error connecting to Datacom device: {e}"
         elif "cisco" in manufacturer.lower():
             cisco = CiscoConnectionSwitch()
-            try:
-                await ctx.info(f"Fetching system information ...")
-                await ctx.report_progress(70, 100)
-                result = cisco.get_system_information(ip=management_ip)
-                await ctx.info(f"Fetching interface status ...")
-                await ctx.report_progress(80, 100)
-                result += cisco.get_interface_status(ip=management_ip, service=service_id )
-                return result
-            except Exception as e:
-                return f"Error connecting to Cisco device: {e}"
+            parts, note = await run_steps(ctx, "Cisco", [
+                ("system_information", "Fetching system information ...", 70, cisco.get_system_information, {"ip": management_ip}),
+                ("interface_status", "Fetching interface status ...", 80, cisco.get_interface_status, {"ip": management_ip, "service": service_id}),
+            ])
+            return join_steps(parts, note)
 
         elif "juniper" in manufacturer.lower():
             juniper = JuniperConnection()
-            try:
-                await ctx.info(f"Fetching system information...")
-                await ctx.report_progress(70, 100)
-                result = juniper.get_system_information(ip=management_ip)
-                await ctx.info(f"Fetching interface information... and other info ... ")
-                await ctx.report_progress(70, 100)
-                result += juniper.get_junos_troubleshooting(ip=management_ip, service=service_id)
-                return result
-            except Exception as e:
-                return f"Error connecting to Juniper device: {e}"
+            parts, note = await run_steps(ctx, "Juniper", [
+                ("system_information", "Fetching system information...", 70, juniper.get_system_information, {"ip": management_ip}),
+                ("troubleshooting", "Fetching interface information... and other info ... ", 70, juniper.get_junos_troubleshooting, {"ip": management_ip, "service": service_id}),
+            ])
+            return join_steps(parts, note)
             
         elif "mikrotik" in manufacturer.lower():
-            mikrotik = MikrotikConnection()
-            try:
-                await ctx.info(f"Fetching system resource ...")
-                await ctx.report_progress(70, 100)
-                system_resource = mikrotik.get_system_resource(type="pop", ip=management_ip)
-                await ctx.info(f"Fetching EOIP interfaces ...")
-                print("resource", system_resource)
-                interfaces = mikrotik.get_eoip_interfaces(type="pop", ip=management_ip, service=service_id)
-                print("interfaces", interfaces)
-                await ctx.info(f"Fetching L2TP interfaces ...")
-                await ctx.report_progress(80, 100)
-                l2tp_interfaces = mikrotik.get_l2tp_interfaces(type="pop", ip=management_ip, service=service_id)
-                print("l2tp_interfaces", l2tp_interfaces)
-                await ctx.info(f"Fetching GRE interfaces ...")
-                await ctx.report_progress(90, 100)
-                gre_interfaces = mikrotik.get_gre_interfaces(type="pop", ip=management_ip, service=service_id)
-                print("gre_interfaces", gre_interfaces)
-                await ctx.info(f"Fetching macs learned into bridge ...")
-                await ctx.report_progress(100, 100)
-                external_macs = mikrotik.get_external_macs_bridge_learned(type="pop", ip=management_ip, service=service_id)
-                print("external_macs", external_macs)
-                return {
-                    "system_resource": system_resource,
-                    "eoip_interfaces": interfaces,
-                    "l2tp_interfaces": l2tp_interfaces,
-                    "gre_interfaces": gre_interfaces, 
-                    "external_macs": external_macs
-                }
-            except Exception as e:
-                return f"Error connecting to Mikrotik device: {e}"
+            mikrotik = get_mikrotik_driver()
+            pop = {"type": "pop", "ip": management_ip}
+            parts, note = await run_steps(ctx, "Mikrotik", [
+                ("system_resource", "Fetching system resource ...", 70, mikrotik.get_system_resource, pop),
+                ("eoip_interfaces", "Fetching EOIP interfaces ...", 70, mikrotik.get_eoip_interfaces, {**pop, "service": service_id}),
+                ("l2tp_interfaces", "Fetching L2TP interfaces ...", 80, mikrotik.get_l2tp_interfaces, {**pop, "service": service_id}),
+                ("gre_interfaces", "Fetching GRE interfaces ...", 90, mikrotik.get_gre_interfaces, {**pop, "service": service_id}),
+                ("external_macs", "Fetching macs learned into bridge ...", 100, mikrotik.get_external_macs_bridge_learned, {**pop, "service": service_id}),
+            ])
+            print("pop parts", parts)
+            if note:
+                parts["deadline"] = note
+            return parts
                 
     return f"Service check in POP for service ID {service_id} is not implemented yet."
 
@@ -567,6 +699,7 @@ async def check_service_in_pop(service_id: str, pop_device: str , ctx: Context):
     name="ping",
     description="ping to host, parameters host and count",
 )
+@with_deadline
 def ping(ip: str, count=5):
     import subprocess
     import platform
@@ -576,13 +709,14 @@ def ping(ip: str, count=5):
     else:
         command = ["ping", "-c", str(count), ip]
     try:
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                timeout=Deadline.timeout(int(count) * 2 + 10))
         return {
             "sucesso": result.returncode == 0,
             "saida": result.stdout,
             "erro": result.stderr
         }
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, DeadlineExceeded):
         return {"sucesso": False, "erro": "Timeout"}
     
 
@@ -590,6 +724,7 @@ def ping(ip: str, count=5):
     name="traceroute",
     description="traceroute to host, parameters host",
 )
+@with_deadline
 def traceroute(ip: str):
     """
     perform traceroute to host, parameters host
@@ -601,22 +736,27 @@ def traceroute(ip: str):
         command = ["traceroute", "-q", "1", "-w", "1", "-m", "10", ip]
 
     try:
-        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                timeout=Deadline.timeout(60))
         return {
             "sucesso": result.returncode == 0,
             "saida": result.stdout,
             "erro": result.stderr
         }
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, DeadlineExceeded):
         return {"sucesso": False, "erro": "Timeout"}
 
 @mcp.tool(
     name="get_solution",
     description="Get the solution for a service from Quickbase.",
 )
-def get_solution(service: str) -> str:
+@with_deadline
+async def get_solution(service: str) -> str:
     quickbase = Quickbase()
-    service_info = quickbase.get_service_information(service)
+    dossier = await BackendDispatcher.run("quickbase", quickbase.get_service_dossier, service)
+    service_info = dossier.solution
+    if "solution" in dossier.errors:
+        return f"Error retrieving service {service}: {dossier.errors['solution']}"
     if not service_info:
         return f"Service {service} not found."
     return service_info
@@ -626,9 +766,13 @@ def get_solution(service: str) -> str:
     name="get_public_ips",
     description="Get the public IPs for a service from Quickbase.",
 )
-def get_public_ips(service: str) -> dict:
+@with_deadline
+async def get_public_ips(service: str) -> dict:
     quickbase = Quickbase()
-    public_ips = quickbase.get_vendor_public_ip(service)
+    dossier = await BackendDispatcher.run("quickbase", quickbase.get_service_dossier, service)
+    public_ips = dossier.public_ips
+    if "public_ips" in dossier.errors:
+        return f"Error retrieving public IPs for service {service}: {dossier.errors['public_ips']}"
     if not public_ips:
         return {"wan_ips": [], "gateway_ips": []}
     return {
@@ -641,23 +785,25 @@ def get_public_ips(service: str) -> dict:
     name="get_zabbix_service_analysis",
     description="Get Zabbix analysis for a service.",
 )
-def get_zabbix_service_analysis(service: str, hours: int = 12):
+@with_deadline
+async def get_zabbix_service_analysis(service: str, hours: int = 12):
     """
     Get Zabbix analysis for a service.
     """
     zabbix_service = ZabbixPingCheckAction()
-    return zabbix_service.zabbix_troubleshooting(service, hours=hours)
+    return await BackendDispatcher.run("zabbix", zabbix_service.zabbix_troubleshooting, service, hours=hours)
 
 @mcp.tool(
     name="get_zabbix_all_hosts_analysis",
     description="Get Zabbix analysis for all hosts.",
 )
-def get_zabbix_all_hosts_analysis(hours: int = 12):
+@with_deadline
+async def get_zabbix_all_hosts_analysis(hours: int = 12):
     """
     Get Zabbix analysis for all hosts in Zabbix.
     """
     zabbix_service = ZabbixPingCheckAction()
-    return zabbix_service.zabbix_troubleshooting_all_hosts(hours=hours)
+    return await BackendDispatcher.run("zabbix", zabbix_service.zabbix_troubleshooting_all_hosts, hours=hours)
 
 @mcp.prompt(title="Troubleshooting cpe")
 def troubleshooting(service: str) -> str:
@@ -686,6 +832,8 @@ def troubleshooting(service: str) -> str:
     return prompt
 
 if __name__ == "__main__":
+    if NetboxConfig.get_mirror_interval() > 0:
+        inventory_mirror.start()
     mcp.run(transport='sse', port=8080, host='0.0.0.0')
 
 
@@ -5,6 +5,15 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
 class NetboxConfig:
     NETBOX_HOST = os.getenv('NETBOX_HOST', None)
     NETBOX_TOKEN = os.getenv('NETBOX_TOKEN', None)
+    NETBOX_POOL_SIZE = int(os.getenv('NETBOX_POOL_SIZE', 16))
+    NETBOX_THREADING = os.getenv('NETBOX_THREADING', 'true').lower() in ('1', 'true', 'yes')
+    NETBOX_GRAPHQL = os.getenv('NETBOX_GRAPHQL', 'true').lower() in ('1', 'true', 'yes')
+    NETBOX_CACHE_TTL = int(os.getenv('NETBOX_CACHE_TTL', 300))
+    NETBOX_CACHE_SIZE = int(os.getenv('NETBOX_CACHE_SIZE', 2048))
+    NETBOX_WEBHOOK_SECRET = os.getenv('NETBOX_WEBHOOK_SECRET', None)
+    NETBOX_MIRROR_INTERVAL = int(os.getenv('NETBOX_MIRROR_INTERVAL', 0))
+    NETBOX_MIRROR_FULL_RESYNC = int(os.getenv('NETBOX_MIRROR_FULL_RESYNC', 3600))
+    NETBOX_MIRROR_MAX_AGE = int(os.getenv('NETBOX_MIRROR_MAX_AGE', 300))
 
     @classmethod
     def get_netbox_url(cls):
@@ -13,6 +22,51 @@ class NetboxConfig:
     @classmethod
     def get_netbox_token(cls):
         return cls.NETBOX_TOKEN
+
+    @classmethod
+    def get_pool_size(cls) -> int:
+        """Keep-alive HTTP connections the shared NetBox client keeps open (one per concurrent request)."""
+        return cls.NETBOX_POOL_SIZE
+
+    @classmethod
+    def get_threading(cls) -> bool:
+        """Whether pynetbox fetches the pages of large filter() results in parallel."""
+        return cls.NETBOX_THREADING
+
+    @classmethod
+    def get_graphql(cls) -> bool:
+        """Whether site/service device lookups use the GraphQL API (falling back to REST on error)."""
+        return cls.NETBOX_GRAPHQL
+
+    @classmethod
+    def get_cache_ttl(cls) -> int:
+        """Seconds a device lookup is served from the in-process cache; 0 disables caching."""
+        return cls.NETBOX_CACHE_TTL
+
+    @classmethod
+    def get_cache_size(cls) -> int:
+        """Maximum number of cached device and site/service lookups (each, LRU)."""
+        return cls.NETBOX_CACHE_SIZE
+
+    @classmethod
+    def get_webhook_secret(cls):
+        """Secret configured on the NetBox webhook; when set, unsigned invalidation requests are rejected."""
+        return cls.NETBOX_WEBHOOK_SECRET
+
+    @classmethod
+    def get_mirror_interval(cls) -> int:
+        """Seconds between incremental inventory mirror syncs; 0 (default) disables the mirror."""
+        return cls.NETBOX_MIRROR_INTERVAL
+
+    @classmethod
+    def get_mirror_full_resync(cls) -> int:
+        """Seconds between full reloads of the inventory mirror, which also drop deleted devices."""
+        return cls.NETBOX_MIRROR_FULL_RESYNC
+
+    @classmethod
+    def get_mirror_max_age(cls) -> int:
+        """Age in seconds after which the mirror is no longer preferred over live NetBox queries."""
+        return cls.NETBOX_MIRROR_MAX_AGE
     
 
  
@@ -28,6 +82,10 @@ class IsToolsConfig:
 class QuickbaseConfig:
     QUICKBASE_API_TOKEN = os.getenv('QUICKBASE_API_TOKEN', None)
     QUICKBASE_HOSTNAME = os.getenv('QUICKBASE_HOSTNAME', None)
+    QUICKBASE_RATE = float(os.getenv('QUICKBASE_RATE', 10))
+    QUICKBASE_BURST = int(os.getenv('QUICKBASE_BURST', 10))
+    QUICKBASE_POOL_SIZE = int(os.getenv('QUICKBASE_POOL_SIZE', 8))
+    QUICKBASE_DOSSIER_TTL = int(os.getenv('QUICKBASE_DOSSIER_TTL', 60))
     @classmethod
     def get_quickbase_api_token(cls):
         return cls.QUICKBASE_API_TOKEN
@@ -35,6 +93,26 @@ class QuickbaseConfig:
     @classmethod
     def get_quickbase_hostname(cls):
         return cls.QUICKBASE_HOSTNAME
+
+    @classmethod
+    def get_rate(cls) -> float:
+        """Sustained Quickbase requests per second for the whole process (the API allows 100 per 10 s per token)."""
+        return cls.QUICKBASE_RATE
+
+    @classmethod
+    def get_burst(cls) -> int:
+        """Requests that may be sent back to back before the rate applies."""
+        return cls.QUICKBASE_BURST
+
+    @classmethod
+    def get_pool_size(cls) -> int:
+        """Keep-alive HTTPS connections kept open to api.quickbase.com."""
+        return cls.QUICKBASE_POOL_SIZE
+
+    @classmethod
+    def get_dossier_ttl(cls) -> int:
+        """Seconds a service dossier is reused by the tools before Quickbase is queried again."""
+        return cls.QUICKBASE_DOSSIER_TTL
     
 
 class MikrotikConfig:
@@ -175,4 +253,116 @@ class ZabbixConfig:
     def get_zabbix_password(cls):
         return cls.ZABBIX_PASSWORD
     
-    
\ No newline at end of file
+    
+
+class SSHPoolConfig:
+    """Tuning knobs for the process-wide SSH session pool shared by the vendor drivers."""
+
+    SSH_POOL_MAX_PER_DEVICE = int(os.getenv('SSH_POOL_MAX_PER_DEVICE', 3))
+    SSH_POOL_IDLE_TIMEOUT = float(os.getenv('SSH_POOL_IDLE_TIMEOUT', 120))
+    SSH_POOL_KEEPALIVE = int(os.getenv('SSH_POOL_KEEPALIVE', 30))
+    SSH_POOL_LEASE_TIMEOUT = float(os.getenv('SSH_POOL_LEASE_TIMEOUT', 30))
+    SSH_MAX_CHANNELS_PER_SESSION = int(os.getenv('SSH_MAX_CHANNELS_PER_SESSION', 4))
+
+    @classmethod
+    def get_max_per_device(cls):
+        return cls.SSH_POOL_MAX_PER_DEVICE
+
+    @classmethod
+    def get_idle_timeout(cls):
+        return cls.SSH_POOL_IDLE_TIMEOUT
+
+    @classmethod
+    def get_keepalive(cls):
+        return cls.SSH_POOL_KEEPALIVE
+
+    @classmethod
+    def get_lease_timeout(cls):
+        return cls.SSH_POOL_LEASE_TIMEOUT
+
+    @classmethod
+    def get_max_channels(cls):
+        return cls.SSH_MAX_CHANNELS_PER_SESSION
+
+
+class ExecutorConfig:
+    """Thread pool sizes used to run blocking backend calls off the MCP event loop."""
+
+    SSH_WORKERS = int(os.getenv('EXECUTOR_SSH_WORKERS', 32))
+    NETBOX_WORKERS = int(os.getenv('EXECUTOR_NETBOX_WORKERS', 8))
+    QUICKBASE_WORKERS = int(os.getenv('EXECUTOR_QUICKBASE_WORKERS', 8))
+    ZABBIX_WORKERS = int(os.getenv('EXECUTOR_ZABBIX_WORKERS', 4))
+    VERSA_WORKERS = int(os.getenv('EXECUTOR_VERSA_WORKERS', 4))
+    ISTOOLS_WORKERS = int(os.getenv('EXECUTOR_ISTOOLS_WORKERS', 4))
+    DEVICE_FANOUT = int(os.getenv('EXECUTOR_DEVICE_FANOUT', 4))
+
+    @classmethod
+    def get_workers(cls, backend: str) -> int:
+        return {
+            'ssh': cls.SSH_WORKERS,
+            'netbox': cls.NETBOX_WORKERS,
+            'quickbase': cls.QUICKBASE_WORKERS,
+            'zabbix': cls.ZABBIX_WORKERS,
+            'versa': cls.VERSA_WORKERS,
+            'istools': cls.ISTOOLS_WORKERS,
+        }[backend]
+
+    @classmethod
+    def get_device_fanout(cls) -> int:
+        """Maximum number of devices a single tool call works on concurrently."""
+        return cls.DEVICE_FANOUT
+
+
+class SSHDriverConfig:
+    """Selects the SSH transport per vendor: 'paramiko' (threaded, default) or 'asyncssh' (native asyncio)."""
+
+    MIKROTIK_SSH_DRIVER = os.getenv('MIKROTIK_SSH_DRIVER', 'paramiko').lower()
+    CISCO_SSH_DRIVER = os.getenv('CISCO_SSH_DRIVER', 'paramiko').lower()
+
+    @classmethod
+    def get_mikrotik_driver(cls):
+        return cls.MIKROTIK_SSH_DRIVER
+
+    @classmethod
+    def get_cisco_driver(cls):
+        return cls.CISCO_SSH_DRIVER
+
+
+class DeviceCacheConfig:
+    """Location of the persistent cache of detected netmiko platforms and device models."""
+
+    DEVICE_CACHE_PATH = os.getenv('DEVICE_CACHE_PATH', '.cache/device_types.json')
+
+    @classmethod
+    def get_path(cls):
+        return cls.DEVICE_CACHE_PATH
+
+
+class CircuitBreakerConfig:
+    """Per-device SSH circuit breaker: open after THRESHOLD failed connects within WINDOW seconds, for COOLDOWN seconds."""
+
+    SSH_BREAKER_THRESHOLD = int(os.getenv('SSH_BREAKER_THRESHOLD', 3))
+    SSH_BREAKER_WINDOW = float(os.getenv('SSH_BREAKER_WINDOW', 60))
+    SSH_BREAKER_COOLDOWN = float(os.getenv('SSH_BREAKER_COOLDOWN', 60))
+
+    @classmethod
+    def get_threshold(cls):
+        return cls.SSH_BREAKER_THRESHOLD
+
+    @classmethod
+    def get_window(cls):
+        return cls.SSH_BREAKER_WINDOW
+
+    @classmethod
+    def get_cooldown(cls):
+        return cls.SSH_BREAKER_COOLDOWN
+
+
+class DeadlineConfig:
+    """Overall time budget, in seconds, for a single MCP tool call."""
+
+    TOOL_DEADLINE = float(os.getenv('TOOL_DEADLINE', 120))
+
+    @classmethod
+    def get_tool_deadline(cls):
+        return cls.TOOL_DEADLINE
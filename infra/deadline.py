@@ -0,0 +1,129 @@
+import contextvars
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import requests
+
+from infra.config import DeadlineConfig
+from infra.logger.service_log import Logger
+
+logger = Logger.get_logger("deadline")
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("tool_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when the time budget of the current tool call has run out.
+    """
+
+
+class Deadline:
+    """
+    Time budget of the current MCP tool call, carried in a context variable.
+
+    The budget is set once at the tool entry point and follows the call into executor threads
+    (BackendDispatcher copies the context), so every backend call can size its own timeout
+    from what is left instead of using a fixed one.
+    """
+
+    @staticmethod
+    @contextmanager
+    def start(seconds: Optional[float] = None):
+        """
+        Set a deadline seconds from now for the enclosed block. A nested budget never extends an outer one.
+
+        :param seconds: Budget in seconds. Defaults to DeadlineConfig.get_tool_deadline().
+        """
+        seconds = DeadlineConfig.get_tool_deadline() if seconds is None else seconds
+        deadline = time.monotonic() + seconds
+        outer = _deadline.get()
+        if outer is not None:
+            deadline = min(deadline, outer)
+        token = _deadline.set(deadline)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    @staticmethod
+    def remaining() -> Optional[float]:
+        """
+        Seconds left in the current budget (never negative), or None when no deadline is set.
+        """
+        deadline = _deadline.get()
+        if deadline is None:
+            return None
+        return max(deadline - time.monotonic(), 0.0)
+
+    @staticmethod
+    def timeout(cap: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout to use for the next blocking call: the smaller of cap and the remaining budget.
+
+        Returns cap unchanged when no deadline is set, and None only when both are unbounded.
+
+        :raises DeadlineExceeded: If the budget is already used up, so callers never get a zero timeout.
+        """
+        remaining = Deadline.remaining()
+        if remaining is None:
+            return cap
+        if remaining == 0:
+            raise DeadlineExceeded("Tool deadline exceeded; returning what was collected so far.")
+        if cap is None:
+            return remaining
+        return min(cap, remaining)
+
+    @staticmethod
+    def check():
+        """
+        :raises DeadlineExceeded: If the current budget is used up.
+        """
+        if Deadline.remaining() == 0:
+            raise DeadlineExceeded("Tool deadline exceeded; returning what was collected so far.")
+
+
+def with_deadline(func):
+    """
+    Run an MCP tool under a fresh Deadline budget.
+
+    A DeadlineExceeded that escapes the tool is turned into an error message instead of a failed call.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with Deadline.start():
+                try:
+                    return await func(*args, **kwargs)
+                except DeadlineExceeded as e:
+                    logger.warning(f"{func.__name__}: {e}")
+                    return f"Error: {e}"
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Deadline.start():
+                try:
+                    return func(*args, **kwargs)
+                except DeadlineExceeded as e:
+                    logger.warning(f"{func.__name__}: {e}")
+                    return f"Error: {e}"
+    return wrapper
+
+
+class DeadlineSession(requests.Session):
+    """
+    requests.Session whose requests default to a timeout bounded by the current Deadline.
+
+    :param default_timeout: Timeout in seconds used when the caller passes none.
+    """
+
+    def __init__(self, default_timeout: float = 30):
+        super().__init__()
+        self.default_timeout = default_timeout
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs["timeout"] = Deadline.timeout(kwargs.get("timeout") or self.default_timeout)
+        return super().request(method, url, *args, **kwargs)
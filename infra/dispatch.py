@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from infra.config import ExecutorConfig
+from infra.deadline import Deadline, DeadlineExceeded
+
+BACKENDS = ('ssh', 'netbox', 'quickbase', 'zabbix', 'versa', 'istools')
+
+
+class BackendDispatcher:
+    """
+    Runs blocking vendor and API calls in per-backend thread pools.
+
+    Each backend gets its own bounded ThreadPoolExecutor so a burst of slow SSH sessions
+    cannot starve Netbox or Quickbase lookups, and none of them block the MCP event loop.
+    """
+
+    _executors: Dict[str, ThreadPoolExecutor] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls, backend: str) -> ThreadPoolExecutor:
+        """
+        Return the executor for backend, creating it on first use.
+
+        :param backend: One of BACKENDS.
+        :raises ValueError: If backend is unknown.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Must be one of {', '.join(BACKENDS)}.")
+        executor = cls._executors.get(backend)
+        if executor is None:
+            with cls._lock:
+                executor = cls._executors.get(backend)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=ExecutorConfig.get_workers(backend),
+                        thread_name_prefix=f"{backend}-worker",
+                    )
+                    cls._executors[backend] = executor
+        return executor
+
+    @classmethod
+    async def run(cls, backend: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in the backend's thread pool and await its result.
+
+        The caller's context variables are copied into the worker thread. Coroutine functions,
+        such as the asyncssh drivers, are awaited directly on the event loop instead.
+
+        The wait is bounded by what remains of the current Deadline. A thread that is still busy
+        when the budget runs out is left to finish on its own (its timeouts are sized from the same
+        budget), but the caller stops waiting for it.
+
+        :param backend: One of BACKENDS.
+        :param func: Blocking callable or coroutine function to run.
+        :return: Whatever func returns. Exceptions raised by func propagate to the caller.
+        :raises DeadlineExceeded: If the budget is used up before or while func runs.
+        """
+        Deadline.check()
+        if inspect.iscoroutinefunction(func):
+            awaitable = func(*args, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            context = contextvars.copy_context()
+            awaitable = loop.run_in_executor(cls.get_executor(backend), context.run, call)
+        try:
+            return await asyncio.wait_for(awaitable, Deadline.remaining())
+        except asyncio.TimeoutError:
+            if Deadline.remaining() == 0:
+                raise DeadlineExceeded(f"Tool deadline exceeded while waiting for {backend}.")
+            raise
+
+    @staticmethod
+    async def fan_out(
+        items: Iterable[str],
+        func: Callable[[str], Awaitable[Any]],
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Await func(item) for every item concurrently, at most limit at a time.
+
+        A failure on one item does not cancel the others; its exception message becomes that
+        item's result.
+
+        :param items: Keys to fan out over, e.g. device names.
+        :param func: Coroutine function called with each item.
+        :param limit: Concurrency cap. Defaults to ExecutorConfig.get_device_fanout().
+        :return: Results keyed by item, in input order.
+        """
+        items = list(dict.fromkeys(items))
+        semaphore = asyncio.Semaphore(limit or ExecutorConfig.get_device_fanout())
+
+        async def guarded(item):
+            async with semaphore:
+                try:
+                    Deadline.check()
+                    return await func(item)
+                except Exception as e:
+                    return f"Error checking {item}: {e}"
+
+        results = await asyncio.gather(*(guarded(item) for item in items))
+        return dict(zip(items, results))
+
+    @classmethod
+    def shutdown(cls):
+        """
+        Shut down every executor, waiting for running calls to finish.
+        """
+        with cls._lock:
+            executors = list(cls._executors.values())
+            cls._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=True)
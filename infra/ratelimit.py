@@ -0,0 +1,54 @@
+import threading
+import time
+
+from infra.deadline import Deadline, DeadlineExceeded
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: up to capacity requests at once, refilled at rate tokens per second.
+
+    Callers wait for a token instead of sending a request the remote API would reject, so many
+    concurrent tool calls share one budget and stay under the limit.
+
+    :param rate: Tokens added per second (the sustained request rate).
+    :param capacity: Maximum burst size.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available.
+
+        :raises DeadlineExceeded: If the wait would outlast the current tool Deadline.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            remaining = Deadline.remaining()
+            if remaining is not None and wait > remaining:
+                raise DeadlineExceeded("Tool deadline exceeded while waiting for the API rate limit.")
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """
+        Empty the bucket for seconds, e.g. after the API answered 429 with Retry-After.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
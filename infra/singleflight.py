@@ -0,0 +1,56 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from infra.deadline import Deadline
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: while a call for key is running, other callers with
+    the same key wait for it and receive its result (or exception) instead of repeating it.
+
+    Results are not kept after the call finishes; this only removes duplicate in-flight work.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run func() for key, or wait for the call already running for key.
+
+        Waiting is bounded by the current tool Deadline.
+
+        :raises TimeoutError: If the running call does not finish in time.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if not call.done.wait(Deadline.timeout(60)):
+                raise TimeoutError(f"Timed out waiting for in-flight call {key!r}.")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,74 @@
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+
+from infra.deadline import Deadline
+
+
+class ChunkRelay:
+    """
+    Forwards output produced in a backend worker thread to an async sink on the event loop.
+
+    Text is grouped into line-aligned messages of about chunk_size characters. feed() waits for
+    each message to be delivered before accepting more, so a slow client applies backpressure to
+    the device read instead of letting output pile up in memory. Only counters and the last
+    tail_lines lines are kept for the final summary.
+
+    :param loop: Event loop running the sink, usually asyncio.get_running_loop() in the tool.
+    :param sink: Coroutine function called with each message, e.g. ctx.info.
+    :param progress: Optional coroutine function called with the number of characters sent so far.
+    :param chunk_size: Target size in characters of each message.
+    :param tail_lines: Number of trailing lines kept for summary().
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        sink: Callable[[str], Awaitable[None]],
+        progress: Optional[Callable[[int], Awaitable[None]]] = None,
+        chunk_size: int = 4096,
+        tail_lines: int = 20,
+    ):
+        self.loop = loop
+        self.sink = sink
+        self.progress = progress
+        self.chunk_size = chunk_size
+        self.chars = 0
+        self.lines = 0
+        self._pending = ""
+        self._tail: Deque[str] = deque(maxlen=tail_lines)
+
+    async def _deliver(self, text: str):
+        self.chars += len(text)
+        self.lines += text.count("\n")
+        self._tail.extend(text.splitlines())
+        await self.sink(text)
+        if self.progress is not None:
+            await self.progress(self.chars)
+
+    def feed(self, chunk: str):
+        """
+        Accept a chunk from a worker thread, blocking until full messages have been delivered.
+
+        Must not be called from the event loop thread itself.
+        """
+        self._pending += chunk
+        while len(self._pending) >= self.chunk_size:
+            cut = self._pending.rfind("\n", 0, self.chunk_size) + 1 or self.chunk_size
+            text, self._pending = self._pending[:cut], self._pending[cut:]
+            future = asyncio.run_coroutine_threadsafe(self._deliver(text), self.loop)
+            future.result(timeout=Deadline.timeout(30))
+
+    async def aclose(self):
+        """
+        Deliver whatever is still pending. Call on the event loop once the producer has finished.
+        """
+        if self._pending:
+            text, self._pending = self._pending, ""
+            await self._deliver(text)
+
+    def summary(self) -> dict:
+        """
+        Size of the streamed output and its last lines.
+        """
+        return {"characters": self.chars, "lines": self.lines, "tail": "\n".join(self._tail)}
@@ -1,116 +1,250 @@
-import netmiko
+import paramiko
+import re
+import time
+from contextlib import contextmanager
+from typing import List, Optional
 from infra.config import AccedianConfig
+from infra.deadline import Deadline
+from src.custom_ssh.breaker import DeviceUnavailableError
+from src.custom_ssh.filters import filter_lines
+from src.custom_ssh.pool import ssh_pool
+from src.custom_ssh.reader import read_until_pattern, stream_until_pattern
+
+# Accedian CLI prompt at the end of the output, e.g. "LX-CPE-01:" (netmiko uses ':' and '#' as terminators)
+ACCEDIAN_PROMPT = re.compile(r'(?:^|\n)[\w.\-]+[:#] ?$')
+
+# Client/Network MAC-learning sequence; results are read after each port and once learning stops
+MAC_LEARNING_SCRIPT = [
+    'mac-learning stop',
+    'mac-learning start port Client',
+    'mac-learning show results',
+    'mac-learning stop',
+    'mac-learning start port Network',
+    'mac-learning show results',
+    'mac-learning stop',
+    'mac-learning show results',
+]
+
 
 class AccedianConnection:
     """
     Accedian connection class for managing connections to Accedian devices.
+
+    Commands run on an interactive shell of a pooled session and completion is detected by
+    matching the device prompt, so a whole script (e.g. the MAC-learning sequence) costs one
+    login and no idle waits.
     """
 
     @staticmethod
     def _connection(ip: str):
         """
-        Create a Netmiko connection to an Accedian device.
+        Create a connection to an Accedian device.
+
         :param ip: IP address of the device.
-        :return: Netmiko SSH connection object or None if failed.
+        :return: An SSH client connected to the device.
         """
+
         port = AccedianConfig.get_accedian_port()
         username = AccedianConfig.get_accedian_username()
         password = AccedianConfig.get_accedian_password()
-        device = {
-            'device_type': 'autodetect',  # Ajuste conforme necessário para Accedian
-            'host': ip,
-            'username': username,
-            'password': password,
-            'port': port
 
-        }
+        ssh_client = paramiko.SSHClient()
+        ssh_client.load_system_host_keys()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
         try:
-            print(f"Connecting to Accedian device at {ip}:{port} with username {username}")
-            connection = netmiko.ConnectHandler(**device)
-            return connection
-        except Exception as e:
+            ssh_client.connect(hostname=ip, port=port, username=username, password=password,
+                               timeout=Deadline.timeout(10), banner_timeout=Deadline.timeout(10),
+                               auth_timeout=Deadline.timeout(10))
+            return ssh_client
+        except paramiko.SSHException as e:
             print(f"Failed to connect to Accedian device at {ip}: {e}")
             return None
 
     @staticmethod
-    def get_system_information(ip: str):
+    @contextmanager
+    def _session(ip: str):
         """
-        Get system information from an Accedian device using Netmiko.
+        Lease a pooled SSH session to an Accedian device.
+
         :param ip: IP address of the device.
-        :return: System information as a string.
+        :raises ConnectionError: If no session could be opened.
         """
-        connection = AccedianConnection._connection(ip)
-        if not connection:
-            return "Connection to Accedian device failed."
+        port = AccedianConfig.get_accedian_port()
+        with ssh_pool.lease(ip, port, 'cpe', lambda: AccedianConnection._connection(ip)) as connection:
+            yield connection
+
+    @staticmethod
+    def _strip_echo_and_prompt(output: str, command: str, prompt: str) -> str:
+        """
+        Drop the echoed command line and the trailing prompt from a command's transcript.
+        """
+        lines = output.split('\n')
+        if lines and command in lines[0]:
+            lines = lines[1:]
+        if lines and lines[-1].strip() == prompt:
+            lines = lines[:-1]
+        return '\n'.join(lines).strip()
+
+    @staticmethod
+    def _open_shell(channel, ip: str, deadline: float) -> str:
+        """
+        Start an interactive shell on channel and return the exact prompt learned from the banner.
+
+        Using the exact prompt means output lines that merely end in ':' are not mistaken for it.
+
+        :raises ConnectionError: If no prompt is seen before the deadline.
+        """
+        channel.get_pty(term='dumb', width=511, height=9999)
+        channel.invoke_shell()
+        channel.settimeout(1)
+        banner = read_until_pattern(channel, ACCEDIAN_PROMPT, deadline).rstrip()
+        if not ACCEDIAN_PROMPT.search(banner):
+            raise ConnectionError(f"Accedian prompt not detected on {ip}.")
+        return banner.split('\n')[-1].strip()
+
+    @staticmethod
+    def run_script(ip: str, commands: List[str], timeout: int = 60) -> List[str]:
+        """
+        Run commands in order on one interactive shell, waiting for the prompt after each.
+
+        :param ip: IP address of the device.
+        :param commands: CLI commands to run, in order.
+        :param timeout: Overall deadline in seconds for the whole script.
+        :return: The output of each command; commands that did not finish in time get what was read.
+        :raises ConnectionError: If the session cannot be opened or no prompt is seen.
+        """
+        deadline = time.monotonic() + Deadline.timeout(timeout)
+        with AccedianConnection._session(ip) as connection:
+            channel = connection.get_transport().open_session()
+            try:
+                prompt = AccedianConnection._open_shell(channel, ip, deadline)
+                prompt_at_end = re.compile(rf'(?:^|\n){re.escape(prompt)} ?$')
+
+                outputs = []
+                for command in commands:
+                    channel.sendall(f"{command}\n")
+                    output = read_until_pattern(channel, prompt_at_end, deadline)
+                    outputs.append(AccedianConnection._strip_echo_and_prompt(output, command, prompt))
+            finally:
+                channel.close()
+        return outputs
+
+    @staticmethod
+    def stream_command(ip: str, command: str = 'syslog show log', on_chunk=None, timeout: int = 120) -> str:
+        """
+        Run a command with large output (e.g. syslog show log) on a shell and pass it to on_chunk as it arrives.
+
+        Only a short tail is kept to detect the prompt, so memory stays bounded.
+
+        :param ip: IP address of the device.
+        :param command: CLI command to run.
+        :param on_chunk: Callable receiving the output, without the echoed command and the prompt.
+        :param timeout: Deadline in seconds, bounded by the tool Deadline.
+        :return: "" when the prompt came back, otherwise a note that the output may be incomplete.
+        :raises ConnectionError: If the session cannot be opened or no prompt is seen.
+        """
+        deadline = time.monotonic() + Deadline.timeout(timeout)
+        with AccedianConnection._session(ip) as connection:
+            channel = connection.get_transport().open_session()
+            try:
+                prompt = AccedianConnection._open_shell(channel, ip, deadline)
+                channel.sendall(f"{command}\n")
+                completed = stream_until_pattern(channel, re.compile(rf'(?:^|\n){re.escape(prompt)} ?$'), deadline, on_chunk)
+            finally:
+                channel.close()
+        return "" if completed else f"Output of '{command}' may be incomplete: prompt not seen before the deadline."
+
+    @staticmethod
+    def _format_mac_learning(outputs: List[str]) -> str:
+        """
+        Shape the outputs of MAC_LEARNING_SCRIPT into the Client/Network/Final report.
+        """
+        results_client, results_network, final_results = outputs[2], outputs[5], outputs[7]
+        return f"Client Results:\n{results_client}\nNetwork Results:\n{results_network}\nFinal Results:\n{final_results}"
+
+    @staticmethod
+    def _getter(ip: str, command: str, error_label: str, pattern: Optional[str] = None) -> str:
         try:
-            system_info = connection.send_command_timing('board show uptime', strip_prompt=False, strip_command=False)
-            print(f"System information for {ip}:\n{system_info}")
-            connection.disconnect()
-            return system_info
+            return filter_lines(AccedianConnection.run_script(ip, [command])[0], pattern)
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Accedian device failed."
         except Exception as e:
-            return f"Error retrieving system information: {e}"
+            return f"Error {error_label}: {e}"
 
     @staticmethod
-    def get_logs(ip: str):
+    def get_cpe_status(ip: str):
         """
-        Get logs from an Accedian device using Netmiko.
+        Collect uptime, logs, MAC-learning results and port statistics in one shell session.
+
         :param ip: IP address of the device.
-        :return: Logs as a string.
+        :return: Dict with system_info, logs, mac_learning_results and port_statistics, or an error string.
         """
-        connection = AccedianConnection._connection(ip)
-        if not connection:
-            return "Connection to Accedian device failed."
+        commands = ['board show uptime', 'syslog show log'] + MAC_LEARNING_SCRIPT + ['port show statistics']
         try:
-            logs = connection.send_command_timing('syslog show log', strip_prompt=False, strip_command=False)
-    
-            connection.disconnect()
-            return logs
+            outputs = AccedianConnection.run_script(ip, commands)
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Accedian device failed."
         except Exception as e:
-            return f"Error retrieving logs: {e}"
+            return f"Error retrieving CPE status: {e}"
+        return {
+            "system_info": outputs[0],
+            "logs": outputs[1],
+            "mac_learning_results": AccedianConnection._format_mac_learning(outputs[2:-1]),
+            "port_statistics": outputs[-1],
+        }
+
+    @staticmethod
+    def get_system_information(ip: str):
+        """
+        Get system information from an Accedian device.
 
+        :param ip: IP address of the device.
+        :return: System information as a string.
+        """
+        return AccedianConnection._getter(ip, 'board show uptime', "retrieving system information")
+
+    @staticmethod
+    def get_logs(ip: str, pattern: Optional[str] = None):
+        """
+        Get logs from an Accedian device.
+
+        The Accedian CLI has no output filter, so pattern is applied to the lines once they are read.
+
+        :param ip: IP address of the device.
+        :param pattern: Optional regex the lines must match, e.g. a port name or a date.
+        :return: Logs as a string.
+        """
+        return AccedianConnection._getter(ip, 'syslog show log', "retrieving logs", pattern)
 
     @staticmethod
-    def get_mac_learning_results(ip: str, port: str):
+    def get_mac_learning_results(ip: str, port: str = "Client"):
         """
-        Get MAC learning results from an Accedian device using Netmiko.
+        Run the Client/Network MAC-learning sequence on one shell and return its results.
+
         :param ip: IP address of the device.
-        :param port: Port to start MAC learning on.
+        :param port: Kept for compatibility; both the Client and Network ports are always learned.
         :return: MAC learning results as a string.
         """
-        connection = AccedianConnection._connection(ip)
-        if not connection:
-            return "Connection to Accedian device failed."
         try:
-            connection.send_command_timing('mac-learning stop', strip_prompt=False, strip_command=False)
-            connection.send_command_timing('mac-learning start port Client', strip_prompt=False, strip_command=False)
-            results_client = connection.send_command_timing('mac-learning show results', strip_prompt=False, strip_command=False)
-            connection.send_command_timing('mac-learning stop', strip_prompt=False, strip_command=False)
-            connection.send_command_timing('mac-learning start port Network', strip_prompt=False, strip_command=False)
-            results_network = connection.send_command_timing('mac-learning show results', strip_prompt=False, strip_command=False)
-            connection.send_command_timing('mac-learning stop', strip_prompt=False, strip_command=False)
-            final_results = connection.send_command_timing('mac-learning show results', strip_prompt=False, strip_command=False)
-            connection.disconnect()
-            results = f"Client Results:\n{results_client}\nNetwork Results:\n{results_network}\nFinal Results:\n{final_results}"
-            return results
+            outputs = AccedianConnection.run_script(ip, MAC_LEARNING_SCRIPT)
+            return AccedianConnection._format_mac_learning(outputs)
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Accedian device failed."
         except Exception as e:
             return f"Error retrieving MAC learning results: {e}"
-        
 
     @staticmethod
     def get_port_statistics(ip: str):
         """
-        Get port statistics from an Accedian device using Netmiko.
+        Get port statistics from an Accedian device.
         :param ip: IP address of the device.
         :return: Port statistics as a string.
         """
-        connection = AccedianConnection._connection(ip)
-        if not connection:
-            return "Connection to Accedian device failed."
-        try:
-            port_stats = connection.send_command_timing('port show statistics', strip_prompt=False, strip_command=False)
-            connection.disconnect()
-            return port_stats
-        except Exception as e:
-            return f"Error retrieving port statistics: {e}"
-        
-
+        return AccedianConnection._getter(ip, 'port show statistics', "retrieving port statistics")
@@ -0,0 +1,141 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from infra.config import GeneralConfig
+from infra.deadline import Deadline
+from src.cisco.connection import CPE_STATUS_COMMANDS, CiscoConnectionRouter
+from src.custom_ssh.async_pool import async_ssh_pool
+from src.custom_ssh.breaker import DeviceUnavailableError
+from src.custom_ssh.filters import filter_lines
+
+
+class AsyncCiscoConnectionRouter:
+    """
+    asyncio-native Cisco router driver built on asyncssh.
+
+    Mirrors the command surface and return values of CiscoConnectionRouter, with coroutine getters.
+    """
+
+    @staticmethod
+    @asynccontextmanager
+    async def _session(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Lease a pooled asyncssh connection to a cisco device.
+
+        :param type: Type of device, either 'cpe' or 'pop'.
+        :param ip: IP address of the device.
+        :raises ConnectionError: If no connection could be opened.
+        """
+        role = type if isinstance(type, str) else 'cpe'
+        port = GeneralConfig.get_cisco_port()
+        username = GeneralConfig.get_cisco_username()
+        password = GeneralConfig.get_cisco_password()
+        async with async_ssh_pool.lease(ip, port, role, username, password) as connection:
+            yield connection
+
+    @staticmethod
+    async def _run(type, ip, command: str, timeout: Optional[float] = None) -> str:
+        """
+        Run a single command on its own channel and return its output, bounded by the tool deadline.
+        """
+        async with AsyncCiscoConnectionRouter._session(type, ip) as connection:
+            result = await connection.run(command, check=False, timeout=Deadline.timeout(timeout))
+        return result.stdout or ""
+
+    @staticmethod
+    async def _getter(type, ip, command: str, error_label: str, local_pattern: Optional[str] = None) -> str:
+        try:
+            return filter_lines(await AsyncCiscoConnectionRouter._run(type, ip, command), local_pattern)
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
+        except Exception as e:
+            return f"Error {error_label}: {e}"
+
+    @staticmethod
+    async def get_cpe_status(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Collect interfaces, version, logs, routes and ARP table concurrently.
+
+        Every command gets its own channel on the pooled connection; the pool caps channels per device.
+        """
+        outputs = await asyncio.gather(*(
+            AsyncCiscoConnectionRouter._getter(type, ip, command, label) for _, command, label in CPE_STATUS_COMMANDS
+        ))
+        return {key: output for (key, _, _), output in zip(CPE_STATUS_COMMANDS, outputs)}
+
+    @staticmethod
+    async def get_system_information(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None):
+        """
+        Get system information from a Cisco device.
+        """
+        return await AsyncCiscoConnectionRouter._getter(type, ip, 'show version', "retrieving system information")
+
+    @staticmethod
+    async def clear_counters(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Clear counters on a Cisco device.
+        """
+        return await AsyncCiscoConnectionRouter._getter(type, ip, 'clear counters', "clearing counters")
+
+    @staticmethod
+    async def get_interfaces(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, interface: Optional[str] = None):
+        """
+        Get interface information from a Cisco device, optionally for one interface only.
+        """
+        try:
+            command = CiscoConnectionRouter._interfaces_command(interface)
+        except ValueError as e:
+            return f"Error retrieving interface information: {e}"
+        return await AsyncCiscoConnectionRouter._getter(type, ip, command, "retrieving interface information")
+
+    @staticmethod
+    async def get_running_config(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Get the running configuration from a Cisco device.
+        """
+        return await AsyncCiscoConnectionRouter._getter(type, ip, 'show running-config', "retrieving running configuration")
+
+    @staticmethod
+    async def get_arp_table(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None,
+                            address: Optional[str] = None, mac: Optional[str] = None, interface: Optional[str] = None):
+        """
+        Get the ARP table from a Cisco device, optionally only the entries for an address, MAC or interface.
+        """
+        try:
+            command = CiscoConnectionRouter._arp_command(address, mac, interface)
+        except ValueError as e:
+            return f"Error retrieving ARP table: {e}"
+        return await AsyncCiscoConnectionRouter._getter(type, ip, command, "retrieving ARP table")
+
+    @staticmethod
+    async def get_logs(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None,
+                       pattern: Optional[str] = None, severity: Optional[int] = None):
+        """
+        Get the logs from a Cisco device, optionally only lines matching pattern and at severity or more urgent.
+        """
+        try:
+            command, local_pattern = CiscoConnectionRouter._logs_command(pattern, severity)
+        except ValueError as e:
+            return f"Error retrieving logs: {e}"
+        return await AsyncCiscoConnectionRouter._getter(type, ip, command, "retrieving logs", local_pattern)
+
+    @staticmethod
+    async def get_ip_address(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Get the IP address from a Cisco device.
+        """
+        return await AsyncCiscoConnectionRouter._getter(type, ip, 'show ip interface brief', "retrieving IP address")
+
+    @staticmethod
+    async def get_route_table(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, prefix: Optional[str] = None):
+        """
+        Get the routing table from a Cisco device, optionally for one address or network and its subnets.
+        """
+        try:
+            command = CiscoConnectionRouter._route_command(prefix)
+        except ValueError as e:
+            return f"Error retrieving routing table: {e}"
+        return await AsyncCiscoConnectionRouter._getter(type, ip, command, "retrieving routing table")
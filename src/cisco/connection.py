@@ -1,8 +1,29 @@
 
 import paramiko
+from contextlib import contextmanager
 from typing import Optional
 from infra.config import GeneralConfig
+from infra.deadline import Deadline, DeadlineExceeded
+from src.custom_ssh.multiplex import run_on_channels
+from src.custom_ssh.breaker import DeviceUnavailableError, ssh_breaker
+from src.custom_ssh.filters import cli_token, filter_lines, ios_include, ios_mac, ios_route_target, ios_severity_regex
+from src.custom_ssh.pool import ssh_pool
+from src.custom_ssh.reader import stream_exec
+import ipaddress
 import re
+
+# Keeps the state, description, rate, address and error lines of 'show interfaces'
+INTERFACE_SUMMARY = " |  i base|line|Description|rate|address|error"
+
+# Read-only commands CheckCpe runs on parallel channels: (key, command, error label)
+CPE_STATUS_COMMANDS = [
+    ("interfaces", f"show interfaces{INTERFACE_SUMMARY}", "retrieving interface information"),
+    ("system_info", "show version", "retrieving system information"),
+    ("logs", "show logging", "retrieving logs"),
+    ("routes", "show ip route", "retrieving routing table"),
+    ("arp_table", "show arp", "retrieving ARP table"),
+]
+
     
 class CiscoConnectionRouter:
     """
@@ -29,12 +50,116 @@ class CiscoConnectionRouter:
                 hostname=ip,
                 port=port,
                 username=username,
-                password=password
+                password=password,
+                timeout=Deadline.timeout(10),
+                banner_timeout=Deadline.timeout(10),
+                auth_timeout=Deadline.timeout(10)
             )
             return ssh_client
         except paramiko.SSHException as e:
             print(f"Failed to connect to Cisco device: {e}")
             return None
+
+    @staticmethod
+    @contextmanager
+    def _session(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Lease a pooled connection to a cisco device.
+
+        :param type: Type of device, either 'cpe' or 'pop'.
+        :param ip: IP address of the device.
+        :raises ConnectionError: If no session could be opened.
+        """
+        role = type if isinstance(type, str) else 'cpe'
+        port = GeneralConfig.get_cisco_port()
+        with ssh_pool.lease(ip, port, role, lambda: CiscoConnectionRouter._connection(type, ip)) as connection:
+            yield connection
+
+    @staticmethod
+    def _run(type, ip, command: str) -> str:
+        """
+        Run a single command on a pooled connection and return its decoded output.
+        """
+        with CiscoConnectionRouter._session(type, ip) as connection:
+            stdin, stdout, stderr = connection.exec_command(command, timeout=Deadline.timeout())
+            return stdout.read().decode('utf-8')
+
+    @staticmethod
+    def _interfaces_command(interface: Optional[str] = None) -> str:
+        target = f" {cli_token(interface)}" if interface else ""
+        return f"show interfaces{target}{INTERFACE_SUMMARY}"
+
+    @staticmethod
+    def _arp_command(address: Optional[str] = None, mac: Optional[str] = None, interface: Optional[str] = None) -> str:
+        """
+        Build 'show ip arp' with the first given filter; IOS accepts one of address, MAC or interface.
+
+        :raises ValueError: If a filter value is malformed.
+        """
+        if address:
+            return f"show ip arp {ipaddress.IPv4Address(address)}"
+        if mac:
+            return f"show ip arp {ios_mac(mac)}"
+        if interface:
+            return f"show ip arp {cli_token(interface)}"
+        return "show arp"
+
+    @staticmethod
+    def _route_command(prefix: Optional[str] = None) -> str:
+        return f"show ip route {ios_route_target(prefix)}" if prefix else "show ip route"
+
+    @staticmethod
+    def _logs_command(pattern: Optional[str] = None, severity: Optional[int] = None) -> tuple:
+        """
+        Build 'show logging' with an include filter and return (command, pattern left to apply locally).
+
+        IOS allows a single '| include', so when both are given severity is pushed to the device
+        and pattern is applied to the (already reduced) output.
+
+        :raises ValueError: If a filter value is malformed.
+        """
+        if severity is not None:
+            return f"show logging{ios_include(ios_severity_regex(severity))}", pattern
+        return f"show logging{ios_include(pattern)}", None
+
+    @staticmethod
+    def stream_command(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, command: str = 'show running-config',
+                       on_chunk=None, timeout: int = 120) -> str:
+        """
+        Run a command with large output (e.g. show running-config, show logging) and pass it to on_chunk as it arrives.
+
+        :param type: Type of device, either 'cpe' or 'pop'.
+        :param ip: IP address of the device.
+        :param command: Command to run.
+        :param on_chunk: Callable receiving each decoded chunk of output.
+        :param timeout: Deadline in seconds, bounded by the tool Deadline.
+        :return: stderr of the command, "" when it succeeded.
+        """
+        with CiscoConnectionRouter._session(type, ip) as connection:
+            return stream_exec(connection, command, on_chunk, timeout=timeout)
+
+    @staticmethod
+    def get_cpe_status(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+        """
+        Collect interfaces, version, logs, routes and ARP table on parallel channels of one session.
+
+        :param type: Type of device, either 'cpe' or 'pop'.
+        :param ip: IP address of the device.
+        :return: Dict keyed like CheckCpe's Cisco output, or an error string if the connection failed.
+        """
+        try:
+            with CiscoConnectionRouter._session(type, ip) as connection:
+                results = run_on_channels(connection, [command for _, command, _ in CPE_STATUS_COMMANDS])
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
+        except Exception as e:
+            return f"Error retrieving CPE status: {e}"
+        status = {}
+        for (key, _, label), (output, error) in zip(CPE_STATUS_COMMANDS, results):
+            status[key] = f"Error {label}: {error}" if error and not output else output
+        return status
         
     @staticmethod
     def get_system_information(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None):
@@ -45,18 +170,15 @@ class CiscoConnectionRouter:
         :param ip: IP address of the device.
         :return: System information as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-
         try:
-            stdin, stdout, stderr = connection.exec_command('show version')
-            system_info = stdout.read().decode('utf-8')
+            system_info = CiscoConnectionRouter._run(type, ip, 'show version')
             return system_info
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving system information: {e}"
-        finally:
-            connection.close()
 
     @staticmethod
     def clear_counters(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
@@ -66,38 +188,35 @@ class CiscoConnectionRouter:
         :param ip: IP address of the device.
         :return: Result of the clear command.
         """
-        connection = CiscoConnectionRouter._connection._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-    
         try:
-            stdin, stdout, stderr = connection.exec_command('clear counters')
-            result = stdout.read().decode('utf-8')
+            result = CiscoConnectionRouter._run(type, ip, 'clear counters')
             return result
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error clearing counters: {e}"
             
     @staticmethod
-    def get_interfaces(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+    def get_interfaces(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, interface: Optional[str] = None):
         """
         Get interface information from a Cisco device.
         
         :param type: Type of device, either 'cpe' or 'pop'.
         :param ip: IP address of the device.
+        :param interface: Optional interface name; only that interface is read from the device.
         :return: Interface information as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-    
         try:
-            stdin, stdout, stderr = connection.exec_command('show interfaces |  i base|line|Description|rate|address|error')
-            interfaces_info = stdout.read().decode('utf-8')
+            interfaces_info = CiscoConnectionRouter._run(type, ip, CiscoConnectionRouter._interfaces_command(interface))
             return interfaces_info
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving interface information: {e}"
-        finally:
-            connection.close() 
     
     @staticmethod
     def get_running_config(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
@@ -108,62 +227,61 @@ class CiscoConnectionRouter:
         :param ip: IP address of the device.
         :return: Running configuration as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-    
         try:
-            stdin, stdout, stderr = connection.exec_command('show running-config')
-            running_config = stdout.read().decode('utf-8')
+            running_config = CiscoConnectionRouter._run(type, ip, 'show running-config')
             return running_config
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving running configuration: {e}"
-        finally:
-            connection.close()
 
     @staticmethod
-    def get_arp_table(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+    def get_arp_table(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None,
+                      address: Optional[str] = None, mac: Optional[str] = None, interface: Optional[str] = None):
         """
         Get the ARP table from a Cisco device.
         
         :param type: Type of device, either 'cpe' or 'pop'.
         :param ip: IP address of the device.
+        :param address: Optional IPv4 address to look up.
+        :param mac: Optional MAC address to look up, in any notation.
+        :param interface: Optional interface whose entries are returned.
         :return: ARP table as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-    
         try:
-            stdin, stdout, stderr = connection.exec_command('show arp')
-            arp_table = stdout.read().decode('utf-8')
+            arp_table = CiscoConnectionRouter._run(type, ip, CiscoConnectionRouter._arp_command(address, mac, interface))
             return arp_table
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving ARP table: {e}"
-        finally:
-            connection.close()
 
     @staticmethod
-    def get_logs(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+    def get_logs(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None,
+                 pattern: Optional[str] = None, severity: Optional[int] = None):
         """
         Get the logs from a Cisco device.
         
         :param type: Type of device, either 'cpe' or 'pop'.
         :param ip: IP address of the device.
+        :param pattern: Optional regex the lines must match, e.g. an interface or a timestamp such as "Oct 17 1[0-2]:".
+        :param severity: Optional syslog severity (0-7); only messages at this level or more urgent are returned.
         :return: Logs as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-    
         try:
-            stdin, stdout, stderr = connection.exec_command('show logging')
-            logs = stdout.read().decode('utf-8')
-            return logs
+            command, local_pattern = CiscoConnectionRouter._logs_command(pattern, severity)
+            logs = CiscoConnectionRouter._run(type, ip, command)
+            return filter_lines(logs, local_pattern)
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving logs: {e}"
-        finally:
-            connection.close()
 
     @staticmethod
     def get_ip_address(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
@@ -174,39 +292,35 @@ class CiscoConnectionRouter:
         :param ip: IP address of the device.
         :return: IP address as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
-    
         try:
-            stdin, stdout, stderr = connection.exec_command('show ip interface brief')
-            ip_address = stdout.read().decode('utf-8')
+            ip_address = CiscoConnectionRouter._run(type, ip, 'show ip interface brief')
             return ip_address
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving IP address: {e}"
-        finally:
-            connection.close()
 
     @staticmethod
-    def get_route_table(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None):
+    def get_route_table(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, prefix: Optional[str] = None):
         """
         Get the routing table from a Cisco device.
         
         :param type: Type of device, either 'cpe' or 'pop'.
         :param ip: IP address of the device.
+        :param prefix: Optional address (best match) or network in CIDR form (that network and its subnets).
         :return: Routing table as a string.
         """
-        connection = CiscoConnectionRouter._connection(type, ip)
-        if not connection:
-            return "Connection to Cisco device failed."
         try:
-            stdin, stdout, stderr = connection.exec_command('show ip route')
-            routing_table = stdout.read().decode('utf-8')
+            routing_table = CiscoConnectionRouter._run(type, ip, CiscoConnectionRouter._route_command(prefix))
             return routing_table
+        except DeviceUnavailableError as e:
+            return str(e)
+        except ConnectionError:
+            return "Connection to Cisco device failed."
         except Exception as e:
             return f"Error retrieving routing table: {e}"
-        finally:
-            connection.close()
 
 class CiscoConnectionSwitch:
     """
@@ -217,6 +331,8 @@ class CiscoConnectionSwitch:
     def _connection(ip: Optional[str] = None):
         """
         Create a connection to a cisco switch
+
+        :raises DeviceUnavailableError: If the switch's circuit breaker is open.
         """
         ssh_client = paramiko.SSHClient()
         ssh_client.load_system_host_keys()
@@ -227,14 +343,20 @@ class CiscoConnectionSwitch:
         password = GeneralConfig.get_cisco_password()
 
         try:
-            ssh_client.connect(
-                hostname=ip,
-                port=port,
-                username=username,
-                password=password
-            )
+            with ssh_breaker.guard(ip):
+                ssh_client.connect(
+                    hostname=ip,
+                    port=port,
+                    username=username,
+                    password=password,
+                    timeout=Deadline.timeout(10),
+                    banner_timeout=Deadline.timeout(10),
+                    auth_timeout=Deadline.timeout(10)
+                )
             return ssh_client
-        except paramiko.SSHException as e:
+        except (DeviceUnavailableError, DeadlineExceeded):
+            raise
+        except (paramiko.SSHException, OSError) as e:
             print(f"Failed to connect to Cisco switch: {e}")
             return None
     
@@ -244,7 +366,10 @@ class CiscoConnectionSwitch:
         get all information from a Cisco switch using show version command
         """
 
-        connection = CiscoConnectionRouter._connection(type, ip)
+        try:
+            connection = CiscoConnectionSwitch._connection(ip=ip)
+        except DeviceUnavailableError as e:
+            return str(e)
         if not connection:
             return "Connection to Cisco device failed."
     
@@ -355,7 +480,10 @@ class CiscoConnectionSwitch:
         :param service: Service identifier to filter interfaces.
         :return: Interface status as a string.
         """
-        connection = CiscoConnectionSwitch._connection(ip=ip)
+        try:
+            connection = CiscoConnectionSwitch._connection(ip=ip)
+        except DeviceUnavailableError as e:
+            return str(e)
         if not connection:
             return "Connection to Cisco switch failed."
     
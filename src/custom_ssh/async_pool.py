@@ -0,0 +1,141 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Tuple
+
+import asyncssh
+
+from infra.config import SSHPoolConfig
+from infra.deadline import Deadline
+from infra.logger.service_log import Logger
+from src.custom_ssh.breaker import ssh_breaker
+
+logger = Logger.get_logger("ssh_pool")
+
+PoolKey = Tuple[str, int, str]
+
+
+class AsyncSSHSessionPool:
+    """
+    asyncio counterpart of SSHSessionPool built on asyncssh.
+
+    One authenticated connection is kept per (ip, port, role) and every lease opens its own
+    channel on it, so hundreds of devices can be worked on from a single event loop without
+    a thread per session. Concurrent channels per device are capped by max_per_device.
+    """
+
+    def __init__(
+        self,
+        max_per_device: int = 3,
+        idle_timeout: float = 120,
+        keepalive: int = 30,
+        lease_timeout: float = 30,
+    ):
+        self.max_per_device = max_per_device
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.lease_timeout = lease_timeout
+
+        self._connections: Dict[PoolKey, asyncssh.SSHClientConnection] = {}
+        self._last_used: Dict[PoolKey, float] = {}
+        self._active: Dict[PoolKey, int] = {}
+        self._locks: Dict[PoolKey, asyncio.Lock] = {}
+        self._slots: Dict[PoolKey, asyncio.Semaphore] = {}
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for key, connection in list(self._connections.items()):
+            idle = now - self._last_used.get(key, now) > self.idle_timeout
+            if connection.is_closed() or (idle and not self._active.get(key)):
+                logger.info(f"Evicting idle SSH connection to {key[0]}:{key[1]} ({key[2]})")
+                self._discard(key, connection)
+
+    def _discard(self, key: PoolKey, connection: asyncssh.SSHClientConnection):
+        if self._connections.get(key) is connection:
+            del self._connections[key]
+        connection.close()
+
+    async def _get_connection(self, key: PoolKey, username: str, password: str, connect_timeout: float):
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            connection = self._connections.get(key)
+            if connection is not None and not connection.is_closed():
+                return connection
+            ip, port, role = key
+            with ssh_breaker.guard(ip):
+                try:
+                    connection = await asyncssh.connect(
+                        ip,
+                        port=port,
+                        username=username,
+                        password=password,
+                        known_hosts=None,
+                        client_keys=None,
+                        agent_path=None,
+                        connect_timeout=connect_timeout,
+                        keepalive_interval=self.keepalive,
+                    )
+                except (asyncssh.Error, OSError, asyncio.TimeoutError) as e:
+                    logger.error(f"Failed to connect to {ip}:{port} ({role}): {e}")
+                    raise ConnectionError(f"Failed to connect to {ip}:{port} ({role}): {e}")
+            logger.info(f"Opened pooled asyncssh connection to {ip}:{port} ({role})")
+            self._connections[key] = connection
+            return connection
+
+    @asynccontextmanager
+    async def lease(self, ip: str, port: int, role: str, username: str, password: str, connect_timeout: float = 10):
+        """
+        Lease the pooled connection for (ip, port, role), opening it on first use.
+
+        Args:
+            ip (str): IP address of the device.
+            port (int): SSH port.
+            role (str): Credential role, e.g. 'cpe' or 'pop'.
+            username (str): SSH username.
+            password (str): SSH password.
+            connect_timeout (float): Timeout in seconds for opening a new connection.
+
+        Yields:
+            asyncssh.SSHClientConnection: A live connection. Do not close it.
+
+        Raises:
+            ConnectionError: If no channel slot frees up within lease_timeout or the connection fails.
+        """
+        key = (ip, port, role)
+        self._evict_idle()
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_per_device))
+        try:
+            await asyncio.wait_for(slots.acquire(), Deadline.timeout(self.lease_timeout))
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"SSH channel limit ({self.max_per_device}) reached for {ip}:{port} ({role}).")
+        try:
+            connection = await self._get_connection(key, username, password, Deadline.timeout(connect_timeout))
+            self._active[key] = self._active.get(key, 0) + 1
+            try:
+                yield connection
+            except (asyncssh.DisconnectError, asyncssh.ConnectionLost, OSError):
+                self._discard(key, connection)
+                raise
+            finally:
+                self._active[key] -= 1
+                self._last_used[key] = time.monotonic()
+        finally:
+            slots.release()
+
+    async def close_all(self):
+        """
+        Close every pooled connection.
+        """
+        connections = list(self._connections.values())
+        self._connections.clear()
+        for connection in connections:
+            connection.close()
+            await connection.wait_closed()
+
+
+async_ssh_pool = AsyncSSHSessionPool(
+    max_per_device=SSHPoolConfig.get_max_per_device(),
+    idle_timeout=SSHPoolConfig.get_idle_timeout(),
+    keepalive=SSHPoolConfig.get_keepalive(),
+    lease_timeout=SSHPoolConfig.get_lease_timeout(),
+)
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Set
+
+from infra.config import CircuitBreakerConfig
+from infra.deadline import DeadlineExceeded
+from infra.logger.service_log import Logger
+
+logger = Logger.get_logger("ssh_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Raised around a connect without saying anything about the device: the tool ran out of time, or
+# credentials/arguments were missing before any packet was sent
+NOT_DEVICE_FAULTS = (DeadlineExceeded, ValueError)
+
+
+class DeviceUnavailableError(ConnectionError):
+    """
+    Raised instead of connecting while a device's circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Per-device circuit breaker for SSH connects, shared by every vendor driver.
+
+    After threshold failed connects within window seconds the breaker opens and connects to that
+    device fail immediately for cooldown seconds. The first connect after the cooldown is let
+    through as a half-open probe: success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, threshold: int = 3, window: float = 60, cooldown: float = 60):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._failures: Dict[str, Deque[float]] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: Set[str] = set()
+
+    def _state(self, host: str, now: float) -> str:
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return CLOSED
+        if now - opened_at < self.cooldown:
+            return OPEN
+        return HALF_OPEN
+
+    def state(self, host: str) -> str:
+        """
+        Return 'closed', 'open' or 'half-open' for host.
+        """
+        with self._lock:
+            return self._state(host, time.monotonic())
+
+    def allow(self, host: str):
+        """
+        Check whether a connect to host may go ahead, claiming the half-open probe if one is due.
+
+        :raises DeviceUnavailableError: If the breaker is open or another caller is already probing.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(host, now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and host not in self._probing:
+                self._probing.add(host)
+                logger.info(f"Circuit half-open for {host}; sending probe connect")
+                return
+            remaining = max(self.cooldown - (now - self._opened_at[host]), 0)
+        if state == OPEN:
+            raise DeviceUnavailableError(
+                f"Device {host} is marked unreachable by the SSH circuit breaker (state: open) after "
+                f"{self.threshold} failed connects within {self.window:.0f}s; failing fast for another {remaining:.0f}s."
+            )
+        raise DeviceUnavailableError(
+            f"Device {host} is marked unreachable by the SSH circuit breaker (state: half-open); "
+            f"a probe connect is already in progress."
+        )
+
+    def record_success(self, host: str):
+        with self._lock:
+            was_open = host in self._opened_at
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._probing.discard(host)
+        if was_open:
+            logger.info(f"Circuit closed for {host}")
+
+    def record_failure(self, host: str):
+        now = time.monotonic()
+        with self._lock:
+            if host in self._probing:
+                self._probing.discard(host)
+                self._opened_at[host] = now
+                logger.warning(f"Probe connect to {host} failed; circuit re-opened for {self.cooldown:.0f}s")
+                return
+            failures = self._failures.setdefault(host, deque())
+            failures.append(now)
+            while failures and now - failures[0] > self.window:
+                failures.popleft()
+            if len(failures) < self.threshold:
+                return
+            failures.clear()
+            self._opened_at[host] = now
+        logger.warning(f"Circuit opened for {host} after {self.threshold} failed connects; cooling down {self.cooldown:.0f}s")
+
+    def abandon_probe(self, host: str):
+        """
+        Free the half-open probe slot without recording an outcome, e.g. when the connect never ran.
+        """
+        with self._lock:
+            self._probing.discard(host)
+
+    @contextmanager
+    def guard(self, host: str):
+        """
+        Wrap a connect attempt: fail fast while open, and record the outcome of the block.
+
+        NOT_DEVICE_FAULTS, cancellation and interrupts are not counted against the device; they
+        only free the probe slot.
+
+        :raises DeviceUnavailableError: If the breaker does not allow a connect right now.
+        """
+        self.allow(host)
+        try:
+            yield
+        except NOT_DEVICE_FAULTS:
+            self.abandon_probe(host)
+            raise
+        except Exception:
+            self.record_failure(host)
+            raise
+        except BaseException:
+            # Cancelled or interrupted: not the device's fault, but free the probe slot.
+            self.abandon_probe(host)
+            raise
+        else:
+            self.record_success(host)
+
+
+ssh_breaker = CircuitBreaker(
+    threshold=CircuitBreakerConfig.get_threshold(),
+    window=CircuitBreakerConfig.get_window(),
+    cooldown=CircuitBreakerConfig.get_cooldown(),
+)
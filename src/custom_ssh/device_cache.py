@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from infra.config import DeviceCacheConfig
+from infra.logger.service_log import Logger
+
+logger = Logger.get_logger("device_cache")
+
+
+class DeviceTypeCache:
+    """
+    Persistent per-host cache of what autodetection found about a device.
+
+    Entries hold the netmiko platform found by SSHDetect ('device_type'), the transport that
+    connected ('transport': 'netmiko' or 'paramiko') and the hardware model ('model'), so repeat
+    checks can open the right driver straight away instead of probing the device again. The cache
+    is a small JSON file rewritten atomically on every change.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, str]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable device cache {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist device cache to {self.path}: {e}")
+
+    def get(self, host: str, field: str) -> Optional[str]:
+        """
+        Return a cached field ('device_type', 'transport' or 'model') for host, or None if unknown.
+        """
+        with self._lock:
+            return self._entries.get(host, {}).get(field)
+
+    def set(self, host: str, **fields: Optional[str]):
+        """
+        Store fields for host, skipping empty values, and persist the cache if anything changed.
+        """
+        with self._lock:
+            entry = self._entries.setdefault(host, {})
+            changed = False
+            for field, value in fields.items():
+                if value and entry.get(field) != value:
+                    entry[field] = value
+                    changed = True
+            if changed:
+                logger.info(f"Cached {fields} for {host}")
+                self._save()
+
+    def invalidate(self, host: str, *fields: str):
+        """
+        Forget the given fields for host, or everything known about it when no field is named,
+        e.g. drop only 'transport' after a cached transport fails to connect.
+        """
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return
+            dropped = [field for field in fields if entry.pop(field, None) is not None] if fields else list(entry)
+            if not fields or not entry:
+                del self._entries[host]
+            if dropped:
+                logger.info(f"Invalidated {dropped} in device cache entry for {host}")
+                self._save()
+
+
+device_type_cache = DeviceTypeCache(DeviceCacheConfig.get_path())
@@ -0,0 +1,114 @@
+import ipaddress
+import re
+from typing import Optional
+
+# Characters that would let a value escape a RouterOS quoted string (quotes, $variables, [command substitution])
+ROUTEROS_UNSAFE = re.compile(r'["\\$\[\]{};`\r\n]')
+# IOS/Junos output modifiers take the rest of the line as a regex; only a line break can inject a new command
+CLI_UNSAFE = re.compile(r'[\r\n]')
+# Inside a quoted Junos match regex only a quote (closing the string) or a line break can escape it
+JUNOS_UNSAFE = re.compile(r'["\r\n]')
+
+
+def safe_term(value: str, unsafe: re.Pattern = ROUTEROS_UNSAFE) -> str:
+    """
+    Validate a user supplied filter value before it is embedded in a device command.
+
+    :raises ValueError: If the value is empty or contains a character matched by unsafe.
+    """
+    value = str(value).strip()
+    if not value or unsafe.search(value):
+        raise ValueError(f"Invalid filter value: {value!r}")
+    return value
+
+
+def routeros_where(**conditions: Optional[str]) -> str:
+    """
+    Build a RouterOS ' where ...' clause from property~value regex matches, skipping empty values.
+
+    routeros_where(name="ether1", comment=None) -> ' where name~"ether1"'
+    """
+    terms = [f'{prop.replace("_", "-")}~"{safe_term(value)}"' for prop, value in conditions.items() if value]
+    return f" where {' '.join(terms)}" if terms else ""
+
+
+def ios_include(pattern: Optional[str]) -> str:
+    """
+    Build an IOS ' | include <regex>' output modifier, or "" when pattern is empty.
+    """
+    return f" | include {safe_term(pattern, CLI_UNSAFE)}" if pattern else ""
+
+
+def junos_match(pattern: Optional[str]) -> str:
+    """
+    Build a Junos ' | match "<regex>"' output modifier, or "" when pattern is empty.
+    """
+    return f' | match "{safe_term(pattern, JUNOS_UNSAFE)}"' if pattern else ""
+
+
+def cli_token(value: str) -> str:
+    """
+    Validate a single CLI argument such as an interface name (GigabitEthernet0/0/1, ge-0/0/0.100).
+
+    :raises ValueError: If value is not one word of letters, digits and ./:- characters.
+    """
+    value = str(value).strip()
+    if not re.fullmatch(r'[\w./:\-]+', value):
+        raise ValueError(f"Invalid argument: {value!r}")
+    return value
+
+
+def ios_mac(mac: str) -> str:
+    """
+    Convert a MAC address in any common notation to the IOS dotted form (aabb.ccdd.eeff).
+
+    :raises ValueError: If mac does not contain exactly 12 hex digits.
+    """
+    digits = re.sub(r'[^0-9a-fA-F]', '', mac).lower()
+    if len(digits) != 12:
+        raise ValueError(f"Invalid MAC address: {mac!r}")
+    return f"{digits[0:4]}.{digits[4:8]}.{digits[8:12]}"
+
+
+def junos_mac(mac: str) -> str:
+    """
+    Convert a MAC address in any common notation to the Junos colon form (aa:bb:cc:dd:ee:ff).
+
+    :raises ValueError: If mac does not contain exactly 12 hex digits.
+    """
+    digits = ios_mac(mac).replace('.', '')
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def ios_route_target(prefix: str) -> str:
+    """
+    Turn '10.0.0.0/24' into '10.0.0.0 255.255.255.0 longer-prefixes' and a bare address into itself.
+
+    :raises ValueError: If prefix is not an IPv4 address or network.
+    """
+    network = ipaddress.IPv4Network(prefix, strict=False)
+    if '/' not in prefix:
+        return str(network.network_address)
+    return f"{network.network_address} {network.netmask} longer-prefixes"
+
+
+def ios_severity_regex(severity: int) -> str:
+    """
+    Regex matching IOS syslog lines (%FACILITY-SEVERITY-MNEMONIC) at severity or more urgent.
+
+    :raises ValueError: If severity is not between 0 (emergencies) and 7 (debugging).
+    """
+    severity = int(severity)
+    if not 0 <= severity <= 7:
+        raise ValueError(f"Invalid syslog severity: {severity}")
+    return f"%[A-Z0-9_]+-[0-{severity}]-"
+
+
+def filter_lines(output: str, pattern: Optional[str]) -> str:
+    """
+    Keep only the lines of output that match pattern (a regex), for CLIs with no output filter of their own.
+    """
+    if not pattern:
+        return output
+    regex = re.compile(pattern, re.IGNORECASE)
+    return "\n".join(line for line in output.splitlines() if regex.search(line))
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import paramiko
+
+from infra.config import SSHPoolConfig
+from infra.deadline import Deadline
+from infra.logger.service_log import Logger
+from src.custom_ssh.reader import read_until_exit
+
+logger = Logger.get_logger("ssh_multiplex")
+
+
+_slots_lock = threading.Lock()
+_device_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def _device_slot(transport: paramiko.Transport) -> threading.BoundedSemaphore:
+    """
+    Channel semaphore shared by every caller working on the same device, whatever session they lease.
+    """
+    host = transport.getpeername()[0]
+    with _slots_lock:
+        slot = _device_slots.get(host)
+        if slot is None:
+            slot = _device_slots[host] = threading.BoundedSemaphore(SSHPoolConfig.get_max_channels())
+        return slot
+
+
+def _run_on_channel(transport: paramiko.Transport, slot: threading.BoundedSemaphore, command: str, timeout: float) -> Tuple[str, str]:
+    if not slot.acquire(timeout=Deadline.timeout(timeout)):
+        raise paramiko.SSHException(f"SSH channel limit ({SSHPoolConfig.get_max_channels()}) reached for {transport.getpeername()[0]}.")
+    try:
+        channel = transport.open_session(timeout=timeout)
+        try:
+            channel.exec_command(command)
+            output = read_until_exit(channel, timeout=timeout)
+            error = b""
+            while channel.recv_stderr_ready():
+                error += channel.recv_stderr(65535)
+            return output, error.decode('utf-8', errors='ignore')
+        finally:
+            channel.close()
+    finally:
+        slot.release()
+
+
+def run_on_channels(
+    client: paramiko.SSHClient,
+    commands: List[str],
+    max_channels: Optional[int] = None,
+    timeout: float = 60,
+) -> List[Tuple[str, str]]:
+    """
+    Run independent commands on parallel channels of one authenticated transport.
+
+    Only one SSH session is used, so the device's session limit is not affected. Channels open at
+    once on a device are capped by SSHPoolConfig.get_max_channels() across all concurrent callers,
+    and max_channels can lower that further for one call. Intended for read-only commands whose
+    order of execution does not matter.
+
+    Args:
+        client (paramiko.SSHClient): An open (e.g. pooled) SSH session.
+        commands (list): Commands to run, one channel each.
+        max_channels (int): Concurrent channel cap for this call. Defaults to SSHPoolConfig.get_max_channels().
+        timeout (float): Per-command deadline in seconds, bounded by the current tool Deadline.
+
+    Returns:
+        list: (stdout, stderr) for every command, in the order of commands.
+
+    Raises:
+        paramiko.SSHException: If the transport is not active, a channel cannot be opened or no
+            device channel slot frees up in time.
+    """
+    transport = client.get_transport()
+    if transport is None or not transport.is_active():
+        raise paramiko.SSHException("SSH transport is not active.")
+    if not commands:
+        return []
+    timeout = Deadline.timeout(timeout)
+    slot = _device_slot(transport)
+    workers = max(1, min(max_channels or SSHPoolConfig.get_max_channels(), len(commands)))
+    logger.info(f"Running {len(commands)} commands on up to {workers} channels")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ssh-channel") as executor:
+        return list(executor.map(lambda command: _run_on_channel(transport, slot, command, timeout), commands))
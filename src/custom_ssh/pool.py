@@ -0,0 +1,206 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import paramiko
+
+from infra.config import SSHPoolConfig
+from infra.deadline import Deadline
+from infra.logger.service_log import Logger
+from src.custom_ssh.breaker import ssh_breaker
+
+logger = Logger.get_logger("ssh_pool")
+
+PoolKey = Tuple[str, int, str]
+
+
+class SSHSessionPool:
+    """
+    Process-wide pool of authenticated paramiko sessions.
+
+    Sessions are keyed by (ip, port, role) where role is the credential set
+    used to log in ("cpe" or "pop"). A getter leases a session, runs its
+    commands and gives it back instead of closing it, so consecutive getters
+    against the same device reuse one SSH handshake.
+    """
+
+    def __init__(
+        self,
+        max_per_device: int = 3,
+        idle_timeout: float = 120,
+        keepalive: int = 30,
+        lease_timeout: float = 30,
+    ):
+        self.max_per_device = max_per_device
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.lease_timeout = lease_timeout
+
+        self._cond = threading.Condition()
+        self._idle: Dict[PoolKey, List[Tuple[paramiko.SSHClient, float]]] = {}
+        self._leased: Dict[PoolKey, int] = {}
+        self._reaper: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    @staticmethod
+    def _close_quietly(client: paramiko.SSHClient):
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled SSH session: {e}")
+
+    def _start_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_forever, name="ssh-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            self.evict_idle()
+
+    def evict_idle(self):
+        """
+        Close every idle session that was not used within idle_timeout or whose transport died.
+        """
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            for key in list(self._idle):
+                keep = []
+                for client, last_used in self._idle[key]:
+                    if now - last_used > self.idle_timeout or not self._is_alive(client):
+                        expired.append((key, client))
+                    else:
+                        keep.append((client, last_used))
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+            if expired:
+                self._cond.notify_all()
+        for key, client in expired:
+            logger.info(f"Evicting idle SSH session to {key[0]}:{key[1]} ({key[2]})")
+            self._close_quietly(client)
+
+    def acquire(self, key: PoolKey, connect: Callable[[], Optional[paramiko.SSHClient]]) -> paramiko.SSHClient:
+        """
+        Lease a session for key, reusing an idle one or opening a new one with connect.
+
+        Args:
+            key (tuple): (ip, port, role) of the device.
+            connect (callable): Factory returning a new authenticated paramiko.SSHClient.
+
+        Returns:
+            paramiko.SSHClient: A live session that must be handed back with release().
+
+        Raises:
+            ConnectionError: If the per-device session cap stays exhausted for lease_timeout
+                or the factory could not open a session.
+            DeviceUnavailableError: If the device's circuit breaker is open.
+        """
+        self._start_reaper()
+        deadline = time.monotonic() + Deadline.timeout(self.lease_timeout)
+        stale = []
+        with self._cond:
+            while True:
+                idle = self._idle.get(key, [])
+                while idle:
+                    client, _ = idle.pop()
+                    if self._is_alive(client):
+                        self._leased[key] = self._leased.get(key, 0) + 1
+                        break
+                    stale.append(client)
+                else:
+                    client = None
+                if client is not None or self._leased.get(key, 0) + len(idle) < self.max_per_device:
+                    if client is None:
+                        # Reserve the slot before connecting so concurrent callers respect the cap.
+                        self._leased[key] = self._leased.get(key, 0) + 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionError(
+                        f"SSH session limit ({self.max_per_device}) reached for {key[0]}:{key[1]} ({key[2]})."
+                    )
+                self._cond.wait(remaining)
+
+        for dead in stale:
+            self._close_quietly(dead)
+        if client is not None:
+            return client
+
+        try:
+            with ssh_breaker.guard(key[0]):
+                client = connect()
+                if client is None:
+                    raise ConnectionError(f"Failed to open SSH session to {key[0]}:{key[1]} ({key[2]}).")
+        except Exception:
+            with self._cond:
+                self._leased[key] -= 1
+                self._cond.notify()
+            raise
+
+        transport = client.get_transport()
+        if transport is not None and self.keepalive:
+            transport.set_keepalive(self.keepalive)
+        logger.info(f"Opened pooled SSH session to {key[0]}:{key[1]} ({key[2]})")
+        return client
+
+    def release(self, key: PoolKey, client: paramiko.SSHClient, discard: bool = False):
+        """
+        Hand a leased session back to the pool, closing it instead if discard is set or it died.
+        """
+        with self._cond:
+            self._leased[key] = max(self._leased.get(key, 0) - 1, 0)
+            if not self._leased[key]:
+                del self._leased[key]
+            keep = not discard and self._is_alive(client)
+            if keep:
+                self._idle.setdefault(key, []).append((client, time.monotonic()))
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(client)
+
+    @contextmanager
+    def lease(self, ip: str, port: int, role: str, connect: Callable[[], Optional[paramiko.SSHClient]]):
+        """
+        Context manager around acquire()/release().
+
+        Sessions that fail with a transport-level error are discarded rather than returned to the pool.
+        """
+        key = (ip, port, role)
+        client = self.acquire(key, connect)
+        try:
+            yield client
+        except (paramiko.SSHException, EOFError, OSError):
+            self.release(key, client, discard=True)
+            raise
+        except BaseException:
+            self.release(key, client)
+            raise
+        else:
+            self.release(key, client)
+
+    def close_all(self):
+        """
+        Close every idle session. Leased sessions are closed when they are released.
+        """
+        with self._cond:
+            idle = [client for sessions in self._idle.values() for client, _ in sessions]
+            self._idle.clear()
+        for client in idle:
+            self._close_quietly(client)
+
+
+ssh_pool = SSHSessionPool(
+    max_per_device=SSHPoolConfig.get_max_per_device(),
+    idle_timeout=SSHPoolConfig.get_idle_timeout(),
+    keepalive=SSHPoolConfig.get_keepalive(),
+    lease_timeout=SSHPoolConfig.get_lease_timeout(),
+)
@@ -0,0 +1,209 @@
+import codecs
+import re
+import socket
+import time
+from typing import Callable, Optional
+
+import paramiko
+
+from infra.deadline import Deadline
+from infra.logger.service_log import Logger
+
+logger = Logger.get_logger("ssh_reader")
+
+ANSI_ESCAPE = re.compile(r'\x1b(\[[0-9;?]*[A-Za-z]|[=>])')
+
+
+class SummaryLineParser:
+    """
+    Streaming parser that remembers the last complete line containing key.
+
+    Chunks can split lines anywhere; only the unfinished tail is buffered between feeds.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.result: Optional[str] = None
+        self._partial = ""
+
+    def feed(self, chunk: str):
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            if self.key in line:
+                self.result = line.strip()
+
+    def close(self) -> Optional[str]:
+        """
+        Flush the unfinished tail and return the summary line, or None if key never appeared.
+        """
+        if self.key in self._partial:
+            self.result = self._partial.strip()
+        self._partial = ""
+        return self.result
+
+
+def read_until_exit(
+    channel: paramiko.Channel,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    timeout: Optional[float] = None,
+    poll_interval: float = 1.0,
+    keep_output: bool = True,
+) -> str:
+    """
+    Read a channel until the remote command exits, blocking on the socket instead of spinning.
+
+    Each recv() waits up to poll_interval for data, so the thread sleeps while the device is
+    quiet (e.g. between ping replies).
+
+    Args:
+        channel (paramiko.Channel): Channel of an exec_command call.
+        on_chunk (callable): Called with every decoded chunk as soon as it arrives.
+        timeout (float): Overall deadline in seconds, further bounded by the current tool Deadline.
+            None waits for the command to exit.
+        poll_interval (float): Maximum time a single recv() blocks.
+        keep_output (bool): Accumulate and return the output. Set to False when on_chunk consumes it,
+            so memory stays bounded for large outputs.
+
+    Returns:
+        str: The full decoded output read from the channel, or "" when keep_output is False.
+    """
+    timeout = Deadline.timeout(timeout)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    chunks = []
+    # Incremental decoding so multi-byte characters split across recv() calls survive
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    channel.settimeout(poll_interval)
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning(f"Channel read timed out after {timeout}s; returning partial output.")
+            break
+        try:
+            data = channel.recv(65535)
+        except socket.timeout:
+            if channel.exit_status_ready() and not channel.recv_ready():
+                break
+            continue
+        if not data:
+            break
+        chunk = decoder.decode(data)
+        if keep_output:
+            chunks.append(chunk)
+        if on_chunk is not None and chunk:
+            on_chunk(chunk)
+    return "".join(chunks)
+
+
+def stream_exec(
+    client: paramiko.SSHClient,
+    command: str,
+    on_chunk: Callable[[str], None],
+    timeout: Optional[float] = None,
+) -> str:
+    """
+    Run command on its own exec channel and hand its output to on_chunk as it arrives, without buffering it.
+
+    Args:
+        client (paramiko.SSHClient): An open SSH session.
+        command (str): Command to run.
+        on_chunk (callable): Receives every decoded chunk of stdout.
+        timeout (float): Overall deadline in seconds, bounded by the current tool Deadline.
+
+    Returns:
+        str: Whatever the command wrote to stderr ("" when nothing).
+    """
+    channel = client.get_transport().open_session()
+    try:
+        channel.exec_command(command)
+        read_until_exit(channel, on_chunk=on_chunk, timeout=timeout, keep_output=False)
+        error = b""
+        while channel.recv_stderr_ready():
+            error += channel.recv_stderr(65535)
+        return error.decode('utf-8', errors='ignore')
+    finally:
+        channel.close()
+
+
+def read_until_pattern(channel: paramiko.Channel, pattern: re.Pattern, deadline: float) -> str:
+    """
+    Read from an interactive shell channel until pattern matches the cleaned output or the deadline passes.
+
+    The channel must have a short timeout set (e.g. channel.settimeout(1)) so the deadline is checked
+    while the device is quiet.
+
+    Args:
+        channel (paramiko.Channel): Channel with an interactive shell.
+        pattern (re.Pattern): Pattern searched in everything read so far, typically the device prompt.
+        deadline (float): time.monotonic() value after which reading stops.
+
+    Returns:
+        str: Everything read so far, with ANSI escapes and carriage returns removed.
+    """
+    buffer = ""
+    while time.monotonic() < deadline:
+        try:
+            chunk = channel.recv(65535)
+        except socket.timeout:
+            continue
+        if not chunk:
+            break
+        buffer += chunk.decode('utf-8', errors='ignore')
+        cleaned = ANSI_ESCAPE.sub('', buffer).replace('\r', '')
+        if pattern.search(cleaned):
+            return cleaned
+    logger.warning("Interactive channel closed or timed out before the expected output.")
+    return ANSI_ESCAPE.sub('', buffer).replace('\r', '')
+
+
+def stream_until_pattern(
+    channel: paramiko.Channel,
+    pattern: re.Pattern,
+    deadline: float,
+    on_chunk: Callable[[str], None],
+    hold_back: int = 256,
+) -> bool:
+    """
+    Streaming counterpart of read_until_pattern for large interactive outputs.
+
+    Output is handed to on_chunk as it arrives, except for the first line (the echoed command) and
+    a small tail of hold_back characters kept to match pattern against; once it matches, the tail
+    minus the matched prompt is flushed. Memory use is bounded by hold_back plus one chunk.
+
+    Args:
+        channel (paramiko.Channel): Channel with an interactive shell, after the command was sent.
+        pattern (re.Pattern): Prompt pattern anchored at the end of the output.
+        deadline (float): time.monotonic() value after which reading stops.
+        on_chunk (callable): Receives the cleaned output.
+        hold_back (int): Characters retained for prompt matching; must exceed the prompt length.
+
+    Returns:
+        bool: True if the prompt was seen, False on timeout or channel close.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    tail = ""
+    echo_skipped = False
+    while time.monotonic() < deadline:
+        try:
+            data = channel.recv(65535)
+        except socket.timeout:
+            continue
+        if not data:
+            break
+        tail += ANSI_ESCAPE.sub('', decoder.decode(data)).replace('\r', '')
+        if not echo_skipped:
+            if '\n' not in tail:
+                continue
+            tail = tail.split('\n', 1)[1]
+            echo_skipped = True
+        match = pattern.search(tail)
+        if match:
+            if tail[:match.start()]:
+                on_chunk(tail[:match.start()])
+            return True
+        if len(tail) > hold_back:
+            on_chunk(tail[:-hold_back])
+            tail = tail[-hold_back:]
+    if tail:
+        on_chunk(tail)
+    logger.warning("Interactive channel closed or timed out before the prompt.")
+    return False
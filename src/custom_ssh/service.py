@@ -1,6 +1,9 @@
 
 import paramiko
 import time
+from src.accedian.connection import ACCEDIAN_PROMPT
+from src.custom_ssh.reader import SummaryLineParser, read_until_exit, read_until_pattern
+from infra.deadline import Deadline
 
 def ssh_command(hostname, username, password, command, manufacture, timeout=120):
     """
@@ -24,7 +27,8 @@ def ssh_command(hostname, username, password, command, manufacture, timeout=120)
         ssh.load_system_host_keys()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         try:
-            ssh.connect(hostname=hostname, username=username, password=password , look_for_keys=False ,  allow_agent=False)    
+            timeout = Deadline.timeout(timeout)
+            ssh.connect(hostname=hostname, username=username, password=password , look_for_keys=False ,  allow_agent=False, timeout=timeout)    
         except Exception as e:
             print(f"Error connect:{e}")
             return None
@@ -33,20 +37,12 @@ def ssh_command(hostname, username, password, command, manufacture, timeout=120)
             # Tratamento especial para dispositivos Accedian: abre shell interativo
             print("Accedian device detected")
             shell = ssh.invoke_shell()
-            time.sleep(2)  # Aguarda inicialização do shell
-            shell.recv(1000)  # Limpa o buffer inicial
-            shell.send(command + '')  # Envia o comando
-            
-            output_lines = []
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if shell.recv_ready():
-                    output = shell.recv(65000).decode("utf-8", errors='ignore')
-                    output_lines.append(output)
-                    if command in output:
-                        break
-            time.sleep(1)
-            output = ''.join(output_lines)
+            shell.settimeout(1)
+            deadline = time.monotonic() + timeout
+            # Aguarda o prompt em vez de dormir, depois envia o comando e lê até o prompt voltar
+            read_until_pattern(shell, ACCEDIAN_PROMPT, deadline)
+            shell.send(command + '\n')
+            output = read_until_pattern(shell, ACCEDIAN_PROMPT, deadline)
             print("Output:", output)
             shell.close()
             return output
@@ -58,10 +54,10 @@ def ssh_command(hostname, username, password, command, manufacture, timeout=120)
         #     print("line-------------------------------" , line)
         #     output_lines.append(line)
         # output = ''.join(output_lines)
-        ssh.close()
         output = stdout.read().decode()
         stdout.channel.settimeout(5)  
         error = stderr.read().decode()
+        ssh.close()
         if error:
             return f"Error: {error}"
         return output
@@ -73,32 +69,17 @@ def ssh_ping(hostname, username, password, command, max_wait_time=120, key="pack
         ssh = paramiko.SSHClient()
         ssh.load_system_host_keys()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(hostname=hostname, username=username, password=password , look_for_keys=False ,  allow_agent=False)
-
+        ssh.connect(hostname=hostname, username=username, password=password , look_for_keys=False ,  allow_agent=False,
+                    timeout=Deadline.timeout(10), banner_timeout=Deadline.timeout(10), auth_timeout=Deadline.timeout(10))
 
-        stdin, stdout, stderr = ssh.exec_command(command)
-        channel = stdout.channel
-        output_lines = []
-        
-        # Lê a saída enquanto o comando não termina
-        while not channel.exit_status_ready():
-            if channel.recv_ready():
-                output_lines.append(channel.recv(65000).decode('utf-8', errors='ignore'))
-        while channel.recv_ready():
-            output_lines.append(channel.recv(65000).decode('utf-8', errors='ignore'))
-        
 
-        full_output = "".join(output_lines)
-        lines = full_output.splitlines()
+        stdin, stdout, stderr = ssh.exec_command(command, timeout=Deadline.timeout(max_wait_time))
 
-        # Filtra a última linha com o resultado do ping (depende do vendor)
-        for line in reversed(lines):
-            print("---->", line)
-            if key in line:
-                result = line.strip()
-                break
-        else:
-            result = None
+        # Bloqueia no canal até o comando terminar; a última linha com o resultado
+        # do ping (depende do vendor) é extraída conforme a saída chega
+        parser = SummaryLineParser(key)
+        read_until_exit(stdout.channel, on_chunk=parser.feed, timeout=max_wait_time)
+        result = parser.close()
         
         ssh.close()
         return result  
@@ -184,90 +165,3 @@ def IsPingSucess(output, manufacture):
                             return False
                 return False
     return False
-
-
-
-
-
-
-
-            
-
-            # Obtém informações do dispositivo
-            connectedto, primary_ip, cpe_manufacture = GetDeviceInfo(service)
-            result["result_pop"] = connectedto
-            result["result_ping_ip_cpe"] = primary_ip
-            if connectedto and primary_ip:
-                print("connectedto            ", connectedto)
-                hostname = f'{connectedto}.eq.ignetworks.com'
-                print(hostname)
-                connectedto_manufacture = GetConnectedtoinfo(connectedto)
-                if connectedto_manufacture:
-                    # Executa o ping inicial
-                    output = ping(credencials, hostname, primary_ip.split('/')[0], connectedto_manufacture, count=10, interval=2)
-                    if output is not None:
-                        ping_sucess = IsPingSucess(output, connectedto_manufacture)
-                        print("result", ping_sucess)
-                        result["result_pop"] = connectedto
-                        result["result_ping_ip_cpe"] = primary_ip
-                        # Se o ping inicial for bem-sucedido, executa o ping extendido
-                        if ping_sucess:
-                            print("entrou aqui")
-                            result["responsibility"] = "not-vendor"
-                            result["status"] = "up" if ping_sucess == True else "down"
-                            result["result_ping_10"]["ping_output"] = output
-                            output = ping(credencials, hostname, primary_ip.split('/')[0], connectedto_manufacture, count=1000, interval=0.05)
-                            print("resultado ping extendido", output)
-                            if output:
-                                ping_sucess = IsPingSucess(output, connectedto_manufacture)
-                                print("extendido", ping_sucess)
-                                result["status"] = "clean" if ping_sucess == True else "packet_loss"
-                                result["result_ping_1000"]["ping_output"] = output
-                            else:
-                                result["result_ping_1000"] = None
-                            if result["status"] == "clean" and result["status"] is not None:
-                                result["responsibility"] = "customer"
-                                result["reason"] = "ping to cpe with 1000 repetions performed clean"
-                                result["issue_type"] = "unknown"
-                            else:
-                                result["responsibility"] = "vendor"
-                                result["reason"] = "ping to cpe with 1000 repetions not performed clean it might be a degradation"
-                            # Verifica a interface do CPE
-                            output_cpe = Access_cpe(credencials, primary_ip.split('/')[0], manufacture=cpe_manufacture)
-                            result["customer_interface"] = "customer interface up" if output_cpe == True else "cpe unreachable or interface not localized"
-                            result["issue_type"] = define_issuetype(result["status"])
-                            return result
-                        else:
-                            result["responsibility"] = "vendor"
-                            result["status"] = "down"
-                            result["result_ping_10"]["ping_output"] = output
-                            result["result_ping_1000"] =  None
-                            result["reason"] = "ping to cpe failed"
-                            result["issue_type"] = define_issuetype(result["status"])
-                            return result   
-                    else:
-                        result["responsibility"] = "unknown"
-                        result["result_ping_10"]["ping_output"] = output
-                        result["result_ping_1000"]["status"] =  None
-                        result["reason"] = "ping could not be performed, output is none"
-                        result["issue_type"] = define_issuetype(result["status"])
-                        return result    
-                else:
-                    print(f"Unable to get the manufacture of the device connectedto: {connectedto} primary ip: {primary_ip}")
-                    result["status"] = "unknown"
-                    result["reason"] = f"Unable to get the manufacture of the device connectedto: {connectedto} primary ip: {primary_ip}"
-                    result["result_ping_10"] =  {"ping_output": [output]}
-                    result["result_ping_1000"] = {}
-                    result["issue_type"] = define_issuetype(result["status"])
-                    return result
-            else:
-                print(f"Unable to ping the device vars connectedto: {connectedto} primary ip: {primary_ip}")
-                result["reason"] = f"Unable to ping the device vars connectedto: {connectedto} primary ip: {primary_ip}"
-                result["result_ping_10"]  =  {}
-                result["result_ping_1000"]  =  {}
-                return result
-
-        except Exception as e:
-            result["reason"] = str(e)
-            print(f"Erro inesperado durante a execução: {e}")
-            return result
\ No newline at end of file
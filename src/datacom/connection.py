@@ -1,39 +1,99 @@
 from infra.config import DatacomConfig
+from infra.deadline import Deadline, DeadlineExceeded
 import paramiko
-from netmiko import ConnectHandler
+from netmiko import ConnectHandler, SSHDetect
 import re
+from typing import Optional
+
+from src.custom_ssh.breaker import DeviceUnavailableError, ssh_breaker
+from src.custom_ssh.device_cache import device_type_cache
+
+DATACOM_MODELS = ['DM2301', 'DM4050', 'DM4100', 'DM4170', 'DM4370']
 
 
 class DatacomConnection:    
+    @staticmethod
+    def _connect_netmiko(ip, port, username, password):
+        """
+        Open a Netmiko connection with the platform cached for ip, running SSHDetect only when none is cached.
+        """
+        device = {
+            'device_type': 'autodetect',
+            'host': ip,
+            'username': username,
+            'password': password,
+            'port': port,
+            'conn_timeout': Deadline.timeout(10),
+        }
+        platform = device_type_cache.get(ip, 'device_type')
+        if not platform:
+            platform = SSHDetect(**device).autodetect()
+            device_type_cache.set(ip, device_type=platform)
+        if platform:
+            device['device_type'] = platform
+        return ConnectHandler(**device)
+
+    @staticmethod
+    def _connect_paramiko(ip, port, username, password):
+        ssh_client = paramiko.SSHClient()
+        ssh_client.load_system_host_keys()
+        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh_client.connect(hostname=ip, port=port, username=username, password=password,
+                           timeout=Deadline.timeout(10), banner_timeout=Deadline.timeout(10),
+                           auth_timeout=Deadline.timeout(10))
+        return ssh_client
+
     @staticmethod
     def connect_datacom(ip):
         """
         Attempts to connect to a Datacom device using Netmiko. If it fails, tries Paramiko.
         Returns (connection, type), where type is 'netmiko' or 'paramiko'.
-        """
 
+        The transport that worked and the Netmiko platform found by SSHDetect are cached per host,
+        so later connects go straight to the right driver without autodetection. If the cached
+        transport stops working only that transport is forgotten (platform and model are kept)
+        and both are tried again.
+        Raises DeviceUnavailableError while the device's circuit breaker is open.
+        """
         port = DatacomConfig.get_datacom_port()
         username = DatacomConfig.get_datacom_username()
         password = DatacomConfig.get_datacom_password()
-        device = {
-            'device_type': 'autodetect',
-            'host': ip,
-            'username': username,
-            'password': password,
-            'port': port
+        connectors = {
+            'netmiko': DatacomConnection._connect_netmiko,
+            'paramiko': DatacomConnection._connect_paramiko,
         }
+        cached = device_type_cache.get(ip, 'transport')
+        order = [cached] + [t for t in connectors if t != cached] if cached in connectors else list(connectors)
         try:
-            connection = ConnectHandler(**device)
-            return connection, 'netmiko'
-        except Exception:
-            try:
-                ssh_client = paramiko.SSHClient()
-                ssh_client.load_system_host_keys()
-                ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh_client.connect(hostname=ip, port=port, username=username, password=password)
-                return ssh_client, 'paramiko'
-            except Exception:
-                return None, None
+            with ssh_breaker.guard(ip):
+                for conn_type in order:
+                    try:
+                        connection = connectors[conn_type](ip, port, username, password)
+                    except DeadlineExceeded:
+                        raise
+                    except Exception:
+                        if conn_type == cached:
+                            device_type_cache.invalidate(ip, 'transport')
+                        continue
+                    device_type_cache.set(ip, transport=conn_type)
+                    return connection, conn_type
+                raise ConnectionError(f"Could not connect to Datacom device {ip}.")
+        except DeviceUnavailableError:
+            raise
+        except ConnectionError:
+            return None, None
+
+    @staticmethod
+    def model_from_device_type(device_type: Optional[str]) -> Optional[str]:
+        """
+        Map a Netbox device type (e.g. 'DM4170-24GX') to a known Datacom model, or None.
+        """
+        if not device_type:
+            return None
+        for model in DATACOM_MODELS:
+            if model in device_type.upper():
+                return model
+        return None
 
     
     @staticmethod
@@ -55,7 +115,7 @@ class DatacomConnection:
                 # Check if output is valid (not empty, no error/syntax)
                 if output and not any(err in output.lower() for err in ['invalid input', 'syntax error', 'unknown command']):
                     last_valid_output = output
-                    for model in ['DM2301', 'DM4050', 'DM4100', 'DM4170', 'DM4370']:
+                    for model in DATACOM_MODELS:
                         if model in output:
                             return model, output
             # If no model found but a valid response exists
@@ -229,16 +289,27 @@ class DatacomConnection:
         return output
 
     @staticmethod
-    def troubleshooting_datacom(hostname, service):
+    def troubleshooting_datacom(hostname, service, device_type: Optional[str] = None):
         """
         Main troubleshooting entry point for Datacom devices.
         Attempts connection, identifies model, and runs model-specific troubleshooting.
         Returns the output as a string.
+
+        The model is taken from the per-host cache, seeded from the Netbox device type when given,
+        and only probed on the device when neither knows it.
         """
+        seeded_model = DatacomConnection.model_from_device_type(device_type)
+        if seeded_model:
+            device_type_cache.set(hostname, model=seeded_model)
         connection, conn_type = DatacomConnection.connect_datacom(hostname)
         if not connection:
             return f"Could not connect to Datacom device {hostname} using Netmiko or Paramiko."
-        model, version_output = DatacomConnection.identify_datacom_version(connection, conn_type)
+        model = device_type_cache.get(hostname, 'model')
+        version_output = ''
+        if model not in DATACOM_MODELS:
+            model, version_output = DatacomConnection.identify_datacom_version(connection, conn_type)
+            if model in DATACOM_MODELS:
+                device_type_cache.set(hostname, model=model)
 
         if model == 'DM4050':
             result = DatacomConnection.test_dm4050(connection, conn_type, service)
@@ -1,4 +1,5 @@
 from infra.config import  IsToolsConfig
+from infra.deadline import Deadline
 import requests
 from typing import Optional
 import json 
@@ -38,7 +39,7 @@ class IsTools:
 
         try:
 
-            response = requests.post(url, headers=headers, data=json.dumps(payload))
+            response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=Deadline.timeout(30))
             response.raise_for_status()
             data = response.json()
 
@@ -1,7 +1,11 @@
 from  infra.config import GeneralConfig
+from infra.deadline import Deadline
 import re
 import ipaddress
+from typing import Optional
 from netmiko import ConnectHandler
+from src.custom_ssh.breaker import DeviceUnavailableError, ssh_breaker
+from src.custom_ssh.filters import cli_token, junos_mac, junos_match
 
 class JuniperConnection:
     """
@@ -14,9 +18,8 @@ class JuniperConnection:
         Create a Netmiko connection to a Juniper device.
         :param ip: IP address of the device.
         :return: Netmiko SSH connection object or None if failed.
+        :raises DeviceUnavailableError: If the device's circuit breaker is open.
         """
-        
-
         port = GeneralConfig.get_junos_port()
         username = GeneralConfig.get_junos_username()
         password = GeneralConfig.get_junos_password()
@@ -27,16 +30,49 @@ class JuniperConnection:
             'host': ip,
             'username': username,
             'password': password,
-            'port': port
+            'port': port,
+            'conn_timeout': Deadline.timeout(10),
         }
 
         try:
-            connection = ConnectHandler(**device)
-            return connection
+            with ssh_breaker.guard(ip):
+                connection = ConnectHandler(**device)
+        except DeviceUnavailableError:
+            raise
         except Exception as e:
             print(f"Failed to connect to Juniper device at {ip}: {e}")
             return None
-        
+        return connection
+
+    @staticmethod
+    def _prompt_pattern(connection) -> str:
+        """
+        Build a regex anchored on the Junos operational prompt (user@host> or user@host#).
+        :param connection: Netmiko connection object.
+        :return: Regex string matching the prompt at the end of the output.
+        """
+        return rf"{re.escape(connection.base_prompt)}[>#]\s*$"
+
+    @staticmethod
+    def _send(connection, command: str, read_timeout: float = 60):
+        """
+        Send a command and return as soon as the device prints its prompt again.
+
+        The juniper_junos session preparation runs 'set cli screen-length 0' once per session,
+        so no pager prompts are expected and completion is only signalled by the prompt.
+        :param connection: Netmiko connection object.
+        :param command: Command to run.
+        :param read_timeout: Maximum time in seconds to wait for the prompt, bounded by the tool Deadline.
+        :return: Command output including the echoed command and trailing prompt.
+        """
+        return connection.send_command(
+            command,
+            expect_string=JuniperConnection._prompt_pattern(connection),
+            strip_prompt=False,
+            strip_command=False,
+            read_timeout=Deadline.timeout(read_timeout),
+        )
+
 
     @staticmethod
     def get_system_information(ip: str):
@@ -50,13 +86,124 @@ class JuniperConnection:
             return "Connection to Juniper device failed."
         
         try:
-            system_info = connection.send_command_timing('show version | match Model', strip_prompt=False, strip_command=False)
+            system_info = JuniperConnection._send(connection, 'show version | match Model')
             connection.disconnect()
             return system_info
         except Exception as e:
             return f"Error retrieving system information: {e}"
         
     
+    @staticmethod
+    def _query(ip: str, command: str, error_label: str) -> str:
+        """
+        Run one read-only command on its own connection and return the output, or an error string.
+        :param ip: IP address of the device.
+        :param command: Command to run, with any '| match' filters already appended.
+        :param error_label: What was being read, for the error message.
+        """
+        connection = JuniperConnection._connection(ip)
+        if not connection:
+            return "Connection to Juniper device failed."
+        try:
+            return JuniperConnection._send(connection, command)
+        except Exception as e:
+            return f"Error retrieving {error_label}: {e}"
+        finally:
+            connection.disconnect()
+
+    @staticmethod
+    def _interfaces_command(interface: Optional[str] = None, pattern: Optional[str] = None) -> str:
+        target = f" {cli_token(interface)}" if interface else ""
+        return f"show interfaces terse{target}{junos_match(pattern)}"
+
+    @staticmethod
+    def _arp_command(address: Optional[str] = None, mac: Optional[str] = None, interface: Optional[str] = None) -> str:
+        """
+        Build 'show arp no-resolve' with every given filter; address and interface are options, mac a match.
+
+        :raises ValueError: If a filter value is malformed.
+        """
+        command = "show arp no-resolve"
+        if address:
+            command += f" hostname {ipaddress.IPv4Address(address)}"
+        if interface:
+            command += f" interface {cli_token(interface)}"
+        if mac:
+            command += junos_match(junos_mac(mac))
+        return command
+
+    @staticmethod
+    def _route_command(prefix: Optional[str] = None) -> str:
+        """
+        Build 'show route': a network shows it and its more specifics, a bare address its best match.
+
+        :raises ValueError: If prefix is not an IPv4 address or network.
+        """
+        if not prefix:
+            return "show route"
+        if '/' not in prefix:
+            return f"show route {ipaddress.IPv4Address(prefix)}"
+        return f"show route {ipaddress.IPv4Network(prefix, strict=False)} longer"
+
+    @staticmethod
+    def get_interfaces(ip: str, interface: Optional[str] = None, pattern: Optional[str] = None):
+        """
+        Get the interface summary of a Juniper device, filtered on the device.
+        :param ip: IP address of the device.
+        :param interface: Optional interface name; only that interface (and its units) is read.
+        :param pattern: Optional regex the lines must match, applied with '| match'.
+        :return: Interface summary as a string.
+        """
+        try:
+            command = JuniperConnection._interfaces_command(interface, pattern)
+        except ValueError as e:
+            return f"Error: {e}"
+        return JuniperConnection._query(ip, command, "interface information")
+
+    @staticmethod
+    def get_arp_table(ip: str, address: Optional[str] = None, mac: Optional[str] = None, interface: Optional[str] = None):
+        """
+        Get the ARP table of a Juniper device, filtered on the device.
+        :param ip: IP address of the device.
+        :param address: Optional IPv4 address to look up.
+        :param mac: Optional MAC address to look up, in any notation.
+        :param interface: Optional interface whose entries are returned.
+        :return: ARP table as a string.
+        """
+        try:
+            command = JuniperConnection._arp_command(address, mac, interface)
+        except ValueError as e:
+            return f"Error: {e}"
+        return JuniperConnection._query(ip, command, "ARP table")
+
+    @staticmethod
+    def get_route_table(ip: str, prefix: Optional[str] = None):
+        """
+        Get the routing table of a Juniper device, optionally only for prefix.
+        :param ip: IP address of the device.
+        :param prefix: Optional IPv4 network (CIDR) or address to look up.
+        :return: Routing table as a string.
+        """
+        try:
+            command = JuniperConnection._route_command(prefix)
+        except ValueError as e:
+            return f"Error: {e}"
+        return JuniperConnection._query(ip, command, "routing table")
+
+    @staticmethod
+    def get_logs(ip: str, pattern: Optional[str] = None):
+        """
+        Get the messages log of a Juniper device, filtered on the device.
+        :param ip: IP address of the device.
+        :param pattern: Optional regex the lines must match, e.g. an interface or a timestamp such as "Oct 17 1[0-2]:".
+        :return: Log lines as a string.
+        """
+        try:
+            command = f"show log messages{junos_match(pattern)}"
+        except ValueError as e:
+            return f"Error: {e}"
+        return JuniperConnection._query(ip, command, "logs")
+
     @staticmethod
     def _get_version(connection):
         """
@@ -64,7 +211,7 @@ class JuniperConnection:
         :param connection: Netmiko connection object.
         :return: Junos version as a string.
         """
-        version = connection.send_command_timing('show version', strip_prompt=False, strip_command=False)
+        version = JuniperConnection._send(connection, 'show version')
         lines = version.splitlines()
         for line in lines:
             if "Model" in line:
@@ -94,14 +241,14 @@ class JuniperConnection:
         :return: True if the device is an EX4300, False otherwise.
         """
 
-        outputconfig = connection.send_command_timing(f' show configuration | match {service} | display set ', strip_prompt=False, strip_command=False)  
+        outputconfig = JuniperConnection._send(connection, f' show configuration | match {service} | display set ')  
         result = ""
         result += outputconfig
         patter_vlan = r'unit (\d+)'
         vlan_raw = re.search(patter_vlan, outputconfig)
         if vlan_raw:
             vlan = vlan_raw[0].strip("unit").strip()
-            result += connection.send_command_timing(f'show ethernet-switching table | match {vlan}', strip_prompt=False, strip_command=False)
+            result += JuniperConnection._send(connection, f'show ethernet-switching table | match {vlan}')
         return result
 
     @staticmethod
@@ -128,7 +275,7 @@ class JuniperConnection:
         :return: True if the service is present in the L2 circuit configuration, False otherwise.
         """
 
-        result = connection.send_command_timing(f'show l2circuit connections neighbor {service} summary', strip_prompt=False, strip_command=False)
+        result = JuniperConnection._send(connection, f'show l2circuit connections neighbor {service} summary')
         if "No L2 circuit connections" in result:
             return f"Service {service} not found in L2 circuit configuration."
         else:
@@ -172,14 +319,14 @@ class JuniperConnection:
         :return: True if the service is present in the IRB configuration, False otherwise.
         """
         patter_ip = r'address (\d+\.\d+\.\d+\.\d+)'
-        result = connection.send_command_timing(f'show configuration interfaces irb | match {service}', strip_prompt=False, strip_command=False)
+        result = JuniperConnection._send(connection, f'show configuration interfaces irb | match {service}')
         ip_irb = re.findall(patter_ip, result)
         if ip_irb:
             ip_irb_mais = ipaddress.IPv4Address(ip_irb[0]) + 1
-            ping = connection.send_command_timing(f'ping {ip_irb_mais} rapid count 5 do-not-fragment', strip_prompt=False, strip_command=False)
+            ping = JuniperConnection._send(connection, f'ping {ip_irb_mais} rapid count 5 do-not-fragment')
             recei = JuniperConnection._get_received_ping(ping)
             if recei > 0:
-                ping += connection.send_command_timing(f'ping {ip_irb_mais} rapid count 1000 size 1472', strip_prompt=False, strip_command=False)
+                ping += JuniperConnection._send(connection, f'ping {ip_irb_mais} rapid count 1000 size 1472', read_timeout=120)
             result += ping
             return result
         else:
@@ -210,7 +357,7 @@ class JuniperConnection:
         :return: True if the service is present in the BGP summary, False otherwise.
         """
         
-        result = connection.send_command_timing(f'show bgp summary | match {service}', strip_prompt=False, strip_command=False)
+        result = JuniperConnection._send(connection, f'show bgp summary | match {service}')
         
     @staticmethod
     def is_vlan_service(service, config):
@@ -235,7 +382,7 @@ class JuniperConnection:
         :return: True if the service is present in the VLAN configuration, False otherwise.
         """
         result = " -------------- Result show bridge mac-table vlan-id ---------------\n"
-        result += connection.send_command_timing(f'show bridge mac-table vlan-id {vlan_id}', strip_prompt=False, strip_command=False)
+        result += JuniperConnection._send(connection, f'show bridge mac-table vlan-id {vlan_id}')
         if result:
             return result
         else:
@@ -249,7 +396,7 @@ class JuniperConnection:
         :param instance: The VPLS instance to check.
         :return: The status of the VPLS instance as a string.
         """
-        result = connection.send_command_timing(f'show vpls connections instance VPLS_{service} | last 13', strip_prompt=False, strip_command=False)
+        result = JuniperConnection._send(connection, f'show vpls connections instance VPLS_{service} | last 13')
         if "No VPLS connections" in result:
             return f"VPLS instance {service} not found."
         else:
@@ -264,11 +411,11 @@ class JuniperConnection:
         :return: A string containing the interfaces and their configurations.
         """
         connection = JuniperConnection._connection(ip)
-        version = JuniperConnection._get_version(connection)
         if connection is None:
             return "Connection to Juniper device failed."
+        version = JuniperConnection._get_version(connection)
         result = ""
-        result += connection.send_command_timing(f'show interface descr | match {service}', strip_prompt=False, strip_command=False) 
+        result += JuniperConnection._send(connection, f'show interface descr | match {service}') 
         
         
 
@@ -277,14 +424,14 @@ class JuniperConnection:
             
         else:
             result += " -------------- Result show config  ----------------\n"
-            outputconfig = connection.send_command_timing(f'show configuration | match {service} | display set' , strip_prompt=False, strip_command=False)
+            outputconfig = JuniperConnection._send(connection, f'show configuration | match {service} | display set' )
             result += outputconfig
 
             bgp_neighbor = JuniperConnection._is_bgp_service(service, outputconfig)
             if bgp_neighbor:
                 result += " -------------- Result bgp found ---------------\n"
                 neighbor = bgp_neighbor[0]
-                result += connection.send_command_timing(f'show bgp summary | match {neighbor}', strip_prompt=False, strip_command=False)
+                result += JuniperConnection._send(connection, f'show bgp summary | match {neighbor}')
             irb = JuniperConnection._is_irb_service(service, outputconfig)
             if irb:
                 result += " -------------- Result irb found ---------------\n"
@@ -307,6 +454,7 @@ class JuniperConnection:
                 vlan = vlan[0].strip("unit").strip()
                 result += JuniperConnection.check_vlan(connection, vlan)
 
+        connection.disconnect()
         return result
             
             
@@ -0,0 +1,333 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Literal
+
+import asyncssh
+
+from infra.config import MikrotikConfig
+from infra.deadline import Deadline
+from infra.logger.service_log import Logger
+from src.custom_ssh.async_pool import async_ssh_pool
+from src.custom_ssh.filters import routeros_where
+from src.mikrotik.connection import (
+    ANSI_ESCAPE,
+    BATCH_MARKER,
+    CONFIG_STATUS_COMMANDS,
+    CPE_STATUS_COMMANDS,
+    ROUTEROS_PROMPT,
+    MikrotikConnection,
+)
+
+logger = Logger.get_logger("mikrotik")
+
+
+class AsyncMikrotikConnection:
+    """
+    asyncio-native Mikrotik driver built on asyncssh.
+
+    Exposes the same command surface as MikrotikConnection, but every getter is a coroutine
+    and sessions come from the shared AsyncSSHSessionPool, so many devices can be checked
+    concurrently on one event loop. Output formatting matches the paramiko driver.
+    """
+
+    @staticmethod
+    @asynccontextmanager
+    async def _session(conn_type: Literal["cpe", "pop"], ip: str, timeout: int = 10):
+        """
+        Lease a pooled asyncssh connection to the Mikrotik device.
+
+        Args:
+            conn_type (str): Connection type, either 'cpe' or 'pop'.
+            ip (str): IP address of the Mikrotik device.
+            timeout (int): Timeout in seconds for opening a new connection.
+
+        Raises:
+            ValueError: If conn_type is invalid or ip is not provided.
+            ConnectionError: If connection to the Mikrotik device fails.
+        """
+        if not ip:
+            logger.error("IP address must be provided for Mikrotik connection.")
+            raise ValueError("IP address must be provided.")
+        username, password = MikrotikConnection._credentials(conn_type)
+        port = MikrotikConfig.get_mikrotik_port()
+        async with async_ssh_pool.lease(ip, port, conn_type, username, password, connect_timeout=timeout) as connection:
+            yield connection
+
+    @staticmethod
+    async def _exec(type, ip, command: str, timeout: Optional[float] = None) -> tuple:
+        """
+        Run a single command on its own channel and return (stdout, stderr).
+        """
+        async with AsyncMikrotikConnection._session(type, ip) as connection:
+            result = await connection.run(command, check=False, timeout=Deadline.timeout(timeout))
+        return result.stdout or "", result.stderr or ""
+
+    @staticmethod
+    async def _read_shell_until(process: asyncssh.SSHClientProcess, pattern: re.Pattern, deadline: float) -> str:
+        """
+        Read from an interactive process until pattern matches the cleaned output or the deadline passes.
+        """
+        buffer = ""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(process.stdout.read(65535), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            buffer += chunk
+            cleaned = ANSI_ESCAPE.sub('', buffer).replace('\r', '')
+            if pattern.search(cleaned):
+                return cleaned
+        logger.warning("Interactive RouterOS channel closed or timed out before the expected output.")
+        return ANSI_ESCAPE.sub('', buffer).replace('\r', '')
+
+    @staticmethod
+    async def run_batch(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, commands: List[str] = [], timeout: int = 60) -> List[Optional[str]]:
+        """
+        Run several RouterOS commands over a single interactive channel.
+
+        See MikrotikConnection.run_batch for the sentinel marker protocol.
+
+        Returns:
+            list: The output of each command, in the same order as commands; None for commands
+            that did not complete before the deadline.
+        """
+        if not commands:
+            return []
+        deadline = time.monotonic() + Deadline.timeout(timeout)
+        async with AsyncMikrotikConnection._session(type, ip) as connection:
+            process = await connection.create_process(term_type='dumb', term_size=(511, 9999))
+            try:
+                await AsyncMikrotikConnection._read_shell_until(process, ROUTEROS_PROMPT, deadline)
+
+                script = ""
+                for index, command in enumerate(commands):
+                    marker = BATCH_MARKER.format(index)
+                    script += f"{command}\r\n"
+                    script += f':put ("{marker[:6]}" . "{marker[6:]}")\r\n'
+                logger.info(f"Running batch of {len(commands)} commands on {ip}")
+                process.stdin.write(script)
+
+                last_marker = re.compile(rf'^{BATCH_MARKER.format(len(commands) - 1)}\s*$', re.M)
+                output = await AsyncMikrotikConnection._read_shell_until(process, last_marker, deadline)
+            finally:
+                process.close()
+        return MikrotikConnection._split_batch_output(output, len(commands))
+
+    @staticmethod
+    async def get_cpe_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> dict:
+        """
+        Collect everything CheckCpe needs from a Mikrotik CPE in a single batched round trip.
+        """
+        outputs = await AsyncMikrotikConnection.run_batch(type, ip, CPE_STATUS_COMMANDS)
+        return MikrotikConnection._format_cpe_status(outputs)
+
+    @staticmethod
+    async def _simple_getter(type, ip, command: str, empty_message: str, label: str) -> str:
+        """
+        Run command and return its output, an error message, or empty_message when nothing is printed.
+        """
+        output, error = await AsyncMikrotikConnection._exec(type, ip, command)
+        if error:
+            logger.error(f"Error fetching {label}: {error}")
+            return f"Error: {error}"
+        return output.strip() if output else empty_message
+
+    @staticmethod
+    async def get_config_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> dict:
+        """
+        Collect running config, IP addresses and firewall rules concurrently, one channel each.
+        """
+        outputs = await asyncio.gather(*(
+            AsyncMikrotikConnection._simple_getter(type, ip, command, empty, key) for key, command, empty in CONFIG_STATUS_COMMANDS
+        ))
+        return {key: output for (key, _, _), output in zip(CONFIG_STATUS_COMMANDS, outputs)}
+
+    @staticmethod
+    async def get_system_resource(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+        """
+        Get system resource information from the Mikrotik device.
+        """
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, "/system resource print", "No system resource information found.", "system resource")
+
+    @staticmethod
+    async def get_allinterface_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None, interface: Optional[str] = None) -> str:
+        """
+        Get the status of interfaces on the Mikrotik device, optionally only those whose name matches interface.
+        """
+        try:
+            command = "/interface print" + routeros_where(name=interface)
+        except ValueError as e:
+            return f"Error: {e}"
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, command, "No interfaces found.", "interface status")
+
+    @staticmethod
+    async def get_customer_interface_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+        """
+        Get the status of customer interfaces on the Mikrotik device.
+        """
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, '/interface print where comments="Customer Port"', "No customer interfaces found.", "customer interface status")
+
+    @staticmethod
+    async def get_ip_address(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None,
+                             interface: Optional[str] = None, address: Optional[str] = None) -> str:
+        """
+        Get the IP addresses of the Mikrotik device, optionally filtered on the device by interface and address.
+        """
+        try:
+            command = "/ip address print" + routeros_where(interface=interface, address=address)
+        except ValueError as e:
+            return f"Error: {e}"
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, command, "No IP addresses found.", "IP addresses")
+
+    @staticmethod
+    async def get_firewall_filter(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None,
+                                  chain: Optional[str] = None, interface: Optional[str] = None) -> str:
+        """
+        Get the firewall filter rules on the Mikrotik device, optionally filtered on the device by chain and in-interface.
+        """
+        try:
+            command = "/ip firewall filter print" + routeros_where(chain=chain, in_interface=interface)
+        except ValueError as e:
+            return f"Error: {e}"
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, command, "No firewall filter rules found.", "firewall filter rules")
+
+    @staticmethod
+    async def get_running_config(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+        """
+        Get the running configuration of the Mikrotik device.
+        """
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, "/export", "No running configuration found.", "running configuration")
+
+    @staticmethod
+    async def get_external_macs_bridge_learned(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None, service: Optional[str] = None) -> str:
+        """
+        Get the external MAC addresses learned on the bridge.
+        """
+        if type == 'cpe':
+            command = 'interface bridge host print terse where dynamic=yes local=no'
+        else:
+            command = f'/interface bridge host print terse where bridge~"{service}" dynamic=yes local=no'
+        output, error = await AsyncMikrotikConnection._exec(type, ip, command)
+        logger.info(f"External MACs learned {type.upper()}: {output}")
+        return output.strip() if output else "No external MACs found."
+
+    @staticmethod
+    async def get_traffic_statistics(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+        """
+        Get traffic statistics for WAN and Customer interfaces.
+        """
+        results = ""
+        for label in ("WAN", "Customer"):
+            output, error = await AsyncMikrotikConnection._exec(
+                type, ip, f'/interface monitor-traffic [find comment~"{label}"] once')
+            logger.info(f"{label} Traffic Statistics: {output}")
+            if error:
+                results += f"Error in {label} traffic statistics: {error}\n"
+            else:
+                results += f"{label} Traffic Statistics:\n{output.strip()}\n"
+        return results
+
+    @staticmethod
+    async def extented_ping(ip, type , src , dst, count=10, interval=0.1, size=1472) -> Optional[str]:
+        """
+        Perform an extended ping and return the RouterOS summary line containing packet-loss.
+        """
+        command = f'/ping {dst} src-address={src} count={count} size={size} interval={interval}'
+        logger.info(f"Executing command: {command}")
+        output, error = await AsyncMikrotikConnection._exec(type, ip, command)
+        logger.info(f"Ping output: {output}")
+        for line in reversed(output.splitlines()):
+            if "packet-loss" in line:
+                return line.strip()
+        return None
+
+    @staticmethod
+    async def _ping_tunnel(ip, type, output: str, label: str, size_extended: int) -> str:
+        """
+        Ping the far end of a POP tunnel found in output, mirroring the EoIP/GRE checks of the paramiko driver.
+        """
+        local_address = re.search(r'local-address=(\d+\.\d+\.\d+\.\d+)', output)
+        local_address = local_address.group(1) if local_address else None
+        remote_address = re.search(r'remote-address=(\d+\.\d+\.\d+\.\d+)', output)
+        remote_address = remote_address.group(1) if remote_address else None
+        if remote_address is None or local_address is None:
+            return output
+
+        ping = await AsyncMikrotikConnection.extented_ping(ip, type, local_address, remote_address, count=5, interval=1, size=1472)
+        small_ping = MikrotikConnection.IsPingSucess(ping or "")
+        logger.info(f"Ping result: {ping}")
+        if small_ping == True:
+            output += f"ping to {label} remote address with 5 repetions performed clean: " + remote_address + "\n"
+            output += ping
+            ping_extended = await AsyncMikrotikConnection.extented_ping(ip, type, local_address, remote_address, count=1000, interval=0.1, size=size_extended)
+            logger.info(f"Extended ping result: {ping_extended}")
+            output += f"extended ping to {label} remote address\n"
+            output += "Extended ping not performed well\n" if not ping_extended else "Extended ping performed well\n"
+            output += ping_extended or ""
+        else:
+            output += f"ping to {label} remote address with 5 repetions performed with errors: " + remote_address + "\n"
+            output += ping or ""
+            traceroute, _ = await AsyncMikrotikConnection._exec(
+                type, ip, f'/tool traceroute {remote_address} src-address={local_address} max-hops=10 duration=2 timeout=2')
+            output += traceroute
+        return output
+
+    @staticmethod
+    async def get_eoip_interfaces(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None, service: Optional[str] = None) -> str:
+        """
+        Get the EoIP interfaces, pinging the tunnel far end on POP devices.
+        """
+        if type == 'pop':
+            output, error = await AsyncMikrotikConnection._exec(type, ip, f'/interface eoip print where name~"{service}"')
+            if error:
+                logger.error(f"Error fetching EoIP interfaces: {error}")
+                return f"Error: {error}"
+            output = await AsyncMikrotikConnection._ping_tunnel(ip, type, output, "eoip", 1400)
+            return output.strip() if output else "No EoIP interfaces found."
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, "/interface eoip print", "No EoIP interfaces found.", "EoIP interfaces")
+
+    @staticmethod
+    async def get_gre_interfaces(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None, service: Optional[str] = None) -> str:
+        """
+        Get the GRE interfaces, pinging the tunnel far end on POP devices.
+        """
+        if type == 'pop':
+            output, error = await AsyncMikrotikConnection._exec(type, ip, f'/interface gre print where name~"{service}"')
+            if error:
+                return f"Error: {error}"
+            output = await AsyncMikrotikConnection._ping_tunnel(ip, type, output, "gre", 1472)
+            return output.strip() if output else "No GRE interfaces found."
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, "/interface gre print", "No GRE interfaces found.", "GRE interfaces")
+
+    @staticmethod
+    async def get_l2tp_interfaces(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None, service: Optional[str] = None) -> str:
+        """
+        Get the L2TP interfaces, pinging the CPE client address on POP devices.
+        """
+        if type == 'pop':
+            output, error = await AsyncMikrotikConnection._exec(type, ip, f'interface l2tp-server print where name~"{service}"')
+            if error:
+                return f"Error: {error}"
+            client_address = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+            if client_address:
+                ping, _ = await AsyncMikrotikConnection._exec(type, ip, f'/ping {client_address.group(1)} count=5 do-not-fragment')
+                output += "ping to cpe client address: " + client_address.group(1) + "\n"
+                output += ping
+            return output.strip() if output else "No L2TP interfaces found."
+        return await AsyncMikrotikConnection._simple_getter(
+            type, ip, "/interface l2tp print", "No L2TP interfaces found.", "L2TP interfaces")
@@ -1,8 +1,13 @@
-from typing import Optional, Literal
+from typing import Optional, Literal, List
+from contextlib import contextmanager
 import paramiko
 from infra.config import MikrotikConfig
+from infra.deadline import Deadline, DeadlineExceeded
 from infra.logger.service_log import Logger
-from typing import Optional
+from src.custom_ssh.filters import routeros_where
+from src.custom_ssh.pool import ssh_pool
+from src.custom_ssh.multiplex import run_on_channels
+from src.custom_ssh.reader import ANSI_ESCAPE, SummaryLineParser, read_until_exit, read_until_pattern, stream_exec
 import re
 import time
 CPE_USER = MikrotikConfig.get_mikrotik_username()
@@ -12,34 +17,45 @@ POP_PASSWORD = MikrotikConfig.get_mikrotik_pop_password()
 
 logger = Logger.get_logger("mikrotik")
 
+# RouterOS prompt, e.g. "[admin@CPE-01] >" or "[admin@CPE-01] /interface>"
+ROUTEROS_PROMPT = re.compile(r'^\[[^\]\r\n]+@[^\]\r\n]+\][^>\r\n]*>.*$', re.M)
+BATCH_MARKER = "__IGBOT_END_{}__"
+# Reported for a batched command whose marker never arrived, so a cut-off read is not mistaken for empty output
+BATCH_INCOMPLETE = "Error: command did not complete before the batch timed out or the shell closed."
+
+# Everything CheckCpe reads from a Mikrotik CPE, in the order _format_cpe_status unpacks it
+CPE_STATUS_COMMANDS = [
+    "/system resource print",
+    "/interface print",
+    "/interface eoip print",
+    "/interface l2tp print",
+    "/interface gre print",
+    '/interface print where comments="Customer Port"',
+    "/interface bridge host print terse where dynamic=yes local=no",
+    '/interface monitor-traffic [find comment~"WAN"] once',
+    '/interface monitor-traffic [find comment~"Customer"] once',
+]
+
+# Read-only commands CheckConfigCpe runs on parallel channels: (key, command, empty message)
+CONFIG_STATUS_COMMANDS = [
+    ("config", "/export", "No running configuration found."),
+    ("ips", "/ip address print", "No IP addresses found."),
+    ("firewall", "/ip firewall filter print", "No firewall filter rules found."),
+]
+
 
 class MikrotikConnection:
     @staticmethod
-    def _connect(
-        conn_type: Literal["cpe", "pop"],
-        ip: str,
-        timeout: int = 10
-    ) -> paramiko.SSHClient:
+    def _credentials(conn_type: Literal["cpe", "pop"]) -> tuple:
         """
-        Connect to Mikrotik RouterOS using SSH.
+        Return the (username, password) pair configured for the connection type.
 
         Args:
             conn_type (str): Connection type, either 'cpe' or 'pop'.
-            ip (str): IP address of the Mikrotik device.
-            timeout (int): Timeout in seconds for the connection.
-
-        Returns:
-            paramiko.SSHClient: An SSH client connected to the Mikrotik device.
 
         Raises:
-            ValueError: If conn_type is invalid or ip is not provided.
-            ConnectionError: If connection to the Mikrotik device fails.
+            ValueError: If conn_type is invalid or the credentials are not set.
         """
-
-        if not ip:
-            logger.error("IP address must be provided for Mikrotik connection.")
-            raise ValueError("IP address must be provided.")
-
         # Escolhe credenciais dependendo do tipo
         if conn_type == "cpe":
             username = MikrotikConfig.get_mikrotik_username()
@@ -62,6 +78,35 @@ class MikrotikConnection:
         else:
             logger.error(f"Invalid connection type: {conn_type}. Must be 'cpe' or 'pop'.")
             raise ValueError(f"Invalid connection type: {conn_type}. Must be 'cpe' or 'pop'.")
+        return username, password
+
+    @staticmethod
+    def _connect(
+        conn_type: Literal["cpe", "pop"],
+        ip: str,
+        timeout: int = 10
+    ) -> paramiko.SSHClient:
+        """
+        Connect to Mikrotik RouterOS using SSH.
+
+        Args:
+            conn_type (str): Connection type, either 'cpe' or 'pop'.
+            ip (str): IP address of the Mikrotik device.
+            timeout (int): Timeout in seconds for the connection.
+
+        Returns:
+            paramiko.SSHClient: An SSH client connected to the Mikrotik device.
+
+        Raises:
+            ValueError: If conn_type is invalid or ip is not provided.
+            ConnectionError: If connection to the Mikrotik device fails.
+        """
+
+        if not ip:
+            logger.error("IP address must be provided for Mikrotik connection.")
+            raise ValueError("IP address must be provided.")
+
+        username, password = MikrotikConnection._credentials(conn_type)
 
         ssh_client = paramiko.SSHClient()
         ssh_client.load_system_host_keys()
@@ -76,7 +121,9 @@ class MikrotikConnection:
                 port=MikrotikConfig.get_mikrotik_port(),
                 username=username,
                 password=password,
-                timeout=timeout,
+                timeout=Deadline.timeout(timeout),
+                banner_timeout=Deadline.timeout(timeout),
+                auth_timeout=Deadline.timeout(timeout),
                 look_for_keys=False,
                 allow_agent=False
             )
@@ -91,13 +138,45 @@ class MikrotikConnection:
         return ssh_client
 
     @staticmethod
-    def run_command(client, command):
-        stdout = client.exec_command("/n")
+    @contextmanager
+    def _session(conn_type: Literal["cpe", "pop"], ip: str):
+        """
+        Lease an authenticated SSH session to the Mikrotik device from the shared pool.
+
+        The session is handed back to the pool when the block exits, so it must not be closed by the caller.
+
+        Args:
+            conn_type (str): Connection type, either 'cpe' or 'pop'.
+            ip (str): IP address of the Mikrotik device.
+
+        Yields:
+            paramiko.SSHClient: A pooled SSH client connected to the Mikrotik device.
+        """
+        port = MikrotikConfig.get_mikrotik_port()
+        with ssh_pool.lease(ip, port, conn_type, lambda: MikrotikConnection._connect(conn_type, ip)) as ssh_client:
+            yield ssh_client
+
+    @staticmethod
+    def run_command(client, command, timeout: int = 30):
+        """
+        Run a command on an open session and return its output prefixed by the command.
+
+        Completion is detected from the channel exit status, so the call returns as soon as the
+        device finishes (e.g. a 5-count ping or a duration-bound traceroute) instead of sleeping.
+
+        Args:
+            client (paramiko.SSHClient): An open SSH session.
+            command (str): RouterOS command to run.
+            timeout (int): Per-command deadline in seconds; the channel is closed when it expires.
+        """
         stdin, stdout, stderr = client.exec_command(command)
-        time.sleep(3)
+        channel = stdout.channel
         result = None
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
+        output = read_until_exit(channel, timeout=timeout)
+        error = channel.recv_stderr(65535).decode('utf-8', errors='ignore') if channel.recv_stderr_ready() else ""
+        if not channel.exit_status_ready():
+            logger.warning(f"Command '{command}' did not finish within {timeout}s.")
+            channel.close()
         if output.strip():
             result = f"{command}"
             result += output
@@ -105,6 +184,81 @@ class MikrotikConnection:
             result = f"error: {error}"
         return result
 
+    @staticmethod
+    def _read_shell_until(channel: paramiko.Channel, pattern: re.Pattern, deadline: float) -> str:
+        """
+        Read from an interactive channel until pattern matches the cleaned output or the deadline passes.
+
+        Returns:
+            str: Everything read so far, with ANSI escapes and carriage returns removed.
+        """
+        return read_until_pattern(channel, pattern, deadline)
+
+    @staticmethod
+    def _split_batch_output(output: str, count: int) -> List[Optional[str]]:
+        """
+        Split the shell transcript of run_batch into one output per command using the sentinel markers.
+
+        A command whose marker never arrived gets None, which is different from "" (completed, no output).
+        """
+        results = []
+        position = 0
+        for index in range(count):
+            marker = re.compile(rf'^{BATCH_MARKER.format(index)}\s*$', re.M).search(output, position)
+            if not marker:
+                results.append(None)
+                continue
+            segment = output[position:marker.start()]
+            position = marker.end()
+            lines = [line for line in segment.splitlines() if not ROUTEROS_PROMPT.match(line)]
+            results.append("\n".join(lines).strip())
+        return results
+
+    @staticmethod
+    def run_batch(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, commands: List[str] = [], timeout: int = 60) -> List[Optional[str]]:
+        """
+        Run several RouterOS commands over a single interactive channel.
+
+        Each command is followed by a `:put` of a sentinel marker. The marker is built by string
+        concatenation so the echoed command line never matches the printed marker, which lets the
+        transcript be split back into one output per command.
+
+        Args:
+            type (str): Connection type, either 'cpe' or 'pop'.
+            ip (str): IP address of the Mikrotik device.
+            commands (list): RouterOS commands to run, in order.
+            timeout (int): Overall deadline in seconds for the whole batch.
+
+        Returns:
+            list: The output of each command, in the same order as commands. Commands that did not
+            complete before the deadline get None.
+        """
+        if not commands:
+            return []
+        deadline = time.monotonic() + Deadline.timeout(timeout)
+        with MikrotikConnection._session(type, ip) as ssh_client:
+            channel = ssh_client.get_transport().open_session()
+            try:
+                # Wide and tall terminal so RouterOS neither wraps lines nor paginates print output
+                channel.get_pty(term='dumb', width=511, height=9999)
+                channel.invoke_shell()
+                channel.settimeout(1)
+                MikrotikConnection._read_shell_until(channel, ROUTEROS_PROMPT, deadline)
+
+                script = ""
+                for index, command in enumerate(commands):
+                    marker = BATCH_MARKER.format(index)
+                    script += f"{command}\r\n"
+                    script += f':put ("{marker[:6]}" . "{marker[6:]}")\r\n'
+                logger.info(f"Running batch of {len(commands)} commands on {ip}")
+                channel.sendall(script)
+
+                last_marker = re.compile(rf'^{BATCH_MARKER.format(len(commands) - 1)}\s*$', re.M)
+                output = MikrotikConnection._read_shell_until(channel, last_marker, deadline)
+            finally:
+                channel.close()
+        return MikrotikConnection._split_batch_output(output, len(commands))
+
     @staticmethod
     def get_system_resource(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
         """
@@ -113,30 +267,34 @@ class MikrotikConnection:
         Returns:
             str: The output of the system resource command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        stdin, stdout, stderr = ssh_client.exec_command("/system resource print")
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        ssh_client.close()
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command("/system resource print", timeout=Deadline.timeout())
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
         if error:
             return f"Error: {error}"
         
         return output.strip() if output else "No system resource information found."
 
     @staticmethod
-    def get_allinterface_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+    def get_allinterface_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None, interface: Optional[str] = None) -> str:
         """
         Get the status of interfaces on the Mikrotik device.
+
+        Args:
+            interface (str): Optional regex on the interface name, applied on the device with 'where'.
         
         Returns:
             str: The output of the interface status command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        stdin, stdout, stderr = ssh_client.exec_command("/interface print")
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        
-        ssh_client.close()
+        try:
+            command = "/interface print" + routeros_where(name=interface)
+        except ValueError as e:
+            return f"Error: {e}"
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command(command, timeout=Deadline.timeout())
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
         
         if error:
             logger.error(f"Error fetching interface status: {error}")
@@ -152,44 +310,48 @@ class MikrotikConnection:
         Returns:
             str: The output of the EoIP interfaces command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        if type == 'cpe':
-            logger.info("Fetching EoIP interfaces for CPE")
-            stdin, stdout, stderr = ssh_client.exec_command("/interface eoip print")
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            ssh_client.close()
-        
-        elif type == 'pop':
-            logger.info(f"Fetching EoIP interfaces for POP with service {service}")
-            stdin, stdout, stderr = ssh_client.exec_command(f'/interface eoip print where name~"{service}"')
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            local_address = re.search(r'local-address=(\d+\.\d+\.\d+\.\d+)', output)
-            local_address = local_address.group(1) if local_address else None 
-            remote_address = re.search(r'remote-address=(\d+\.\d+\.\d+\.\d+)', output)
-            remote_address = remote_address.group(1) if remote_address else None
-            if remote_address != None and local_address != None:
-                output += f"\nLocal Address: {local_address}\nRemote Address: {remote_address}"
-                ping = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=5, interval=1, size=1472)
-                small_ping = MikrotikConnection.IsPingSucess(ping)
-                logger.info(f"Ping result: {ping}")
-                if small_ping == True:
-                    logger.info(f"Ping to remote address {remote_address} with 5 repetitions performed cleanly.")
-                    output += "ping to remote address with 5 repetions performed clean: " + remote_address + "\n"
-                    output += ping
-                    ping_extented = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=1000, interval=0.1,size=1400)
-                    logger.info(f"Extended ping result: {ping_extented}")
-                    output += "extended ping to eoip remote address\n"
-                    output += "Extended ping not performed well\n" if ping_extented == False else "Extended ping performed well\n"
-                    output += ping_extented
-                elif small_ping == False:
-                    logger.warning(f"Ping to remote address {remote_address} with 5 repetitions performed with errors.")
-                    output += "ping to remote address with 5 repetions performed with errors: " + remote_address + "\n"
-                    traceroute = MikrotikConnection.run_command(ssh_client, f'/tool traceroute {remote_address} src-address={local_address} max-hops=10 duration=2 timeout=2')
-                    output += traceroute
-                return output
-            ssh_client.close()
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            if type == 'cpe':
+                logger.info("Fetching EoIP interfaces for CPE")
+                stdin, stdout, stderr = ssh_client.exec_command("/interface eoip print", timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+        
+            elif type == 'pop':
+                logger.info(f"Fetching EoIP interfaces for POP with service {service}")
+                stdin, stdout, stderr = ssh_client.exec_command(f'/interface eoip print where name~"{service}"', timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+                local_address = re.search(r'local-address=(\d+\.\d+\.\d+\.\d+)', output)
+                local_address = local_address.group(1) if local_address else None 
+                remote_address = re.search(r'remote-address=(\d+\.\d+\.\d+\.\d+)', output)
+                remote_address = remote_address.group(1) if remote_address else None
+                if remote_address != None and local_address != None:
+                    output += f"\nLocal Address: {local_address}\nRemote Address: {remote_address}"
+                    try:
+                        ping = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=5, interval=1, size=1472, ssh_client=ssh_client)
+                        small_ping = MikrotikConnection.IsPingSucess(ping)
+                        logger.info(f"Ping result: {ping}")
+                        if small_ping == True:
+                            logger.info(f"Ping to remote address {remote_address} with 5 repetitions performed cleanly.")
+                            output += "ping to remote address with 5 repetions performed clean: " + remote_address + "\n"
+                            output += ping
+                            ping_extented = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=1000, interval=0.1,size=1400, ssh_client=ssh_client)
+                            logger.info(f"Extended ping result: {ping_extented}")
+                            output += "extended ping to eoip remote address\n"
+                            output += "Extended ping performed well\n" if MikrotikConnection.IsPingSucess(ping_extented) == True else "Extended ping not performed well\n"
+                            output += ping_extented
+                        elif small_ping == False:
+                            logger.warning(f"Ping to remote address {remote_address} with 5 repetitions performed with errors.")
+                            output += "ping to remote address with 5 repetions performed with errors: " + remote_address + "\n"
+                            traceroute = MikrotikConnection.run_command(ssh_client, f'/tool traceroute {remote_address} src-address={local_address} max-hops=10 duration=2 timeout=2')
+                            output += traceroute
+                        else:
+                            output += f"ping to remote address {remote_address}: {small_ping or 'no summary'}\n"
+                            output += ping
+                    except DeadlineExceeded:
+                        output += "\nTool deadline reached; remaining EoIP checks skipped.\n"
+                    return output
         if error:
             logger.error(f"Error fetching EoIP interfaces: {error}")
             return f"Error: {error}"
@@ -203,25 +365,24 @@ class MikrotikConnection:
         Returns:
             str: The output of the L2TP interfaces command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        if type == 'cpe':
-            logger.info("Fetching L2TP interfaces for CPE")
-            stdin, stdout, stderr = ssh_client.exec_command("/interface l2tp print")
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-        elif type == 'pop':
-            logger.info(f"Fetching L2TP interfaces for POP with service {service}")
-            stdin, stdout, stderr = ssh_client.exec_command(f'interface l2tp-server print where name~"{service}"')
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            client_address = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
-            client_address = client_address.group(1) if client_address else None
-            if client_address != None:
-                cmd = f'/ping {client_address} count=5 do-not-fragment'
-                ping = MikrotikConnection.run_command(ssh_client, cmd)
-                output += "ping to cpe client address: " + client_address + "\n"
-                output += ping
-        ssh_client.close()
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            if type == 'cpe':
+                logger.info("Fetching L2TP interfaces for CPE")
+                stdin, stdout, stderr = ssh_client.exec_command("/interface l2tp print", timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+            elif type == 'pop':
+                logger.info(f"Fetching L2TP interfaces for POP with service {service}")
+                stdin, stdout, stderr = ssh_client.exec_command(f'interface l2tp-server print where name~"{service}"', timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+                client_address = re.search(r'(\d+\.\d+\.\d+\.\d+)', output)
+                client_address = client_address.group(1) if client_address else None
+                if client_address != None:
+                    cmd = f'/ping {client_address} count=5 do-not-fragment'
+                    ping = MikrotikConnection.run_command(ssh_client, cmd)
+                    output += "ping to cpe client address: " + client_address + "\n"
+                    output += ping
         if error:
             logger.error(f"Error fetching L2TP interfaces: {error}")
             return f"Error: {error}"
@@ -235,48 +396,48 @@ class MikrotikConnection:
         Returns:
             str: The output of the GRE interfaces command.
         """
-        if type == 'cpe':
-            logger.info("Fetching GRE interfaces for CPE")
-            ssh_client = MikrotikConnection._connect(type , ip )
-            stdin, stdout, stderr = ssh_client.exec_command("/interface gre print")
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            ssh_client.close()
-        elif type == 'pop':
-            logger.info(f"Fetching GRE interfaces for POP with service {service}")
-            ssh_client = MikrotikConnection._connect(type , ip )
-            stdin, stdout, stderr = ssh_client.exec_command(f'/interface gre print where name~"{service}"')
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            logger.info(f"GRE interfaces output: {output}")
-            local_address = re.search(r'local-address=(\d+\.\d+\.\d+\.\d+)', output)
-            logger.info(f"Local address: {local_address}")
-            local_address = local_address.group(1) if local_address else None
-            remote_address = re.search(r'remote-address=(\d+\.\d+\.\d+\.\d+)', output)
-            logger.info(f"Remote address: {remote_address}")
-            remote_address = remote_address.group(1) if remote_address else None
-            if remote_address != None and local_address != None:
-                ping = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=5, interval=1, size=1472)
-                ping_small = MikrotikConnection.IsPingSucess(ping)
-                logger.info(f"Ping result: {ping}")
-                if ping_small:
-                    logger.info(f"Ping to remote address {remote_address} with 5 repetitions performed cleanly.")
-                    output += "ping to gre remote address with 5 repetions performed clean: " + remote_address + "\n"
-                    output += ping
-                    ping_extended = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=1000, interval=0.1, size=1472)
-                    logger.info(f"Extended ping result: {ping_extended}")
-                    output += "extended ping to gre remote address\n"
-                    output += "Extended ping not performed well\n" if ping_extended == False else "Extended ping performed well\n"
-                    output += ping_extended
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            if type == 'cpe':
+                logger.info("Fetching GRE interfaces for CPE")
+                stdin, stdout, stderr = ssh_client.exec_command("/interface gre print", timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+            elif type == 'pop':
+                logger.info(f"Fetching GRE interfaces for POP with service {service}")
+                stdin, stdout, stderr = ssh_client.exec_command(f'/interface gre print where name~"{service}"', timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+                logger.info(f"GRE interfaces output: {output}")
+                local_address = re.search(r'local-address=(\d+\.\d+\.\d+\.\d+)', output)
+                logger.info(f"Local address: {local_address}")
+                local_address = local_address.group(1) if local_address else None
+                remote_address = re.search(r'remote-address=(\d+\.\d+\.\d+\.\d+)', output)
+                logger.info(f"Remote address: {remote_address}")
+                remote_address = remote_address.group(1) if remote_address else None
+                if remote_address != None and local_address != None:
+                    try:
+                        ping = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=5, interval=1, size=1472, ssh_client=ssh_client)
+                        ping_small = MikrotikConnection.IsPingSucess(ping)
+                        logger.info(f"Ping result: {ping}")
+                        if ping_small:
+                            logger.info(f"Ping to remote address {remote_address} with 5 repetitions performed cleanly.")
+                            output += "ping to gre remote address with 5 repetions performed clean: " + remote_address + "\n"
+                            output += ping
+                            ping_extended = MikrotikConnection.extented_ping(ip, type , local_address, remote_address, count=1000, interval=0.1, size=1472, ssh_client=ssh_client)
+                            logger.info(f"Extended ping result: {ping_extended}")
+                            output += "extended ping to gre remote address\n"
+                            output += "Extended ping performed well\n" if MikrotikConnection.IsPingSucess(ping_extended) == True else "Extended ping not performed well\n"
+                            output += ping_extended
 
-                else:
-                    logger.warning(f"Ping to remote address {remote_address} with 5 repetitions performed with errors.")
-                    output += "ping to gre remote address with 5 repetions performed with errors: " + remote_address + "\n"
-                    output += ping
-                    traceroute = MikrotikConnection.run_command(ssh_client, f'/tool traceroute {remote_address} src-address={local_address} max-hops=10 duration=2 timeout=2')
-                    logger.info(f"Traceroute result: {traceroute}")
-                    output += traceroute
-            ssh_client.close()
+                        else:
+                            logger.warning(f"Ping to remote address {remote_address} with 5 repetitions performed with errors.")
+                            output += "ping to gre remote address with 5 repetions performed with errors: " + remote_address + "\n"
+                            output += ping
+                            traceroute = MikrotikConnection.run_command(ssh_client, f'/tool traceroute {remote_address} src-address={local_address} max-hops=10 duration=2 timeout=2')
+                            logger.info(f"Traceroute result: {traceroute}")
+                            output += traceroute
+                    except DeadlineExceeded:
+                        output += "\nTool deadline reached; remaining GRE checks skipped.\n"
         if error:
             logger.error(f"Error fetching GRE interfaces: {error}")
             return f"Error: {error}"
@@ -291,12 +452,10 @@ class MikrotikConnection:
         Returns:
             str: The output of the customer interface status command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        stdin, stdout, stderr = ssh_client.exec_command('/interface print where comments="Customer Port"')
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        
-        ssh_client.close()
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command('/interface print where comments="Customer Port"', timeout=Deadline.timeout())
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
         
         if error:
             logger.error(f"Error fetching customer interface status: {error}")
@@ -312,23 +471,19 @@ class MikrotikConnection:
         Returns:
             str: The output of the command to get external MAC addresses.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        if type == 'cpe':
-            stdin, stdout, stderr = ssh_client.exec_command('interface bridge host print terse where dynamic=yes local=no')
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
-            logger.info(f"External MACs learned CPE: {output}")
-            return output.strip() if output else "No external MACs found."
-        elif type == 'pop':
-            stdin, stdout, stderr = ssh_client.exec_command(f'/interface bridge host print terse where bridge~"{service}" dynamic=yes local=no')
-            output = stdout.read().decode('utf-8')
-            logger.info(f"External MACs learned POP: {output}")
-            error = stderr.read().decode('utf-8')
-            return output.strip() if output else "No external MACs found."
-        ssh_client.close()
-        if error:
-            logger.error(f"Error fetching external MACs: {error}")
-            return f"Error: {error}"
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            if type == 'cpe':
+                stdin, stdout, stderr = ssh_client.exec_command('interface bridge host print terse where dynamic=yes local=no', timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                error = stderr.read().decode('utf-8')
+                logger.info(f"External MACs learned CPE: {output}")
+                return output.strip() if output else "No external MACs found."
+            elif type == 'pop':
+                stdin, stdout, stderr = ssh_client.exec_command(f'/interface bridge host print terse where bridge~"{service}" dynamic=yes local=no', timeout=Deadline.timeout())
+                output = stdout.read().decode('utf-8')
+                logger.info(f"External MACs learned POP: {output}")
+                error = stderr.read().decode('utf-8')
+                return output.strip() if output else "No external MACs found."
         
         
 
@@ -346,45 +501,153 @@ class MikrotikConnection:
         results = ""
         
         # Comandos para Exibir resultado
-        ssh_client = MikrotikConnection._connect(type , ip )
-        
-        stdin, stdout, stderr = ssh_client.exec_command(f'/interface monitor-traffic [find comment~"WAN"] once')
-        wan_output = stdout.read().decode('utf-8')
-        wan_error = stderr.read().decode('utf-8')
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command(f'/interface monitor-traffic [find comment~"WAN"] once', timeout=Deadline.timeout())
+            wan_output = stdout.read().decode('utf-8')
+            wan_error = stderr.read().decode('utf-8')
+
+            stdin, stdout, stderr = ssh_client.exec_command(f'/interface monitor-traffic [find comment~"Customer"] once', timeout=Deadline.timeout())
+            customer_output = stdout.read().decode('utf-8')
+            customer_error = stderr.read().decode('utf-8')  
         logger.info(f"WAN Traffic Statistics: {wan_output}")
         if wan_error:
             results += f"Error in WAN traffic statistics: {wan_error}\n"
         else:
             results += f"WAN Traffic Statistics:\n{wan_output.strip()}\n"
         
-        
-        stdin, stdout, stderr = ssh_client.exec_command(f'/interface monitor-traffic [find comment~"Customer"] once')
-        customer_output = stdout.read().decode('utf-8')
-        customer_error = stderr.read().decode('utf-8')  
         logger.info(f"Customer Traffic Statistics: {customer_output}")
         if customer_error:
             logger.error(f"Error in Customer traffic statistics: {customer_error}")
             results += f"Error in Customer traffic statistics: {customer_error}\n"
         else:
             results += f"Customer Traffic Statistics:\n{customer_output.strip()}\n"
-        ssh_client.close()
         return results
     
 
     @staticmethod
-    def get_ip_address(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+    def _format_cpe_status(outputs: List[Optional[str]]) -> dict:
+        """
+        Shape the outputs of CPE_STATUS_COMMANDS like the individual getters do.
+
+        Commands that did not complete (None) are reported as BATCH_INCOMPLETE, not as "No ... found."
+        """
+        incomplete = [command for command, output in zip(CPE_STATUS_COMMANDS, outputs) if output is None]
+        if incomplete:
+            logger.warning(f"CPE status batch timed out before: {incomplete}")
+
+        def shape(output: Optional[str], empty: str) -> str:
+            if output is None:
+                return BATCH_INCOMPLETE
+            return output or empty
+
+        (system_resource, all_interfaces, eoip, l2tp, gre,
+         customer_interfaces, external_macs, wan_traffic, customer_traffic) = outputs
+
+        logger.info(f"External MACs learned CPE: {external_macs}")
+        return {
+            "system_resource": shape(system_resource, "No system resource information found."),
+            "all_interface_status": shape(all_interfaces, "No interfaces found."),
+            "eoip_interfaces": shape(eoip, "No EoIP interfaces found."),
+            "l2tp_interfaces": shape(l2tp, "No L2TP interfaces found."),
+            "gre_interfaces": shape(gre, "No GRE interfaces found."),
+            "customer_interface_status": shape(customer_interfaces, "No customer interfaces found."),
+            "external_macs": shape(external_macs, "No external MACs found."),
+            "traffic_statistics": (
+                f"WAN Traffic Statistics:\n{shape(wan_traffic, '')}\n"
+                f"Customer Traffic Statistics:\n{shape(customer_traffic, '')}\n"
+            ),
+        }
+
+    @staticmethod
+    def get_cpe_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> dict:
+        """
+        Collect everything CheckCpe needs from a Mikrotik CPE in a single batched round trip.
+
+        Returns:
+            dict: system_resource, all_interface_status, eoip_interfaces, l2tp_interfaces, gre_interfaces,
+            customer_interface_status, external_macs and traffic_statistics, formatted like the individual getters.
+        """
+        outputs = MikrotikConnection.run_batch(type, ip, CPE_STATUS_COMMANDS)
+        return MikrotikConnection._format_cpe_status(outputs)
+
+    @staticmethod
+    def run_parallel(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, commands: List[str] = [], timeout: int = 60) -> List[tuple]:
+        """
+        Run independent read-only commands on parallel channels of one pooled session.
+
+        Args:
+            type (str): Connection type, either 'cpe' or 'pop'.
+            ip (str): IP address of the Mikrotik device.
+            commands (list): RouterOS commands to run.
+            timeout (int): Per-command deadline in seconds.
+
+        Returns:
+            list: (output, error) for every command, in order.
+        """
+        with MikrotikConnection._session(type, ip) as ssh_client:
+            return run_on_channels(ssh_client, commands, timeout=timeout)
+
+    @staticmethod
+    def get_config_status(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> dict:
+        """
+        Collect running config, IP addresses and firewall rules concurrently over one session.
+
+        Returns:
+            dict: config, ips and firewall, formatted like get_running_config, get_ip_address
+            and get_firewall_filter.
+        """
+        results = MikrotikConnection.run_parallel(type, ip, [command for _, command, _ in CONFIG_STATUS_COMMANDS])
+        status = {}
+        for (key, command, empty), (output, error) in zip(CONFIG_STATUS_COMMANDS, results):
+            if error:
+                logger.error(f"Error running '{command}': {error}")
+                status[key] = f"Error: {error}"
+            else:
+                status[key] = output.strip() if output else empty
+        return status
+
+    @staticmethod
+    def stream_command(type: Optional[str] = ['cpe', 'pop'], ip: Optional[str] = None, command: str = "/export",
+                       on_chunk=None, timeout: int = 120) -> str:
+        """
+        Run a command with large output (e.g. /export or /log print) and pass it to on_chunk as it arrives.
+
+        Nothing is buffered, so memory stays bounded however large the output is.
+
+        Args:
+            type (str): Connection type, either 'cpe' or 'pop'.
+            ip (str): IP address of the Mikrotik device.
+            command (str): RouterOS command to run.
+            on_chunk (callable): Receives each decoded chunk of output.
+            timeout (int): Deadline in seconds, bounded by the tool Deadline.
+
+        Returns:
+            str: stderr of the command, "" when it succeeded.
+        """
+        with MikrotikConnection._session(type, ip) as ssh_client:
+            return stream_exec(ssh_client, command, on_chunk, timeout=timeout)
+
+    @staticmethod
+    def get_ip_address(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None,
+                       interface: Optional[str] = None, address: Optional[str] = None) -> str:
         """
         Get the IP address of the Mikrotik device.
+
+        Args:
+            interface (str): Optional regex on the interface name, applied on the device with 'where'.
+            address (str): Optional regex on the address, applied on the device.
         
         Returns:
             str: The output of the IP address command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        stdin, stdout, stderr = ssh_client.exec_command("/ip address print")
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        
-        ssh_client.close()
+        try:
+            command = "/ip address print" + routeros_where(interface=interface, address=address)
+        except ValueError as e:
+            return f"Error: {e}"
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command(command, timeout=Deadline.timeout())
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
         
         if error:
             logger.error(f"Error fetching IP addresses: {error}")
@@ -393,19 +656,27 @@ class MikrotikConnection:
         return output.strip() if output else "No IP addresses found." 
     
     @staticmethod
-    def get_firewall_filter(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None) -> str:
+    def get_firewall_filter(type: Optional[str] = ['cpe', 'pop'] , ip: Optional[str] = None,
+                            chain: Optional[str] = None, interface: Optional[str] = None) -> str:
         """
         Get the firewall filter rules on the Mikrotik device.
+
+        Args:
+            chain (str): Optional regex on the chain (input, forward, ...), applied on the device with 'where'.
+            interface (str): Optional regex on the rule's in-interface, applied on the device.
         
         Returns:
             str: The output of the firewall filter command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        stdin, stdout, stderr = ssh_client.exec_command("/ip firewall filter print")
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        logger.info(f"Firewall Filter Rules: {output}")
-        ssh_client.close()
+        try:
+            command = "/ip firewall filter print" + routeros_where(chain=chain, in_interface=interface)
+        except ValueError as e:
+            return f"Error: {e}"
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command(command, timeout=Deadline.timeout())
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
+        logger.info(f"Firewall filter rules retrieved from {ip} ({len(output)} bytes)")
         
         if error:
             logger.error(f"Error fetching firewall filter rules: {error}")
@@ -421,12 +692,11 @@ class MikrotikConnection:
         Returns:
             str: The output of the running configuration command.
         """
-        ssh_client = MikrotikConnection._connect(type , ip )
-        stdin, stdout, stderr = ssh_client.exec_command("/export")
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-        logger.info(f"Running Configuration: {output}")
-        ssh_client.close()
+        with MikrotikConnection._session(type , ip ) as ssh_client:
+            stdin, stdout, stderr = ssh_client.exec_command("/export", timeout=Deadline.timeout())
+            output = stdout.read().decode('utf-8')
+            error = stderr.read().decode('utf-8')
+        logger.info(f"Running configuration retrieved from {ip} ({len(output)} bytes)")
         
         if error:
             logger.error(f"Error fetching running configuration: {error}")
@@ -465,7 +735,7 @@ class MikrotikConnection:
 
 
     @staticmethod
-    def extented_ping(ip, type , src , dst, count=10, interval=0.1, size=1472) -> str:
+    def extented_ping(ip, type , src , dst, count=10, interval=0.1, size=1472, ssh_client: Optional[paramiko.SSHClient] = None) -> str:
         """
         Perform an extended ping to the specified destination IP address from the source IP address.
         Args:
@@ -476,33 +746,28 @@ class MikrotikConnection:
             count (int): The number of ping requests to send. Default is 10.
             interval (int): The interval between ping requests in seconds. Default is 1.
             size (int): The size of the ping packets in bytes. Default is 1472.
+            ssh_client (paramiko.SSHClient): Client already leased by the caller; when given, no second
+                lease is taken on the same device.
         Returns:
-            str: The output of the ping command, including packet loss statistics.
+            str: The packet-loss summary line, or the output read so far followed by a
+            "ping truncated (timeout)" note when the ping did not finish in time.
+
+        Raises:
+            DeadlineExceeded: If the tool budget is already spent before the ping starts.
         """
         command = f'/ping {dst} src-address={src} count={count} size={size} interval={interval}'
-        ssh_client = MikrotikConnection._connect(type , ip)
-        stdin, stdout, stderr = ssh_client.exec_command(command)
+        if ssh_client is None:
+            with MikrotikConnection._session(type , ip) as ssh_client:
+                return MikrotikConnection.extented_ping(ip, type, src, dst, count, interval, size, ssh_client=ssh_client)
+        parser = SummaryLineParser("packet-loss")
+        stdin, stdout, stderr = ssh_client.exec_command(command, timeout=Deadline.timeout())
         logger.info(f"Executing command: {command}")
-        channel = stdout.channel
-        output_lines = []
-
-        # keep reading until the command completes
-        while not channel.exit_status_ready():
-            if channel.recv_ready():
-                output_lines.append(channel.recv(65000).decode('utf-8', errors='ignore'))
-        while channel.recv_ready():
-            output_lines.append(channel.recv(65000).decode('utf-8', errors='ignore'))
-        full_output = "".join(output_lines)
-        lines = full_output.splitlines()
-    
-        # Filter out lines that do not contain ping statistics
-        for line in reversed(lines):
-            print("---->", line)
-            if "packet-loss" in line:
-                result = line.strip()
-                break
-            else:
-                result = None
+
+        # block on the channel until the ping finishes, feeding the summary parser as replies arrive
+        full_output = read_until_exit(stdout.channel, on_chunk=parser.feed, timeout=count * max(interval, 0.01) + 30)
+        result = parser.close()
         logger.info(f"Ping output: {full_output}")
-        ssh_client.close()
-        return result  
\ No newline at end of file
+        if result is None:
+            logger.warning(f"Ping {command} ended without a packet-loss summary.")
+            return f"{full_output.strip()}\nping truncated (timeout): no packet-loss summary received.\n"
+        return result
\ No newline at end of file
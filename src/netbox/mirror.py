@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+from infra.logger.service_log import Logger
+from src.netbox.name_index import NameIndex
+
+logger = Logger.get_logger("netbox_mirror")
+
+# Overlap subtracted from each sync cursor so clock skew with NetBox cannot hide a change
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class InventoryMirror:
+    """
+    In-process copy of the NetBox device inventory, kept current by a background syncer.
+
+    The first sync loads every device; later ones only pull devices whose last_updated is newer
+    than the previous sync. A full reload every full_resync seconds picks up deletions and
+    changes that do not touch the device object itself (e.g. an IP address edited in place);
+    mark_stale() forces one early, e.g. when a webhook reports such a change.
+    Records are indexed by name, primary IP, site, manufacturer and ConnectedTo, and a NameIndex
+    resolves service IDs, site names and device names (exact, prefix or substring) for search().
+
+    :param fetch: Callable returning DeviceRecords changed since an ISO timestamp, or all of them for None.
+    :param interval: Seconds between incremental syncs.
+    :param full_resync: Seconds between full reloads.
+    :param max_age: A mirror whose last successful sync is older than this is not fresh.
+    """
+
+    def __init__(self, fetch: Callable[[Optional[str]], list], interval: float = 60,
+                 full_resync: float = 3600, max_age: float = 300):
+        self.fetch = fetch
+        self.interval = interval
+        self.full_resync = full_resync
+        self.max_age = max_age
+
+        self._lock = threading.RLock()
+        self._by_id: Dict[int, object] = {}
+        self._by_name: Dict[str, int] = {}
+        self._by_ip: Dict[str, int] = {}
+        self._by_site: Dict[str, Set[int]] = defaultdict(set)
+        self._by_manufacturer: Dict[str, Set[int]] = defaultdict(set)
+        self._by_connected_to: Dict[str, Set[int]] = defaultdict(set)
+        self._names = NameIndex()
+        self._cursor: Optional[str] = None
+        self._last_sync: Optional[float] = None
+        self._last_full: Optional[float] = None
+        self._stale = False
+        self._generation = 0
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+
+    def _index(self, record):
+        self._by_id[record.id] = record
+        self._by_name[record.name] = record.id
+        if record.management_ip:
+            self._by_ip[record.management_ip] = record.id
+        if record.site:
+            self._by_site[record.site.lower()].add(record.id)
+        if record.manufacturer:
+            self._by_manufacturer[record.manufacturer.lower()].add(record.id)
+        if record.connected_to:
+            self._by_connected_to[record.connected_to.lower()].add(record.id)
+        self._names.add(record.id, NameIndex.keys_for(record.name, record.site))
+
+    def _unindex(self, device_id: int):
+        record = self._by_id.pop(device_id, None)
+        if record is None:
+            return
+        self._names.remove(device_id)
+        if self._by_name.get(record.name) == device_id:
+            del self._by_name[record.name]
+        if record.management_ip and self._by_ip.get(record.management_ip) == device_id:
+            del self._by_ip[record.management_ip]
+        for index, key in ((self._by_site, record.site), (self._by_manufacturer, record.manufacturer),
+                           (self._by_connected_to, record.connected_to)):
+            if key:
+                index[key.lower()].discard(device_id)
+                if not index[key.lower()]:
+                    del index[key.lower()]
+
+    def _clear(self):
+        for index in (self._by_id, self._by_name, self._by_ip, self._by_site, self._by_manufacturer, self._by_connected_to):
+            index.clear()
+        self._names.clear()
+
+    def sync(self) -> int:
+        """
+        Pull changes from NetBox (everything on the first run and every full_resync seconds).
+
+        :return: Number of records loaded.
+        :raises Exception: Whatever fetch raises; the mirror keeps its previous content.
+        """
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            full = self._cursor is None or self._last_full is None or now - self._last_full >= self.full_resync
+        started = datetime.now(timezone.utc) - SYNC_OVERLAP
+        records = [record for record in self.fetch(None if full else self._cursor) if record.id is not None]
+        with self._lock:
+            # a mark_stale() that arrived while fetching is only satisfied by the next full sync
+            current = generation == self._generation
+            if full:
+                self._clear()
+                if current:
+                    self._last_full = now
+            for record in records:
+                self._unindex(record.id)
+                self._index(record)
+            self._cursor = started.isoformat()
+            self._last_sync = now
+            if full and current:
+                self._stale = False
+        logger.info(f"NetBox mirror {'full' if full else 'incremental'} sync: {len(records)} device(s), {len(self._by_id)} total")
+        return len(records)
+
+    def _sync_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"NetBox mirror sync failed, serving the previous inventory: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """
+        Start the background syncer (idempotent).
+        """
+        if self._syncer is None or not self._syncer.is_alive():
+            self._stop.clear()
+            self._syncer = threading.Thread(target=self._sync_forever, name="netbox-mirror", daemon=True)
+            self._syncer.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def mark_stale(self):
+        """
+        Stop serving from the mirror until a full reload has run, and wake the syncer to run it now.
+
+        For changes the incremental sync cannot see because they do not bump the device's
+        last_updated (e.g. its primary IP address edited in place).
+        """
+        with self._lock:
+            self._stale = True
+            self._last_full = None
+            self._generation += 1
+        self._wake.set()
+
+    def is_fresh(self) -> bool:
+        """
+        True if the last successful sync is at most max_age seconds old and the mirror is not marked stale.
+        """
+        return not self._stale and self._last_sync is not None and time.monotonic() - self._last_sync <= self.max_age
+
+    def remove(self, name: str) -> bool:
+        """
+        Drop a device by name, e.g. when a webhook reports it changed; the next sync brings it back.
+        """
+        with self._lock:
+            device_id = self._by_name.get(name)
+            if device_id is None:
+                return False
+            self._unindex(device_id)
+            return True
+
+    def _records(self, ids) -> List[object]:
+        return sorted((self._by_id[i] for i in ids if i in self._by_id), key=lambda record: record.name)
+
+    def get(self, name: str):
+        with self._lock:
+            device_id = self._by_name.get(name)
+            return self._by_id.get(device_id) if device_id is not None else None
+
+    def by_ip(self, ip: str):
+        with self._lock:
+            device_id = self._by_ip.get(ip.split('/')[0])
+            return self._by_id.get(device_id) if device_id is not None else None
+
+    def by_site(self, site: str) -> List[object]:
+        with self._lock:
+            return self._records(self._by_site.get(site.lower(), ()))
+
+    def by_manufacturer(self, manufacturer: str) -> List[object]:
+        with self._lock:
+            return self._records(self._by_manufacturer.get(manufacturer.lower(), ()))
+
+    def by_connected_to(self, pop: str) -> List[object]:
+        with self._lock:
+            return self._records(self._by_connected_to.get(pop.lower(), ()))
+
+    def search(self, query: str) -> List[object]:
+        """
+        Devices whose name, site or embedded service ID matches query exactly, else by prefix, else as a substring.
+        """
+        with self._lock:
+            return self._records(self._names.lookup(query.strip()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "devices": len(self._by_id),
+                "fresh": self.is_fresh(),
+                "stale": self._stale,
+                "last_sync_age": round(time.monotonic() - self._last_sync, 1) if self._last_sync is not None else None,
+                "cursor": self._cursor,
+            }
@@ -0,0 +1,117 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+# Service IDs embedded in device and site names, e.g. "EMB.5571.D023" in "EMB.5571.D023-CPE01"
+SERVICE_ID = re.compile(r'[a-z]{2,5}\.\d{2,6}\.[a-z0-9]{2,8}', re.IGNORECASE)
+
+NGRAM = 3
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class NameIndex:
+    """
+    In-memory lookup of device IDs by device name, site name and embedded service IDs.
+
+    Keys are case-insensitive. Exact lookups use a dict, prefix lookups bisect a sorted key
+    list, and substring lookups intersect trigram postings before checking the candidates, so
+    none of them scans the whole inventory. Entries are added and removed per device, so the
+    index follows the inventory mirror incrementally.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids_by_key: Dict[str, Set[int]] = defaultdict(set)
+        self._keys_by_id: Dict[int, Set[str]] = {}
+        self._sorted_keys: List[str] = []
+        self._keys_by_ngram: Dict[str, Set[str]] = defaultdict(set)
+
+    @staticmethod
+    def keys_for(name: str, site: str = None) -> Set[str]:
+        """
+        Index keys of a device: its name, its site and every service ID found in either.
+        """
+        keys = set()
+        for text in (name, site):
+            if text:
+                keys.add(text.lower())
+                keys.update(match.lower() for match in SERVICE_ID.findall(text))
+        return keys
+
+    def add(self, device_id: int, keys: Iterable[str]):
+        with self._lock:
+            self._remove(device_id)
+            keys = set(keys)
+            self._keys_by_id[device_id] = keys
+            for key in keys:
+                if not self._ids_by_key[key]:
+                    bisect.insort(self._sorted_keys, key)
+                    for gram in _ngrams(key):
+                        self._keys_by_ngram[gram].add(key)
+                self._ids_by_key[key].add(device_id)
+
+    def _remove(self, device_id: int):
+        for key in self._keys_by_id.pop(device_id, ()):
+            ids = self._ids_by_key[key]
+            ids.discard(device_id)
+            if ids:
+                continue
+            del self._ids_by_key[key]
+            del self._sorted_keys[bisect.bisect_left(self._sorted_keys, key)]
+            for gram in _ngrams(key):
+                self._keys_by_ngram[gram].discard(key)
+                if not self._keys_by_ngram[gram]:
+                    del self._keys_by_ngram[gram]
+
+    def remove(self, device_id: int):
+        with self._lock:
+            self._remove(device_id)
+
+    def clear(self):
+        with self._lock:
+            self._ids_by_key.clear()
+            self._keys_by_id.clear()
+            self._sorted_keys.clear()
+            self._keys_by_ngram.clear()
+
+    def exact(self, query: str) -> Set[int]:
+        with self._lock:
+            return set(self._ids_by_key.get(query.lower(), ()))
+
+    def prefix(self, query: str) -> Set[int]:
+        query = query.lower()
+        ids = set()
+        with self._lock:
+            index = bisect.bisect_left(self._sorted_keys, query)
+            while index < len(self._sorted_keys) and self._sorted_keys[index].startswith(query):
+                ids.update(self._ids_by_key[self._sorted_keys[index]])
+                index += 1
+        return ids
+
+    def contains(self, query: str) -> Set[int]:
+        query = query.lower()
+        if len(query) < NGRAM:
+            return self.prefix(query)
+        with self._lock:
+            postings = sorted((self._keys_by_ngram.get(gram, set()) for gram in _ngrams(query)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+            ids = set()
+            for key in candidates:
+                if query in key:
+                    ids.update(self._ids_by_key[key])
+        return ids
+
+    def lookup(self, query: str) -> Set[int]:
+        """
+        Devices matching query exactly, else by prefix, else as a substring; the first non-empty tier wins.
+
+        A blank query matches nothing rather than every key.
+        """
+        if not query.strip():
+            return set()
+        return self.exact(query) or self.prefix(query) or self.contains(query)
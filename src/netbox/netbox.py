@@ -1,38 +1,326 @@
+from dataclasses import dataclass
 from infra.config import NetboxConfig
-from typing import Optional
+from infra.deadline import DeadlineSession
+from infra.ttl_cache import TTLCache
+from src.netbox.mirror import InventoryMirror
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional
+import json
 import pynetbox
+import threading
 
 HOST = NetboxConfig.get_netbox_url()
 TOKEN = NetboxConfig.get_netbox_token()
 
+# Process-wide client shared by every executor thread; built lazily by Netbox.connect()
+_client = None
+_client_lock = threading.Lock()
+
+# Device metadata rarely changes between troubleshooting calls: records by device name, and
+# record lists by site/service search. NetBox webhooks evict changed devices (see apply_webhook).
+device_record_cache = TTLCache(NetboxConfig.get_cache_size(), NetboxConfig.get_cache_ttl())
+device_search_cache = TTLCache(NetboxConfig.get_cache_size(), NetboxConfig.get_cache_ttl())
+
+# Full device inventory kept in process by a background syncer (started by the server when NETBOX_MIRROR_INTERVAL > 0)
+inventory_mirror = InventoryMirror(
+    lambda since: Netbox.fetch_devices(since),
+    interval=NetboxConfig.get_mirror_interval(),
+    full_resync=NetboxConfig.get_mirror_full_resync(),
+    max_age=NetboxConfig.get_mirror_max_age(),
+)
+
+# Every device matching a search, with the fields of DeviceRecord, in one GraphQL request
+DEVICES_QUERY = """
+query {{
+  device_list(q: {q}) {{
+    id
+    name
+    primary_ip4 {{ address }}
+    primary_ip6 {{ address }}
+    device_type {{ model manufacturer {{ name }} }}
+    site {{ name }}
+    custom_fields
+  }}
+}}
+"""
+# GraphQL returns object custom fields as raw IDs; ConnectedTo IDs are resolved to names in one query
+DEVICE_NAMES_QUERY = "query {{ device_list(id: {ids}) {{ id name }} }}"
+
+
+@dataclass(frozen=True)
+class DeviceRecord:
+    """
+    The fields the tools need from a NetBox device, read from a single API call.
+    """
+    name: str
+    management_ip: Optional[str] = None
+    device_type: Optional[str] = None
+    manufacturer: Optional[str] = None
+    site: Optional[str] = None
+    connected_to: Optional[str] = None
+    id: Optional[int] = None
+
+
 class Netbox:
+    @staticmethod
+    def _build_session() -> DeadlineSession:
+        """
+        Build the HTTP session of the shared client: keep-alive connections pooled up to NETBOX_POOL_SIZE.
+
+        Requests are sent through a DeadlineSession, so each one is bounded by the tool's remaining budget.
+        """
+        session = DeadlineSession()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=NetboxConfig.get_pool_size())
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
     @staticmethod
     def connect():
         """
-        Connect to the NetBox API using the provided host and token.
-        
+        Return the process-wide NetBox API client, creating it on first use.
+
+        The client and its connection pool are shared by all executor threads, so TLS handshakes
+        happen once per pooled connection instead of once per query. With NETBOX_THREADING on,
+        pynetbox fetches the pages of large filter() results in parallel.
+
         :return: A pynetbox API instance.
         """
-        return pynetbox.api(HOST,TOKEN)
+        global _client
+        if _client is None:
+            with _client_lock:
+                if _client is None:
+                    nb = pynetbox.api(HOST, TOKEN, threading=NetboxConfig.get_threading())
+                    nb.http_session = Netbox._build_session()
+                    _client = nb
+        return _client
 
     @staticmethod
-    def get_management_ip(device_name: str) -> Optional[str]:
+    def _connected_to_name(custom_fields) -> Optional[str]:
+        connected_to = (custom_fields or {}).get('ConnectedTo', None)
+        if connected_to:
+            if 'display' in connected_to:
+                return connected_to.get('display', None)
+            elif 'name' in connected_to:
+                return connected_to.get('name', None)
+        return None
+
+    @staticmethod
+    def _record_from_device(device) -> DeviceRecord:
+        device_type = device.device_type
+        return DeviceRecord(
+            name=device.name,
+            management_ip=device.primary_ip.address.split('/')[0] if device.primary_ip else None,  # Only the IP part
+            device_type=device_type.model if device_type else None,
+            manufacturer=device_type.manufacturer.name if device_type and device_type.manufacturer else None,
+            site=device.site.name if device.site else None,
+            connected_to=Netbox._connected_to_name(device.custom_fields),
+            id=device.id,
+        )
+
+    @staticmethod
+    def get_device_record(device_name: str) -> Optional[DeviceRecord]:
         """
-        Retrieve the management IP address of a device from NetBox.
-        
+        Retrieve management IP, model, manufacturer, site and ConnectedTo of a device in one NetBox call.
+
+        Records come from the inventory mirror when it is fresh, otherwise from device_record_cache
+        or NetBox. If NetBox cannot answer, a stale mirror entry is returned instead.
+
         :param device_name: The name of the device to query.
-        :return: The management IP address as a string, or None if not found.
+        :return: A DeviceRecord, or None if the device is not found or the query failed.
         """
-        
+        if inventory_mirror.is_fresh():
+            record = inventory_mirror.get(device_name)
+            if record:
+                return record
+        record = device_record_cache.get_or_load(device_name, lambda: Netbox._fetch_device_record(device_name))
+        return record or inventory_mirror.get(device_name)
+
+    @staticmethod
+    def _fetch_device_record(device_name: str) -> Optional[DeviceRecord]:
         nb = Netbox.connect()
         try:
             device = nb.dcim.devices.get(name=device_name)
-            if device and device.primary_ip:
-                return device.primary_ip.address.split('/')[0]  # Return only the IP part
+        except Exception as e:
+            print(f"Error retrieving device {device_name}: {e}")
             return None
+        return Netbox._record_from_device(device) if device else None
+
+    @staticmethod
+    def _graphql(query: str) -> dict:
+        """
+        Run a GraphQL query on the shared session and return its data.
+
+        :raises ValueError: If NetBox answers with GraphQL errors.
+        """
+        response = Netbox.connect().http_session.post(
+            f"{HOST.rstrip('/')}/graphql/",
+            json={"query": query},
+            headers={"Authorization": f"Token {TOKEN}", "Accept": "application/json"},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("errors"):
+            raise ValueError(f"GraphQL errors: {payload['errors']}")
+        return payload["data"]
+
+    @staticmethod
+    def _graphql_device_records(query: str) -> List[DeviceRecord]:
+        devices = Netbox._graphql(DEVICES_QUERY.format(q=json.dumps(query)))["device_list"]
+        connected_ids = {(device.get("custom_fields") or {}).get("ConnectedTo") for device in devices}
+        connected_ids = sorted(i for i in connected_ids if isinstance(i, int))
+        names = {}
+        if connected_ids:
+            data = Netbox._graphql(DEVICE_NAMES_QUERY.format(ids=json.dumps(connected_ids)))
+            names = {int(device["id"]): device["name"] for device in data["device_list"]}
+
+        records = []
+        for device in devices:
+            primary_ip = device.get("primary_ip4") or device.get("primary_ip6")
+            device_type = device.get("device_type") or {}
+            connected_to = (device.get("custom_fields") or {}).get("ConnectedTo")
+            records.append(DeviceRecord(
+                name=device["name"],
+                management_ip=primary_ip["address"].split('/')[0] if primary_ip else None,
+                device_type=device_type.get("model"),
+                manufacturer=(device_type.get("manufacturer") or {}).get("name"),
+                site=(device.get("site") or {}).get("name"),
+                connected_to=names.get(connected_to) if isinstance(connected_to, int)
+                else Netbox._connected_to_name(device.get("custom_fields")),
+                id=int(device["id"]),
+            ))
+        return records
+
+    @staticmethod
+    def get_device_records(query: str) -> Optional[List[DeviceRecord]]:
+        """
+        Retrieve every device matching a site or service search, with all DeviceRecord fields, in one round trip.
+
+        Uses the GraphQL API when NETBOX_GRAPHQL is on and falls back to a REST search, whose
+        device list also carries every field, if GraphQL is unavailable. Results are cached in
+        device_search_cache and also seed device_record_cache, so follow-up per-device lookups
+        do not reach NetBox.
+
+        When the inventory mirror is fresh, its name index answers with exact, then prefix, then
+        substring matches on device names, site names and service IDs; it is also the fallback
+        when NetBox cannot answer.
+
+        :param query: Site name or service ID, searched like the NetBox 'q' filter.
+        :return: A list of DeviceRecord, or None if no device matches.
+        """
+        if inventory_mirror.is_fresh():
+            records = inventory_mirror.search(query)
+            if records:
+                return records
+        records = device_search_cache.get(query)
+        if records is None:
+            records = Netbox._fetch_device_records(query)
+            if records:
+                device_search_cache.set(query, records)
+                for record in records:
+                    device_record_cache.set(record.name, record)
+        return records or inventory_mirror.search(query) or None
+
+    @staticmethod
+    def fetch_devices(since: Optional[str] = None) -> List[DeviceRecord]:
+        """
+        Load every device, or only those whose last_updated is at or after since (ISO 8601), for the inventory mirror.
+        """
+        nb = Netbox.connect()
+        devices = nb.dcim.devices.filter(last_updated__gte=since) if since else nb.dcim.devices.all()
+        return [Netbox._record_from_device(device) for device in devices]
+
+    @staticmethod
+    def _fetch_device_records(query: str) -> Optional[List[DeviceRecord]]:
+        if NetboxConfig.get_graphql():
+            try:
+                return Netbox._graphql_device_records(query) or None
+            except Exception as e:
+                print(f"GraphQL device query failed for {query}, using REST: {e}")
+        try:
+            nb = Netbox.connect()
+            records = [Netbox._record_from_device(device) for device in nb.dcim.devices.filter(q=query)]
         except Exception as e:
-            print(f"Error retrieving management IP for {device_name}: {e}")
+            print(f"REST device search failed for {query}: {e}")
             return None
+        return records or None
+
+    @staticmethod
+    def invalidate_devices(*device_names: str) -> int:
+        """
+        Evict devices from the caches, along with every cached search that returned one of them.
+
+        :return: Number of cache entries dropped.
+        """
+        names = {name for name in device_names if name}
+        for name in names:
+            inventory_mirror.remove(name)
+        dropped = sum(device_record_cache.invalidate(name) for name in names)
+        dropped += device_search_cache.invalidate_where(
+            lambda query, records: any(record.name in names for record in records))
+        return dropped
+
+    @staticmethod
+    def apply_webhook(payload: dict) -> int:
+        """
+        Evict what a NetBox webhook event changed.
+
+        Device events evict the device under its old and new name. A created or deleted device,
+        or an update to its name, site or tenant, can change any search result, so searches are
+        flushed too. Events on other models
+        (IP addresses, device types, ...) may change any record without touching the device's
+        last_updated, so they flush both caches and mark the inventory mirror stale until its
+        next full reload.
+
+        :param payload: Webhook body with 'event', 'model', 'data' and optional 'snapshots'.
+        :return: Number of cache entries dropped.
+        """
+        model = payload.get("model")
+        event = payload.get("event")
+        if model != "device":
+            inventory_mirror.mark_stale()
+            return device_record_cache.clear() + device_search_cache.clear()
+        data = payload.get("data") or {}
+        prechange = ((payload.get("snapshots") or {}).get("prechange")) or {}
+        dropped = Netbox.invalidate_devices(data.get("name"), prechange.get("name"))
+        if event in ("created", "deleted") or Netbox._search_fields_changed(data, prechange):
+            dropped += device_search_cache.clear()
+        return dropped
+
+    @staticmethod
+    def _search_fields_changed(data: dict, prechange: dict) -> bool:
+        """
+        Whether a device update moved it in or out of a search: its name, site or tenant changed.
+
+        Snapshots store related objects by ID while 'data' nests them, so both are compared by ID.
+        Without a prechange snapshot the change cannot be ruled out.
+        """
+        if not prechange:
+            return True
+
+        def ref(value):
+            return value.get("id") if isinstance(value, dict) else value
+
+        return any(ref(data.get(field)) != ref(prechange.get(field)) for field in ("name", "site", "tenant"))
+
+    @staticmethod
+    def cache_stats() -> dict:
+        """
+        Hit/miss counters of the device and search caches, and the state of the inventory mirror.
+        """
+        return {"devices": device_record_cache.stats(), "searches": device_search_cache.stats(),
+                "mirror": inventory_mirror.stats()}
+
+    @staticmethod
+    def get_management_ip(device_name: str) -> Optional[str]:
+        """
+        Retrieve the management IP address of a device from NetBox.
+        
+        :param device_name: The name of the device to query.
+        :return: The management IP address as a string, or None if not found.
+        """
+        record = Netbox.get_device_record(device_name)
+        return record.management_ip if record else None
     
     @staticmethod
     def get_devices_by_site(site_name: str) -> Optional[list]:
@@ -42,14 +330,8 @@ class Netbox:
         :param site_name: The name of the site to query.
         :return: A list of device names, or None if not found.
         """
-        
-        nb = Netbox.connect()
-        devices = nb.dcim.devices.filter(q=site_name)
-        device_list = []
-        for device in devices:
-            print(f"Device: {device.name}, Site: {device.site.name}")
-            device_list.append(device.name)
-        return device_list if device_list else None
+        records = Netbox.get_device_records(site_name)
+        return [record.name for record in records] if records else None
         
     
 
@@ -63,16 +345,8 @@ class Netbox:
         :param device_name: The name of the device to query.
         :return: The manufacturer name as a string, or None if not found.
         """
-        
-        nb = Netbox.connect()
-        try:
-            device = nb.dcim.devices.get(name=device_name)
-            if device and device.device_type and device.device_type.manufacturer:
-                return device.device_type.manufacturer.name
-            return None
-        except Exception as e:
-            print(f"Error retrieving manufacturer for {device_name}: {e}")
-            return None
+        record = Netbox.get_device_record(device_name)
+        return record.manufacturer if record else None
         
 
     @staticmethod
@@ -83,16 +357,8 @@ class Netbox:
         :param device_name: The name of the device to query.
         :return: The device type as a string, or None if not found.
         """
-        
-        nb = Netbox.connect()
-        try:
-            device = nb.dcim.devices.get(name=device_name)
-            if device and device.device_type:
-                return device.device_type.model
-            return None
-        except Exception as e:
-            print(f"Error retrieving device type for {device_name}: {e}")
-            return None
+        record = Netbox.get_device_record(device_name)
+        return record.device_type if record else None
     
     @staticmethod
     def get_connected_to(device_name: str) -> Optional[str]:
@@ -101,21 +367,68 @@ class Netbox:
         :param device_name: The name of the device to query.
         :return: The device type as a string, or None if not found.
         """
-        
-        nb = Netbox.connect()
-        try:
-            device = nb.dcim.devices.get(name=device_name)
-            if device:
-                connected_to = device.custom_fields.get('ConnectedTo', None)    
-                if connected_to:
-                    if 'display' in connected_to:
-                        return connected_to.get('display', None)
-                    elif 'name' in connected_to:
-                        return connected_to.get('name', None)
-                    else:
-                        return None
-        except Exception as e:
-            print(f"Error retrieving connected_to for {device_name}: {e}")
-            return None
+        record = Netbox.get_device_record(device_name)
+        return record.connected_to if record else None
+
+    @staticmethod
+    def get_device_records_by_name(device_names: List[str]) -> Dict[str, DeviceRecord]:
+        """
+        Retrieve the records of many devices, asking NetBox only once for those not already known.
+
+        Names are answered from the fresh inventory mirror or device_record_cache first; the rest
+        are read with a single dcim.devices.filter(name=[...]) request and cached.
+
+        :param device_names: Device names to resolve.
+        :return: Records keyed by name; names not found in NetBox are left out.
+        """
+        records: Dict[str, DeviceRecord] = {}
+        missing = []
+        for name in dict.fromkeys(name for name in device_names if name):
+            record = inventory_mirror.get(name) if inventory_mirror.is_fresh() else None
+            record = record or device_record_cache.get(name)
+            if record:
+                records[name] = record
+            else:
+                missing.append(name)
+        if missing:
+            nb = Netbox.connect()
+            try:
+                for device in nb.dcim.devices.filter(name=missing):
+                    record = Netbox._record_from_device(device)
+                    device_record_cache.set(record.name, record)
+                    records[record.name] = record
+            except Exception as e:
+                print(f"Error retrieving devices {missing}: {e}")
+                stale = {name: inventory_mirror.get(name) for name in missing}
+                records.update({name: record for name, record in stale.items() if record})
+        return records
+
+    @staticmethod
+    def get_connected_pops(device_names: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Resolve the ConnectedTo POP of many devices, with each POP's management IP, model and manufacturer.
+
+        Costs at most one NetBox request for the devices and one for their POPs, and leaves the
+        POP records cached, so a follow-up check_service_in_pop needs no further lookups.
+
+        :param device_names: Names of the service's devices.
+        :return: For each device, {"pop", "management_ip", "device_type", "manufacturer"}, or None without ConnectedTo.
+        """
+        devices = Netbox.get_device_records_by_name(device_names)
+        pops = Netbox.get_device_records_by_name([record.connected_to for record in devices.values()])
+        result = {}
+        for name in device_names:
+            pop_name = devices[name].connected_to if name in devices else None
+            if not pop_name:
+                result[name] = None
+                continue
+            pop = pops.get(pop_name)
+            result[name] = {
+                "pop": pop_name,
+                "management_ip": pop.management_ip if pop else None,
+                "device_type": pop.device_type if pop else None,
+                "manufacturer": pop.manufacturer if pop else None,
+            }
+        return result
 
 
@@ -1,6 +1,74 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from infra.config import QuickbaseConfig
+from infra.deadline import DeadlineExceeded, DeadlineSession
+from infra.ratelimit import TokenBucket
+from infra.singleflight import SingleFlight
+from infra.ttl_cache import TTLCache
+from requests.adapters import HTTPAdapter
+from typing import Optional
+import contextvars
+import json
 import re
+
+QUERY_URL = 'https://api.quickbase.com/v1/records/query'
+# Pause used when a 429 carries no usable Retry-After
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def _retry_after(value: Optional[str]) -> float:
+    """
+    Seconds to wait from a Retry-After header, given as delay-seconds or as an HTTP date.
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _build_session() -> DeadlineSession:
+    session = DeadlineSession()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=QuickbaseConfig.get_pool_size()))
+    return session
+
+
+# Shared by every Quickbase instance and executor thread: one keep-alive connection pool, one
+# realm-wide request budget, and coalescing of identical queries that are in flight at once
+_session = _build_session()
+_rate_limiter = TokenBucket(QuickbaseConfig.get_rate(), QuickbaseConfig.get_burst())
+_inflight = SingleFlight()
+# Recent service dossiers, so the tools asking about the same service share one fan-out
+_dossiers = TTLCache(256, QuickbaseConfig.get_dossier_ttl())
+
+
+@dataclass(frozen=True)
+class ServiceDossier:
+    """
+    Everything Quickbase holds about one service, collected by Quickbase.get_service_dossier.
+
+    A part is None (or empty) when Quickbase answered with no rows for it; when the query itself
+    failed, errors maps the part ('nni', 'equipment', 'cross_connect', 'solution', 'public_ips')
+    to the error message instead.
+    """
+    service_id: str
+    nni: Optional[str] = None
+    equipment: Optional[str] = None
+    cross_connect: Optional[str] = None
+    solution: Optional[dict] = None
+    public_ips: dict = field(default_factory=lambda: {"wan_ips": [], "gateway_ips": []})
+    errors: dict = field(default_factory=dict)
+
  
 class Quickbase:
     def __init__(self):
@@ -9,24 +77,119 @@ class Quickbase:
         
 
     def _make_request(self, body):
+        """
+        Run a records query, sharing the HTTP call with any identical query already in flight.
+        """
+        key = (self.hostname, json.dumps(body, sort_keys=True))
+        return _inflight.do(key, lambda: self._post(body))
+
+    def _post(self, body):
+        """
+        POST a query under the shared rate limit; a 429 pauses every caller for Retry-After and is retried once.
+
+        :raises requests.HTTPError: If Quickbase answers with an error status, including a second 429.
+        """
         headers = {
             'QB-Realm-Hostname': self.hostname,
             'Authorization': self.api_token
         }
-        response = requests.post(
-            'https://api.quickbase.com/v1/records/query',
-            headers=headers,
-            json=body
+        for attempt in range(2):
+            _rate_limiter.acquire()
+            response = _session.post(QUERY_URL, headers=headers, json=body)
+            if response.status_code != 429 or attempt == 1:
+                response.raise_for_status()
+                return response.json()
+            _rate_limiter.penalize(_retry_after(response.headers.get('Retry-After')))
+
+    def _query(self, table, select, where, top=None):
+        """
+        Query records of a table, returning only the select field IDs.
+
+        :param top: Maximum number of rows Quickbase returns.
+        """
+        body = {"from": table, "select": select, "where": where}
+        if top:
+            body["options"] = {"top": top}
+        return self._make_request(body)
+
+    def _nni_and_equipment(self, service_id):
+        """
+        Return (nni, equipment, equipment error), keeping the NNI when only the equipment query fails.
+        """
+        nni = self.get_NNI(service_id)
+        if not nni:
+            return None, None, None
+        try:
+            return nni, self.Get_equipment(nni), None
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"Error retrieving equipment for {nni}: {e}")
+            return nni, None, str(e) or type(e).__name__
+
+    def get_service_dossier(self, service_id) -> ServiceDossier:
+        """
+        Returns NNI, equipment, cross connect, solution and public IPs of the service.
+
+        The NNI, cross connect, solution and public IP tables are queried concurrently; the
+        equipment query needs the NNI and follows it on the same worker. Dossiers are cached for
+        QUICKBASE_DOSSIER_TTL seconds and concurrent requests for one service share a single fan-out.
+        Parts with no rows are left empty. Parts whose query failed are recorded in
+        ServiceDossier.errors, and such a dossier is not cached.
+
+        :raises DeadlineExceeded: If the tool budget runs out while a part is being fetched.
+        """
+        dossier = _dossiers.get(service_id)
+        if dossier is None:
+            dossier = _inflight.do(("dossier", self.hostname, service_id), lambda: self._fetch_dossier(service_id))
+        return dossier
+
+    def _fetch_dossier(self, service_id) -> ServiceDossier:
+        parts = {
+            "nni": self._nni_and_equipment,
+            "cross_connect": self.Get_cross_connect,
+            "solution": self.get_service_information,
+            "public_ips": self.get_vendor_public_ip,
+        }
+        with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="quickbase-dossier") as executor:
+            # Each worker runs in a copy of the caller's context so the tool Deadline still applies
+            futures = {key: executor.submit(contextvars.copy_context().run, func, service_id) for key, func in parts.items()}
+        results = {}
+        errors = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"Error retrieving {key} for {service_id}: {e}")
+                results[key] = None
+                errors[key] = str(e) or type(e).__name__
+
+        nni, equipment, equipment_error = results["nni"] or (None, None, None)
+        if equipment_error:
+            errors["equipment"] = equipment_error
+        cross_connect = results["cross_connect"] if isinstance(results["cross_connect"], str) else None
+        solution = results["solution"] if isinstance(results["solution"], dict) and "solution" in results["solution"] else None
+        dossier = ServiceDossier(
+            service_id=service_id,
+            nni=nni,
+            equipment=equipment,
+            cross_connect=cross_connect,
+            solution=solution,
+            public_ips=results["public_ips"] or {"wan_ips": [], "gateway_ips": []},
+            errors=errors,
         )
-        return response.json()
+        if not errors:
+            _dossiers.set(service_id, dossier)
+        return dossier
 
     def Get_cross_connect(self, service_id):
         '''
         Returns the xconnect of the input service.
         '''
 
-        body = {"from": "bjvepvncz", "select": [], "where": "{8.CT." + f"'{service_id}'" + "}"}
-        response =  self._make_request(body)
+        response = self._query("bjvepvncz", [9], "{8.CT." + f"'{service_id}'" + "}", top=1)
         
         try:
             if response["data"][0]['9']["value"]:
@@ -43,9 +206,8 @@ class Quickbase:
         Returns the first equipment name found containing 'ASW' or 'LER' in the NNI.
         """
 
-        body = {"from": "bmdkybxpd", "select": [39, 41], "where": "{41.CT." + f"'{nni}'" + "}OR{36.CT." + f"'{nni}'" + "}"}
         #{"from": "bmdkybxpd", "select": [39, 41 ], "where": "{41.CT.'EMB.5571.N001'}"}
-        response = self._make_request(body)
+        response = self._query("bmdkybxpd", [39], "{41.CT." + f"'{nni}'" + "}OR{36.CT." + f"'{nni}'" + "}", top=1)
         
         try:
             if response["data"][0]['39']['value']:
@@ -64,8 +226,7 @@ class Quickbase:
         returns the NNI of the input service_id.
 
         """
-        body = {"from": "bmeeuqk9d", "select": [21], "where": "{7.CT." + f"'{service_id}'" + "}"}
-        response =  self._make_request(body)
+        response = self._query("bmeeuqk9d", [21], "{7.CT." + f"'{service_id}'" + "}", top=1)
         if response['data']:
             NNI = response['data'][0]["21"]["value"]
             return NNI
@@ -76,8 +237,7 @@ class Quickbase:
         """
         Returns the service information for the given service_id.
         """
-        body = {"from": "bfwgbisz4", "select": [766 , 838], "where": "{7.CT." + f"'{service_id}'" + "}"}
-        response = self._make_request(body)
+        response = self._query("bfwgbisz4", [766, 838], "{7.CT." + f"'{service_id}'" + "}", top=1)
         try: 
             if response["data"][0]:
                 solution = response["data"][0]['838']['value']
@@ -92,9 +252,7 @@ class Quickbase:
         """
         Returns the vendor public IP for the given service_id.
         """
-        body = {"from": "bkr26d56f", "select": [306, 309], "where": "{234.CT." + f"'{service_id}'" + "}"}
-
-        response = self._make_request(body)
+        response = self._query("bkr26d56f", [306, 309], "{234.CT." + f"'{service_id}'" + "}")
         if response['data']:
             wan_ips, gateway_ips = self.extract_ips(response['data'])
             if wan_ips and gateway_ips:
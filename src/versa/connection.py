@@ -2,6 +2,7 @@ import base64
 import requests
 import urllib3
 from infra.config import VersaConfig
+from infra.deadline import Deadline
 
 class VersaConnection:
     """
@@ -28,7 +29,7 @@ class VersaConnection:
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
             payload = {}
             headers = {'Authorization': f'Basic {base64.b64encode((username + ":" + password).encode()).decode()}'}
-            response = requests.request("GET", url, headers=headers, data=payload, verify=False)
+            response = requests.request("GET", url, headers=headers, data=payload, verify=False, timeout=Deadline.timeout(30))
             return response
         except requests.exceptions.RequestException as e:
             return f'Error Troubleshooting: Failed to make request for Versa {e}'
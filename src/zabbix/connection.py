@@ -1,5 +1,6 @@
 from zabbix_utils import ZabbixAPI
 from infra.config import ZabbixConfig
+from infra.deadline import Deadline
 from datetime import datetime, timedelta, timezone
 import time
 
@@ -8,7 +9,7 @@ class ZabbixPingCheckAction():
         url = ZabbixConfig.get_zabbix_url()
         user = ZabbixConfig.get_zabbix_user()
         password = ZabbixConfig.get_zabbix_password()
-        zapi = ZabbixAPI(url=url, user=user, password=password , skip_version_check=True)
+        zapi = ZabbixAPI(url=url, user=user, password=password , skip_version_check=True, timeout=Deadline.timeout(30))
         return zapi
 
     def get_host_id(self, zapi, host_name):